@@ -0,0 +1,248 @@
+"""
+Asynchronous serving mode for the Gemini proxy.
+
+Serves the same ``/gemini``, ``/cache/stats``, ``/metrics`` and ``/test``
+endpoints as ``server.py``, with the same configuration, rate limits and
+responses, but on a single aiohttp event loop: a request waiting on a slow
+generation holds a coroutine and two sockets rather than a worker thread. Upstream calls share one pooled
+keep-alive client, at most ``MAX_IN_FLIGHT`` of them run at once, and
+requests beyond that are turned away immediately with a 503 and
+Retry-After instead of queueing behind the slow ones.
+
+    GEMINI_API_KEY=... python async_server.py --port 8080
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits
+    resource = None
+
+from aiohttp import ClientError, ClientResponseError, ClientSession, ClientTimeout, TCPConnector, web
+
+from metrics import CONTENT_TYPE, HttpMetrics, Registry
+from proxy_cache import ResponseCache, cache_key, normalize_prompt
+from rate_limiter import retry_after_header
+from server import (GEMINI_API_ENDPOINT, GEMINI_API_URL, UPSTREAM_TIMEOUT, ProxyMetrics, installation_tiers,
+                    make_response_cache, rate_limiter, success_body, upstream_payload)
+from shared_state import SQLiteRateLimiter
+
+MAX_IN_FLIGHT = int(os.environ.get("MAX_IN_FLIGHT", "4096"))  # Concurrent upstream calls before 503
+SATURATED_RETRY_AFTER = int(os.environ.get("SATURATED_RETRY_AFTER", "1"))  # Seconds
+UPSTREAM_KEEPALIVE = float(os.environ.get("UPSTREAM_KEEPALIVE", "30"))  # Idle seconds before a pooled connection closes
+# The shared limiter is a SQLite transaction that can wait on other workers; run it off the loop
+RATE_LIMITER_BLOCKS = isinstance(rate_limiter, SQLiteRateLimiter)
+
+
+class InFlight:
+    """Counter of upstream calls in progress, refusing past ``limit``. Event-loop only."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.current = 0
+        self.peak = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        if self.current >= self.limit:
+            self.rejected += 1
+            return False
+        self.current += 1
+        if self.current > self.peak:
+            self.peak = self.current
+        return True
+
+    def release(self):
+        self.current -= 1
+
+
+UPSTREAM_URL = web.AppKey('upstream_url', str)
+UPSTREAM_SESSION = web.AppKey('upstream_session', ClientSession)
+IN_FLIGHT = web.AppKey('in_flight', InFlight)
+RESPONSE_CACHE = web.AppKey('response_cache', ResponseCache)
+REGISTRY = web.AppKey('registry', Registry)
+HTTP_METRICS = web.AppKey('http_metrics', HttpMetrics)
+PROXY_METRICS = web.AppKey('proxy_metrics', ProxyMetrics)
+
+
+def json_error(message: str, status: int, headers=None) -> web.Response:
+    return web.json_response({'error': message, 'status': 'error'}, status=status, headers=headers)
+
+
+@web.middleware
+async def record_metrics(request: web.Request, handler) -> web.StreamResponse:
+    http = request.app[HTTP_METRICS]
+    matched = request.match_info.route.resource
+    route = matched.canonical if matched is not None else '<unmatched>'
+    start = time.perf_counter()
+    http.in_flight.inc()
+    status = 500
+    response = None
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        http.in_flight.dec()
+        http.record(route, request.method, status, time.perf_counter() - start, request.content_length,
+                    response.content_length if response is not None else None)
+
+
+async def upstream_session(app: web.Application):
+    """Open the shared upstream client for the app's lifetime."""
+    connect_timeout, read_timeout = UPSTREAM_TIMEOUT
+    # One connection per in-flight call, so the pool never queues requests the limit let through
+    connector = TCPConnector(limit=app[IN_FLIGHT].limit, limit_per_host=0,
+                             keepalive_timeout=UPSTREAM_KEEPALIVE)
+    app[UPSTREAM_SESSION] = ClientSession(
+        connector=connector,
+        timeout=ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout))
+    yield
+    await app[UPSTREAM_SESSION].close()
+
+
+async def gemini_proxy(request: web.Request) -> web.Response:
+    installation_id = None
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            return json_error('Invalid JSON body', 400)
+        if not isinstance(data, dict):
+            return json_error('Invalid JSON body', 400)
+        prompt = data.get('prompt')
+        installation_id = data.get('installation_id')
+
+        if not prompt:
+            return json_error('Missing prompt', 400)
+        if not isinstance(prompt, str):
+            return json_error('Prompt must be a string', 400)
+        if not installation_id:
+            return json_error('Missing installation_id', 400)
+
+        # Forward the prompt as sent, but let whitespace-only variants share a cache entry
+        payload = upstream_payload(prompt)
+        key = cache_key(GEMINI_API_ENDPOINT, upstream_payload(normalize_prompt(prompt)))
+        cache = request.app[RESPONSE_CACHE]
+
+        # --- Backpressure (only for new upstream calls, and before rate limiting so a refusal costs no token) ---
+        in_flight = request.app[IN_FLIGHT]
+        needs_slot = cache.needs_fetch(key)
+        if needs_slot and not in_flight.try_acquire():
+            logging.warning(f"Saturated ({in_flight.limit} in flight), refusing installation_id: {installation_id}")
+            return json_error('Server busy', 503, {'Retry-After': str(SATURATED_RETRY_AFTER)})
+
+        try:
+            # --- Rate Limiting ---
+            tier = installation_tiers.get(installation_id)
+            if RATE_LIMITER_BLOCKS:
+                decision = await asyncio.to_thread(rate_limiter.allow, installation_id, tier)
+            else:
+                decision = rate_limiter.allow(installation_id, tier)
+            if not decision.allowed:
+                logging.warning(f"Rate limit exceeded for installation_id: {installation_id}")
+                request.app[PROXY_METRICS].rate_limited.inc(
+                    installation_tiers.get(installation_id, rate_limiter.default_tier))
+                return json_error('Rate limit exceeded', 429, {'Retry-After': retry_after_header(decision)})
+
+            proxy_metrics = request.app[PROXY_METRICS]
+
+            async def forward():
+                with proxy_metrics.upstream_call():
+                    async with request.app[UPSTREAM_SESSION].post(request.app[UPSTREAM_URL], json=payload) as response:
+                        response.raise_for_status()
+                        body = await response.read()
+                    json.loads(body)  # Only valid JSON is cached and passed on
+                proxy_metrics.upstream_response_size.observe(len(body))
+                return body
+
+            # --- Forward the request to the Gemini API (or answer from the cache) ---
+            body, source = await cache.fetch_async(key, forward)
+        finally:
+            if needs_slot:
+                in_flight.release()
+
+        logging.info(f"Request from {installation_id}: prompt='{prompt[:50]}...' - Success ({source})")
+        return web.Response(body=success_body(body), content_type='application/json', headers={'X-Cache': source})
+
+    except ClientResponseError as e:
+        logging.error(f"Upstream error: {e.status} {e.message} - from installation_id: {installation_id}")
+        return json_error(f'Upstream request failed with status {e.status}', 500)
+    except (ClientError, asyncio.TimeoutError) as e:
+        # The exception text can carry the upstream URL, and with it the API key
+        logging.error(f"Upstream request failed: {type(e).__name__} - from installation_id: {installation_id}")
+        return json_error('Upstream request failed', 500)
+    except ValueError as e:
+        logging.error(f"Invalid upstream response: {e} - from installation_id: {installation_id}")
+        return json_error(f'Request Error: {e}', 500)
+    except Exception as e:
+        logging.exception(f"Unexpected Error: {e} - from installation_id: {installation_id}")
+        return json_error(str(e), 500)
+
+
+async def cache_stats(request: web.Request) -> web.Response:
+    return web.json_response({'cache': request.app[RESPONSE_CACHE].stats(), 'status': 'success'})
+
+
+async def metrics(request: web.Request) -> web.Response:
+    return web.Response(body=request.app[REGISTRY].render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+
+async def test_deploy(request: web.Request) -> web.Response:
+    return web.json_response({'message': 'Deployment successful', 'status': 'success'})
+
+
+def create_app(upstream_url: str = GEMINI_API_URL, max_in_flight: int = MAX_IN_FLIGHT,
+               cache: ResponseCache = None) -> web.Application:
+    app = web.Application(middlewares=[record_metrics])
+    app[UPSTREAM_URL] = upstream_url
+    app[IN_FLIGHT] = InFlight(max_in_flight)
+    app[RESPONSE_CACHE] = cache if cache is not None else make_response_cache()
+    app[REGISTRY] = registry = Registry()
+    app[HTTP_METRICS] = HttpMetrics(registry)
+    app[PROXY_METRICS] = ProxyMetrics(registry, app[RESPONSE_CACHE])
+    in_flight = app[IN_FLIGHT]
+    registry.counter('gemini_saturated_total', 'Requests refused with 503 at MAX_IN_FLIGHT.',
+                     function=lambda: in_flight.rejected)
+    app.cleanup_ctx.append(upstream_session)
+    app.router.add_post('/gemini', gemini_proxy)
+    app.router.add_get('/cache/stats', cache_stats)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_get('/test', test_deploy)
+    return app
+
+
+def raise_open_file_limit():
+    """Each in-flight request holds a client and an upstream socket; lift the soft fd limit."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the Gemini proxy on an asyncio event loop.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--access-log', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+
+    raise_open_file_limit()
+    web.run_app(create_app(), host=args.host, port=args.port, backlog=max(MAX_IN_FLIGHT, 128),
+                access_log=logging.getLogger('aiohttp.access') if args.access_log else None)
+
+
+if __name__ == '__main__':
+    main()
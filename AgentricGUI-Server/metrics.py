@@ -0,0 +1,305 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+
+Counters, gauges and fixed-bucket histograms whose recording side never
+takes a lock: an observation is one append to the metric's deque
+(atomic in CPython), and observations are folded into totals and bucket
+counts when the metrics are scraped, or by whichever caller finds the
+backlog long (a non-blocking try, so other callers never wait on it).
+Used by the Gemini proxy and by the API servers at the repository root.
+
+    registry = Registry()
+    requests_total = registry.counter('http_requests_total', 'Requests served.', ('route', 'status'))
+    requests_total.inc('/gemini', '200')
+    registry.render()  # text for GET /metrics
+"""
+import bisect
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+FOLD_AT = 4096  # Pending observations before a recording call folds them
+ROUTE_KEY = 'metrics.route'  # WSGI environ key holding the matched route pattern
+
+# Seconds; covers fast local routes up to long upstream generations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Bytes, powers of four from 64 B to 16 MB
+SIZE_BUCKETS = tuple(64 * 4 ** i for i in range(10))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    TYPE = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.function = function  # Read at scrape time instead of recorded values (unlabelled only)
+        self._pending = deque()  # (label values, value), appended without a lock
+        self._fold_lock = threading.Lock()
+        self._series = {}  # label values -> folded state
+
+    def _record(self, labels: Tuple[str, ...], value):
+        pending = self._pending
+        pending.append((labels, value))
+        if len(pending) > FOLD_AT:
+            self._fold_backlog()
+
+    def _fold_backlog(self):
+        if self._fold_lock.acquire(blocking=False):
+            try:
+                self._fold()
+            finally:
+                self._fold_lock.release()
+
+    def _fold(self):
+        # Only observations present now; appends racing with the fold wait for the next one
+        popleft = self._pending.popleft
+        self._apply([popleft() for _ in range(len(self._pending))])
+
+    def _apply(self, batch: List[Tuple[Tuple[str, ...], object]]):
+        raise NotImplementedError
+
+    def collect(self) -> Dict[Tuple[str, ...], object]:
+        """Fold pending observations and return a snapshot of every series."""
+        with self._fold_lock:
+            self._fold()
+            return {labels: self._snapshot(state) for labels, state in self._series.items()}
+
+    def _snapshot(self, state):
+        return state
+
+    def _empty(self):
+        return 0.0
+
+    def _label_text(self, labels: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+        if self.function is not None:
+            lines.append(f'{self.name} {_format_value(self.function())}')
+        else:
+            series = self.collect()
+            if not self.labelnames and not series:
+                series[()] = self._snapshot(self._empty())  # Unlabelled metrics report zero before any observation
+            for labels, value in sorted(series.items()):
+                lines.extend(self._render_series(labels, value))
+        return '\n'.join(lines)
+
+    def _render_series(self, labels, value):
+        return [f'{self.name}{self._label_text(labels)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    """Monotonic total. ``inc(*label_values, amount=1)``."""
+    TYPE = 'counter'
+
+    def inc(self, *labels, amount: float = 1.0):
+        # _record inlined: counters sit on every request's path
+        pending = self._pending
+        pending.append((labels, amount))
+        if len(pending) > FOLD_AT:
+            self._fold_backlog()
+
+    def _apply(self, batch):
+        series = self._series
+        get = series.get
+        for labels, value in batch:
+            series[labels] = get(labels, 0.0) + value
+
+
+class Gauge(_Metric):
+    """Value that goes up and down: ``inc``/``dec`` deltas or ``set``."""
+    TYPE = 'gauge'
+    _SET = object()
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._record(labels, amount)
+
+    def dec(self, *labels, amount: float = 1.0):
+        self._record(labels, -amount)
+
+    def set(self, value: float, *labels):
+        self._record(labels, (self._SET, value))
+
+    def _apply(self, batch):
+        series = self._series
+        for labels, value in batch:
+            if type(value) is tuple:
+                series[labels] = value[1]
+            else:
+                series[labels] = series.get(labels, 0.0) + value
+
+
+class Histogram(_Metric):
+    """Fixed-bucket distribution: ``observe(value, *label_values)``."""
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        pending = self._pending
+        pending.append((labels, value))
+        if len(pending) > FOLD_AT:
+            self._fold_backlog()
+
+    def _empty(self):
+        # Per-bucket (non-cumulative) counts with a final +Inf bucket, then sum and count
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def _apply(self, batch):
+        series = self._series
+        buckets = self.buckets
+        bisect_left = bisect.bisect_left
+        for labels, value in batch:
+            state = series.get(labels)
+            if state is None:
+                state = series[labels] = self._empty()
+            state[0][bisect_left(buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _snapshot(self, state):
+        return list(state[0]), state[1], state[2]
+
+    def _render_series(self, labels, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f'{self.name}_bucket{self._label_text(labels, le)} {cumulative}')
+        lines.append(f'{self.name}_sum{self._label_text(labels)} {_format_value(total)}')
+        lines.append(f'{self.name}_count{self._label_text(labels)} {count}')
+        return lines
+
+
+class Registry:
+    """A server's metrics, rendered together for ``GET /metrics``."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name!r} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                function: Optional[Callable[[], float]] = None) -> Counter:
+        return self._add(Counter(name, documentation, labelnames, function))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+class HttpMetrics:
+    """
+    The per-route request metrics every server exposes.
+
+    Routes are label values, so pass the route pattern (``/api/load_flow``),
+    never the raw path, to keep the number of series bounded.
+    """
+
+    def __init__(self, registry: Registry):
+        self.requests = registry.counter(
+            'http_requests_total', 'Requests served, by route, method and status.',
+            ('route', 'method', 'status'))
+        self.latency = registry.histogram(
+            'http_request_duration_seconds', 'Time to produce a response, by route.', ('route', 'method'))
+        self.request_size = registry.histogram(
+            'http_request_size_bytes', 'Request body sizes, by route.', ('route',), SIZE_BUCKETS)
+        self.response_size = registry.histogram(
+            'http_response_size_bytes', 'Response body sizes, by route.', ('route',), SIZE_BUCKETS)
+        self.in_flight = registry.gauge('http_requests_in_flight', 'Requests being handled.')
+
+    def record(self, route: str, method: str, status: int, seconds: float,
+               request_bytes: Optional[int], response_bytes: Optional[int]):
+        self.requests.inc(route, method, str(status))
+        self.latency.observe(seconds, route, method)
+        if request_bytes is not None:
+            self.request_size.observe(request_bytes, route)
+        if response_bytes is not None:
+            self.response_size.observe(response_bytes, route)
+
+
+def instrument_flask(app, registry: Optional[Registry] = None) -> Registry:
+    """
+    Record ``HttpMetrics`` for every request to a Flask ``app`` and serve
+    them, with anything else in ``registry``, at ``GET /metrics``.
+
+    Timing wraps the WSGI app rather than using request hooks, which cost
+    several times more per request; one ``before_request`` hook only notes
+    the matched route.
+    """
+    from flask import Response, request
+
+    registry = registry if registry is not None else Registry()
+    http = HttpMetrics(registry)
+    wsgi_app = app.wsgi_app
+
+    def timed_wsgi_app(environ, start_response):
+        start = time.perf_counter()
+        response = [500, None]  # Status and Content-Length; 500 if the app raises before responding
+
+        def record_start_response(status, headers, exc_info=None):
+            response[0] = int(status[:3])
+            for name, value in headers:
+                if name == 'Content-Length':
+                    response[1] = int(value)
+            return start_response(status, headers, exc_info)
+
+        http.in_flight.inc()
+        try:
+            return wsgi_app(environ, record_start_response)
+        finally:
+            http.in_flight.dec()
+            request_bytes = environ.get('CONTENT_LENGTH', '')
+            http.record(environ.get(ROUTE_KEY, '<unmatched>'), environ['REQUEST_METHOD'], response[0],
+                        time.perf_counter() - start, int(request_bytes) if request_bytes.isdigit() else None,
+                        response[1])
+
+    @app.before_request
+    def note_route():
+        if request.url_rule is not None:
+            request.environ[ROUTE_KEY] = request.url_rule.rule
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    app.wsgi_app = timed_wsgi_app
+    return registry
@@ -0,0 +1,213 @@
+"""
+Upstream response cache for the Gemini proxy.
+
+Many installations send the same prompt (templates, novice-mode
+defaults). Successful upstream responses are kept in a bounded in-memory
+LRU for ``ttl`` seconds, keyed by the normalized upstream payload, and
+concurrent identical requests share a single upstream call: the first
+caller fetches, later ones wait for its result (or its error). Usable
+from Flask's worker threads (``fetch``) and from an asyncio event loop
+(``fetch_async``).
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional, Tuple
+
+HIT = 'HIT'
+MISS = 'MISS'
+COALESCED = 'COALESCED'  # Waited on an identical request's upstream call
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt as cache-keyed: line endings unified, outer whitespace stripped (never forwarded)."""
+    return prompt.replace('\r\n', '\n').strip()
+
+
+def cache_key(endpoint: str, payload: dict) -> str:
+    """Hex SHA-256 of the endpoint and the canonical JSON of ``payload``."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(f'{endpoint}\n{canonical}'.encode('utf-8')).hexdigest()
+
+
+class _Pending:
+    __slots__ = ('done', 'body', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.body = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    Thread-safe TTL + LRU cache of upstream response bodies with request coalescing.
+
+    Args:
+        max_entries: Most responses kept; least recently used go first
+        max_bytes: Most response bytes kept
+        ttl: Seconds a response stays fresh; 0 disables caching but
+            still coalesces concurrent identical requests
+        store: Optional second level shared with other processes (such as
+            ``shared_state.SharedResponseStore``), with ``get(key)`` and
+            ``put(key, body)``; checked before calling upstream
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300.0,
+                 store=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.store = store
+        self._entries = OrderedDict()  # key -> (expires, body), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._pending = {}  # key -> _Pending, calls in flight from threads
+        self._tasks = {}  # key -> asyncio.Task, calls in flight on the event loop
+        self.hits = 0
+        self.misses = 0  # Not in this process's memory; upstream calls are misses - shared_hits
+        self.shared_hits = 0  # Misses answered by the shared store
+        self.coalesced = 0
+        self.evicted = 0
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[bytes]:
+        """Return the fresh body cached under ``key``, or None. Does not count."""
+        with self._lock:
+            return self._lookup(key, time.monotonic() if now is None else now)
+
+    def _lookup(self, key: str, now: float) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            self._bytes -= len(entry[1])
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, body: bytes, now: Optional[float] = None):
+        if self.ttl <= 0 or len(body) > self.max_bytes:
+            return
+        expires = (time.monotonic() if now is None else now) + self.ttl
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._entries[key] = (expires, body)
+            self._bytes += len(body)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self._bytes -= len(dropped)
+                self.evicted += 1
+
+    def needs_fetch(self, key: str) -> bool:
+        """True when a request for ``key`` would start a new upstream call."""
+        with self._lock:
+            return (key not in self._pending and key not in self._tasks
+                    and self._lookup(key, time.monotonic()) is None)
+
+    def fetch(self, key: str, call: Callable[[], bytes]) -> Tuple[bytes, str]:
+        """
+        Return ``(body, source)`` for ``key``, calling ``call()`` at most once
+        across concurrent callers. ``source`` is HIT, MISS or COALESCED.
+        Errors from ``call`` are raised in every waiting caller and not cached.
+        """
+        with self._lock:
+            body = self._lookup(key, time.monotonic())
+            if body is not None:
+                self.hits += 1
+                return body, HIT
+            pending = self._pending.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._pending[key] = _Pending()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.body, COALESCED
+
+        try:
+            pending.body, source = self._fetch_through_store(key, call)
+            self.put(key, pending.body)
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.done.set()
+        return pending.body, source
+
+    def _fetch_through_store(self, key: str, call: Callable[[], bytes]) -> Tuple[bytes, str]:
+        if self.store is not None:
+            body = self.store.get(key)
+            if body is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                return body, HIT
+        body = call()
+        if self.store is not None:
+            self.store.put(key, body)
+        return body, MISS
+
+    async def _fetch_through_store_async(self, key: str, call: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, str]:
+        # The store may wait on other processes' locks, so it is used from a thread
+        if self.store is not None:
+            body = await asyncio.to_thread(self.store.get, key)
+            if body is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                return body, HIT
+        body = await call()
+        if self.store is not None:
+            await asyncio.to_thread(self.store.put, key, body)
+        return body, MISS
+
+    async def fetch_async(self, key: str, call: Callable[[], Awaitable[bytes]]) -> Tuple[bytes, str]:
+        """
+        ``fetch`` for a single event loop. The upstream call runs as its own
+        task, so waiters still get its result if the caller that started it
+        goes away.
+        """
+        with self._lock:
+            body = self._lookup(key, time.monotonic())
+            if body is not None:
+                self.hits += 1
+                return body, HIT
+            task = self._tasks.get(key)
+            if task is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                task = self._tasks[key] = asyncio.ensure_future(self._fetch_through_store_async(key, call))
+                task.add_done_callback(lambda done: self._finish_task(key, done))
+                self.misses += 1
+                leader = True
+        body, source = await asyncio.shield(task)
+        return body, source if leader else COALESCED
+
+    def _finish_task(self, key: str, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is None:  # exception() also marks it retrieved
+            self.put(key, task.result()[0])
+        with self._lock:
+            del self._tasks[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'shared_hits': self.shared_hits,
+                    'coalesced': self.coalesced,
+                    'evicted': self.evicted, 'entries': len(self._entries), 'bytes': self._bytes,
+                    'in_flight': len(self._pending) + len(self._tasks)}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
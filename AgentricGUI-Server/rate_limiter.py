@@ -0,0 +1,141 @@
+"""
+Per-installation rate limiting for the Gemini proxy.
+
+Each installation gets a token bucket: ``limit`` requests per ``window``
+seconds, refilled continuously, so a check is a few float operations no
+matter how high the limit is. Buckets live in an insertion-ordered dict
+kept in last-seen order; installations idle for a full window (whose
+bucket would be full again anyway) are evicted from the front as new
+requests arrive, so memory follows the number of recently active
+installations rather than every installation ever seen.
+"""
+import json
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Dict, Optional
+
+Tier = namedtuple('Tier', ['limit', 'window'])  # requests per window (seconds)
+Decision = namedtuple('Decision', ['allowed', 'remaining', 'retry_after'])
+
+DEFAULT_TIER = 'default'
+EVICT_EVERY = 32  # Requests between eviction passes
+EVICT_BATCH = 1024  # Most idle buckets dropped per pass, bounding the work of any one request
+
+
+class _Bucket:
+    __slots__ = ('tokens', 'updated', 'idle_after')
+
+    def __init__(self, tokens: float, updated: float, idle_after: float):
+        self.tokens = tokens
+        self.updated = updated
+        self.idle_after = idle_after
+
+
+class RateLimiter:
+    """
+    Thread-safe token-bucket limiter keyed by installation id.
+
+    Args:
+        tiers: Tier name -> Tier(limit, window); must include ``default_tier``
+        default_tier: Tier used for installations without an explicit one
+        max_keys: Hard cap on tracked installations; the least recently seen
+            are dropped first (they start again with a full bucket)
+    """
+
+    def __init__(self, tiers: Dict[str, Tier], default_tier: str = DEFAULT_TIER,
+                 max_keys: Optional[int] = None):
+        if default_tier not in tiers:
+            raise ValueError(f"Unknown default tier {default_tier!r}")
+        for name, tier in tiers.items():
+            if tier.limit <= 0 or tier.window <= 0:
+                raise ValueError(f"Tier {name!r} needs a positive limit and window")
+        self.tiers = dict(tiers)
+        self.default_tier = default_tier
+        self.max_keys = max_keys
+        # tier -> (limit, window, refill rate per second)
+        self._params = {name: (float(tier.limit), float(tier.window), tier.limit / tier.window)
+                        for name, tier in tiers.items()}
+        self._buckets = OrderedDict()  # key -> _Bucket, least recently seen first
+        self._lock = threading.Lock()
+        self._until_evict = EVICT_EVERY
+        self.evicted = 0
+
+    def allow(self, key: str, tier: Optional[str] = None, now: Optional[float] = None) -> Decision:
+        """
+        Take one request from ``key``'s bucket.
+
+        Returns:
+            Decision: ``allowed``, whole requests ``remaining`` in the bucket
+            and, when refused, seconds until the next request would be allowed
+        """
+        params = self._params.get(tier or self.default_tier) or self._params[self.default_tier]
+        limit, window, rate = params
+        if now is None:
+            now = time.monotonic()
+
+        with self._lock:
+            buckets = self._buckets
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = _Bucket(limit, now, now + window)
+                tokens = limit
+            else:
+                buckets.move_to_end(key)
+                tokens = bucket.tokens + (now - bucket.updated) * rate
+                if tokens > limit:
+                    tokens = limit
+                bucket.updated = now
+                bucket.idle_after = now + window
+
+            if tokens >= 1.0:
+                bucket.tokens = tokens - 1.0
+                decision = Decision(True, int(tokens - 1.0), 0.0)
+            else:
+                bucket.tokens = tokens
+                decision = Decision(False, 0, (1.0 - tokens) / rate)
+
+            self._until_evict -= 1
+            if self._until_evict <= 0 or (self.max_keys is not None and len(buckets) > self.max_keys):
+                self._until_evict = EVICT_EVERY
+                self._evict(now)
+        return decision
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        evicted = 0
+        while buckets and evicted < EVICT_BATCH:
+            key, bucket = next(iter(buckets.items()))
+            if bucket.idle_after > now:
+                break
+            del buckets[key]
+            evicted += 1
+        if self.max_keys is not None:
+            while len(buckets) > self.max_keys:
+                buckets.popitem(last=False)
+                evicted += 1
+        self.evicted += evicted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+
+def load_tiers(spec: Optional[str], default_limit: int, default_window: float) -> Dict[str, Tier]:
+    """
+    Parse tiers from JSON such as ``{"free": [10, 60], "pro": [120, 60]}``.
+
+    The ``default`` tier is ``default_limit`` per ``default_window`` seconds
+    unless the spec overrides it.
+    """
+    tiers = {DEFAULT_TIER: Tier(default_limit, default_window)}
+    if spec:
+        for name, (limit, window) in json.loads(spec).items():
+            tiers[name] = Tier(int(limit), float(window))
+    return tiers
+
+
+def retry_after_header(decision: Decision) -> str:
+    """Whole seconds for a Retry-After header (at least 1)."""
+    return str(max(1, math.ceil(decision.retry_after)))
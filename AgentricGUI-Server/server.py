@@ -1,9 +1,16 @@
 from flask import Flask, request, jsonify
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import os
-import datetime  # Import datetime
 import logging  # Import logging
+import time
+from contextlib import contextmanager
+
+from metrics import SIZE_BUCKETS, Registry, instrument_flask
+from proxy_cache import ResponseCache, cache_key, normalize_prompt
+from rate_limiter import RateLimiter, load_tiers, retry_after_header
+from shared_state import SharedResponseStore, SQLiteRateLimiter, shared_state_path
 
 app = Flask(__name__)
 
@@ -12,24 +19,115 @@ logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Load your Gemini API key from an environment variable
-<<<<<<< HEAD
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")  # Set this in environment
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY environment variable not set.")
-=======
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY") # Set this in environment
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY environment variable not set.")
-
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key=" + GEMINI_API_KEY
->>>>>>> 952de308da38fa4fb748d26eb0de3d3149609dc9
 
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key=" + GEMINI_API_KEY
+# Overridable so the proxy can be pointed at a stub upstream for load testing
+GEMINI_API_ENDPOINT = os.environ.get(
+    "GEMINI_API_ENDPOINT",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent")
+GEMINI_API_URL = GEMINI_API_ENDPOINT + "?key=" + GEMINI_API_KEY
+
+# --- Upstream HTTP Session (keep-alive connection pool shared by all worker threads) ---
+UPSTREAM_POOL_SIZE = int(os.environ.get("UPSTREAM_POOL_SIZE", "32"))
+UPSTREAM_TIMEOUT = (float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", "5")),
+                    float(os.environ.get("UPSTREAM_READ_TIMEOUT", "120")))  # (connect, read) seconds
+upstream_session = requests.Session()
+upstream_session.mount('https://', HTTPAdapter(pool_connections=UPSTREAM_POOL_SIZE,
+                                               pool_maxsize=UPSTREAM_POOL_SIZE))
+
+# --- Rate Limiting (token bucket per installation_id, idle installations evicted) ---
+RATE_LIMIT = int(os.environ.get("RATE_LIMIT", "10"))  # Requests per window for the default tier
+TIME_WINDOW = float(os.environ.get("RATE_LIMIT_WINDOW", "60"))  # Seconds
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", "1000000"))
+# SQLite file holding rate limits (and the response cache) for all worker processes; see workers.py
+SHARED_STATE_PATH = os.environ.get("SHARED_STATE_PATH")
+rate_limit_tiers = load_tiers(os.environ.get("RATE_LIMIT_TIERS"), RATE_LIMIT, TIME_WINDOW)
+if SHARED_STATE_PATH:
+    rate_limiter = SQLiteRateLimiter(shared_state_path(SHARED_STATE_PATH), rate_limit_tiers)
+else:
+    rate_limiter = RateLimiter(rate_limit_tiers, max_keys=RATE_LIMIT_MAX_KEYS)
+
+# Optional JSON file mapping installation_id -> tier name (e.g. {"abc-123": "pro"})
+installation_tiers = {}
+if os.environ.get("INSTALLATION_TIERS_FILE"):
+    with open(os.environ["INSTALLATION_TIERS_FILE"], 'r') as f:
+        installation_tiers = json.load(f)
+
+# --- Response Cache (identical prompts answered once per TTL; concurrent ones share a call) ---
+PROXY_CACHE_TTL = float(os.environ.get("PROXY_CACHE_TTL", "300"))  # Seconds; 0 only coalesces
+PROXY_CACHE_MAX_ENTRIES = int(os.environ.get("PROXY_CACHE_MAX_ENTRIES", "10000"))
+PROXY_CACHE_MAX_BYTES = int(os.environ.get("PROXY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# With SHARED_STATE_PATH, also share cached responses between workers
+SHARED_RESPONSE_CACHE = os.environ.get("SHARED_RESPONSE_CACHE", "1") == "1"
+
+
+def make_response_cache() -> ResponseCache:
+    store = None
+    if SHARED_STATE_PATH and SHARED_RESPONSE_CACHE:
+        store = SharedResponseStore(shared_state_path(SHARED_STATE_PATH), PROXY_CACHE_TTL)
+    return ResponseCache(PROXY_CACHE_MAX_ENTRIES, PROXY_CACHE_MAX_BYTES, PROXY_CACHE_TTL, store)
+
+
+response_cache = make_response_cache()
+
+
+# --- Metrics (GET /metrics, Prometheus text format) ---
+class ProxyMetrics:
+    """Upstream, rate-limit and cache metrics of one proxy app."""
+
+    def __init__(self, registry, cache):
+        self.upstream_latency = registry.histogram(
+            'gemini_upstream_duration_seconds', 'Upstream generateContent call time, by outcome.', ('outcome',))
+        self.upstream_response_size = registry.histogram(
+            'gemini_upstream_response_bytes', 'Upstream response body sizes.', buckets=SIZE_BUCKETS)
+        self.upstream_in_flight = registry.gauge('gemini_upstream_in_flight', 'Upstream calls in progress.')
+        self.rate_limited = registry.counter(
+            'gemini_rate_limited_total', 'Requests refused with 429, by tier.', ('tier',))
+        registry.gauge('gemini_rate_limiter_installations', 'Installations tracked by the rate limiter.',
+                       function=lambda: len(rate_limiter))
+        registry.counter('gemini_cache_hits_total', 'Requests answered from the response cache.',
+                         function=lambda: cache.hits)
+        registry.counter('gemini_cache_misses_total', "Requests not in this worker's memory cache.",
+                         function=lambda: cache.misses)
+        registry.counter('gemini_cache_shared_hits_total', 'Misses answered by the store shared between workers.',
+                         function=lambda: cache.shared_hits)
+        registry.counter('gemini_cache_coalesced_total', 'Requests that joined an identical in-flight call.',
+                         function=lambda: cache.coalesced)
+        registry.gauge('gemini_cache_entries', 'Responses held in the cache.', function=lambda: len(cache))
+
+    @contextmanager
+    def upstream_call(self):
+        """Time the enclosed upstream call, labelled ``success`` unless it raises."""
+        self.upstream_in_flight.inc()
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'success'
+        finally:
+            self.upstream_in_flight.dec()
+            self.upstream_latency.observe(time.perf_counter() - start, outcome)
+
+
+registry = Registry()
+proxy_metrics = ProxyMetrics(registry, response_cache)
+instrument_flask(app, registry)
+
+
+def upstream_payload(prompt):
+    return {
+        "contents": [{
+            "parts": [{"text": prompt}]
+        }]
+    }
+
+
+def success_body(upstream_body):
+    """The proxy's success response around an upstream JSON body, without re-encoding it."""
+    return b'{"data":' + upstream_body + b',"status":"success"}'
 
-# --- Rate Limiting (Data Structures - Placeholder) ---
-request_counts = {}  # Dictionary to track requests per installation_id
-RATE_LIMIT = 10  # Example: 10 requests per minute
-TIME_WINDOW = 60  # Seconds
 
 @app.route('/gemini', methods=['POST'])
 def gemini_proxy():
@@ -40,51 +138,60 @@ def gemini_proxy():
 
         if not prompt:
             return jsonify({'error': 'Missing prompt', 'status': 'error'}), 400
+        if not isinstance(prompt, str):
+            return jsonify({'error': 'Prompt must be a string', 'status': 'error'}), 400
         if not installation_id:
             return jsonify({'error': 'Missing installation_id', 'status': 'error'}), 400
 
-        # --- Basic Rate Limiting (Conceptual - Not Fully Implemented) ---
-        now = datetime.datetime.now()
-        if installation_id not in request_counts:
-            request_counts[installation_id] = []
-        # Remove old timestamps
-        request_counts[installation_id] = [ts for ts in request_counts[installation_id] if (now - ts).total_seconds() < TIME_WINDOW]
-        if len(request_counts[installation_id]) >= RATE_LIMIT:
+        # --- Rate Limiting ---
+        decision = rate_limiter.allow(installation_id, installation_tiers.get(installation_id))
+        if not decision.allowed:
             logging.warning(f"Rate limit exceeded for installation_id: {installation_id}")  # Log the event
-            return jsonify({'error': 'Rate limit exceeded', 'status': 'error'}), 429  # 429 Too Many Requests
-        request_counts[installation_id].append(now)
+            proxy_metrics.rate_limited.inc(installation_tiers.get(installation_id, rate_limiter.default_tier))
+            response = jsonify({'error': 'Rate limit exceeded', 'status': 'error'})
+            response.headers['Retry-After'] = retry_after_header(decision)
+            return response, 429  # 429 Too Many Requests
 
         # --- Construct the request to the Gemini API ---
         headers = {'Content-Type': 'application/json'}
-        payload = {
-            "contents": [{
-                "parts": [{"text": prompt}]
-            }]
-        }
-
-        # --- Forward the request to the Gemini API ---
-        response = requests.post(GEMINI_API_URL, headers=headers, data=json.dumps(payload))
-        response.raise_for_status()  # This will raise an exception for HTTP errors
-
-        response_json = response.json()
+        # Forward the prompt as sent, but let whitespace-only variants share a cache entry
+        payload = upstream_payload(prompt)
+        key = cache_key(GEMINI_API_ENDPOINT, upstream_payload(normalize_prompt(prompt)))
+
+        def forward():
+            with proxy_metrics.upstream_call():
+                response = upstream_session.post(GEMINI_API_URL, headers=headers, data=json.dumps(payload),
+                                                 timeout=UPSTREAM_TIMEOUT)
+                response.raise_for_status()  # This will raise an exception for HTTP errors
+                response.json()  # Only valid JSON is cached and passed on
+            proxy_metrics.upstream_response_size.observe(len(response.content))
+            return response.content
+
+        # --- Forward the request to the Gemini API (or answer from the cache) ---
+        body, source = response_cache.fetch(key, forward)
 
         # --- Logging ---
-        logging.info(f"Request from {installation_id}: prompt='{prompt[:50]}...' - Success")  # Log a truncated prompt
-<<<<<<< HEAD
-=======
+        logging.info(f"Request from {installation_id}: prompt='{prompt[:50]}...' - Success ({source})")  # Log a truncated prompt
 
-        return jsonify({'data': response_json, 'status': 'success'}) #Return with status
->>>>>>> 952de308da38fa4fb748d26eb0de3d3149609dc9
-
-        return jsonify({'data': response_json, 'status': 'success'})  # Return with status
+        return app.response_class(success_body(body), mimetype='application/json',
+                                  headers={'X-Cache': source})
 
+    except requests.exceptions.HTTPError as e:
+        status = e.response.status_code
+        logging.error(f"Upstream error: {status} {e.response.reason} - from installation_id: {installation_id}")
+        return jsonify({'error': f'Upstream request failed with status {status}', 'status': 'error'}), 500
     except requests.exceptions.RequestException as e:
-        logging.error(f"Request Error: {e} - from installation_id: {installation_id}")  # Log the error
-        return jsonify({'error': f'Request Error: {e}', 'status': 'error'}), 500
+        # The exception text can carry the upstream URL, and with it the API key
+        logging.error(f"Upstream request failed: {type(e).__name__} - from installation_id: {installation_id}")
+        return jsonify({'error': 'Upstream request failed', 'status': 'error'}), 500
     except Exception as e:
         logging.exception(f"Unexpected Error: {e} - from installation_id: {installation_id}")  # Log the exception with traceback
         return jsonify({'error': str(e), 'status': 'error'}), 500
 
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify({'cache': response_cache.stats(), 'status': 'success'})
+
 @app.route('/test', methods=['GET'])
 def test_deploy():
     return jsonify({'message': 'Deployment successful', 'status': 'success'})
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Proxy state shared by worker processes through a WAL-mode SQLite file.
+
+With several workers each process would otherwise enforce its own rate
+limits and keep its own cache. ``SQLiteRateLimiter`` keeps the token
+buckets in one file, updating a bucket in a single ``BEGIN IMMEDIATE``
+transaction so concurrent workers serialize on it and a limit holds
+across all of them. ``SharedResponseStore`` is an optional second-level
+cache behind each worker's in-memory ``ResponseCache``. Both are selected
+by ``SHARED_STATE_PATH`` (see ``server.py``) and used by ``workers.py``.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from rate_limiter import DEFAULT_TIER, EVICT_BATCH, EVICT_EVERY, Decision, Tier
+
+BUSY_TIMEOUT_MS = 10000  # How long a worker waits for another's write before failing
+POOL_SIZE = 16  # Most connections to the state file one process keeps open per pool
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Autocommit connection tuned for small, frequent writes from many processes."""
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None,
+                           check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # Rate-limit and cache state are disposable; skip fsync on every commit
+    conn.execute('PRAGMA synchronous=OFF')
+    return conn
+
+
+class _ConnectionPool:
+    """
+    Reusable connections handed to one thread at a time. Flask serves every
+    request on a new thread, so per-thread connections would be opened
+    once per request. At most ``max_size`` are opened; further threads wait
+    up to ``BUSY_TIMEOUT_MS`` for one to be returned.
+    """
+
+    def __init__(self, path: str, schema: str, max_size: int = POOL_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._idle = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._open = 1
+        self._closed = False
+        conn = connect(path)
+        conn.executescript(schema)
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed connection pool.")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                grow = self._open < self.max_size
+                if grow:
+                    self._open += 1
+        if grow:
+            try:
+                return connect(self.path)
+            except BaseException:
+                with self._lock:
+                    self._open -= 1
+                raise
+        try:
+            return self._idle.get(timeout=BUSY_TIMEOUT_MS / 1000)
+        except queue.Empty:
+            raise sqlite3.OperationalError(f"No pooled connection free after {BUSY_TIMEOUT_MS} ms") from None
+
+    def _release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if not self._closed:
+                self._idle.put(conn)
+                return
+            self._open -= 1
+        conn.close()
+
+    def close(self):
+        """Close idle connections now and busy ones as they are returned."""
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._open -= 1
+                conn.close()
+
+
+class SQLiteRateLimiter:
+    """
+    ``RateLimiter`` with its token buckets in a SQLite file shared by processes.
+
+    Same arguments, refill arithmetic and ``Decision`` results, except that
+    times are wall-clock seconds (comparable between processes). Idle
+    buckets are deleted in batches as requests arrive; there is no
+    ``max_keys`` cap.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS rate_buckets (
+            key TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated REAL NOT NULL,
+            idle_after REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS rate_buckets_idle ON rate_buckets (idle_after);
+    '''
+
+    def __init__(self, path: str, tiers: Dict[str, Tier], default_tier: str = DEFAULT_TIER):
+        if default_tier not in tiers:
+            raise ValueError(f"Unknown default tier {default_tier!r}")
+        for name, tier in tiers.items():
+            if tier.limit <= 0 or tier.window <= 0:
+                raise ValueError(f"Tier {name!r} needs a positive limit and window")
+        self.path = path
+        self.tiers = dict(tiers)
+        self.default_tier = default_tier
+        self._params = {name: (float(tier.limit), float(tier.window), tier.limit / tier.window)
+                        for name, tier in tiers.items()}
+        self._pool = _ConnectionPool(path, self.SCHEMA)
+        self._until_evict = EVICT_EVERY
+        self.evicted = 0  # By this process
+
+    def allow(self, key: str, tier: Optional[str] = None, now: Optional[float] = None) -> Decision:
+        """Take one request from ``key``'s bucket; see ``RateLimiter.allow``."""
+        limit, window, rate = self._params.get(tier or self.default_tier) or self._params[self.default_tier]
+        if now is None:
+            now = time.time()
+
+        with self._pool.connection() as conn:
+            return self._take(conn, key, limit, window, rate, now)
+
+    def _take(self, conn: sqlite3.Connection, key: str, limit: float, window: float, rate: float,
+              now: float) -> Decision:
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                tokens = limit
+            else:
+                # max() guards against the wall clock stepping backwards
+                tokens = min(limit, row[0] + max(0.0, now - row[1]) * rate)
+
+            if tokens >= 1.0:
+                decision = Decision(True, int(tokens - 1.0), 0.0)
+                tokens -= 1.0
+            else:
+                decision = Decision(False, 0, (1.0 - tokens) / rate)
+            conn.execute('INSERT OR REPLACE INTO rate_buckets (key, tokens, updated, idle_after) '
+                         'VALUES (?, ?, ?, ?)', (key, tokens, now, now + window))
+
+            self._until_evict -= 1
+            if self._until_evict <= 0:
+                self._until_evict = EVICT_EVERY
+                self.evicted += conn.execute(
+                    'DELETE FROM rate_buckets WHERE key IN '
+                    '(SELECT key FROM rate_buckets WHERE idle_after <= ? LIMIT ?)', (now, EVICT_BATCH)).rowcount
+            conn.execute('COMMIT')
+        except BaseException:
+            # Only undo a transaction that is still open, and never hide the original error
+            if conn.in_transaction:
+                try:
+                    conn.execute('ROLLBACK')
+                except sqlite3.Error:
+                    pass
+            raise
+        return decision
+
+    def __len__(self) -> int:
+        with self._pool.connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM rate_buckets').fetchone()[0]
+
+    def close(self):
+        self._pool.close()
+
+
+class SharedResponseStore:
+    """
+    Upstream response bodies shared by workers, expiring after ``ttl`` seconds.
+
+    Plugged into ``ResponseCache(store=...)``: a worker's in-memory miss
+    checks here before calling upstream, and fetched bodies are written
+    back. Expired rows are purged in batches as bodies are stored.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            body BLOB NOT NULL,
+            expires REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires);
+    '''
+
+    def __init__(self, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._pool = _ConnectionPool(path, self.SCHEMA)
+        self._until_purge = EVICT_EVERY
+
+    def get(self, key: str, now: Optional[float] = None) -> Optional[bytes]:
+        with self._pool.connection() as conn:
+            row = conn.execute('SELECT body FROM responses WHERE key = ? AND expires > ?',
+                               (key, time.time() if now is None else now)).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, key: str, body: bytes, now: Optional[float] = None):
+        if self.ttl <= 0:
+            return
+        now = time.time() if now is None else now
+        with self._pool.connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO responses (key, body, expires) VALUES (?, ?, ?)',
+                         (key, body, now + self.ttl))
+            self._until_purge -= 1
+            if self._until_purge <= 0:
+                self._until_purge = EVICT_EVERY
+                conn.execute('DELETE FROM responses WHERE key IN '
+                             '(SELECT key FROM responses WHERE expires <= ? LIMIT ?)', (now, EVICT_BATCH))
+
+    def close(self):
+        self._pool.close()
+
+
+def shared_state_path(path: str) -> str:
+    """Absolute path for ``path``, creating its directory."""
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def init_shared_state(path: str) -> str:
+    """
+    Create the state file and its tables before workers start, so they do
+    not race to switch it to WAL mode. Returns the absolute path.
+    """
+    path = shared_state_path(path)
+    conn = connect(path)
+    try:
+        conn.executescript(SQLiteRateLimiter.SCHEMA + SharedResponseStore.SCHEMA)
+    finally:
+        conn.close()
+    return path
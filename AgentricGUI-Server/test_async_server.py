@@ -0,0 +1,144 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip('aiohttp')
+os.environ.setdefault('GEMINI_API_KEY', 'test-key')
+
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestClient, TestServer  # noqa: E402
+
+from async_server import IN_FLIGHT, RESPONSE_CACHE, create_app  # noqa: E402
+
+
+def make_upstream(release: asyncio.Event = None, status: int = 200) -> web.Application:
+    async def generate(request):
+        body = await request.json()
+        if release is not None:
+            await release.wait()
+        if status != 200:
+            return web.json_response({'error': 'upstream'}, status=status)
+        text = body['contents'][0]['parts'][0]['text']
+        return web.json_response({'candidates': [{'content': {'parts': [{'text': text.upper()}]}}]})
+
+    upstream = web.Application()
+    upstream.router.add_post('/generate', generate)
+    return upstream
+
+
+async def proxy_client(upstream: web.Application, query: str = '', **kwargs):
+    upstream_server = TestServer(upstream)
+    await upstream_server.start_server()
+    upstream_url = str(upstream_server.make_url('/generate')) + query
+    client = TestClient(TestServer(create_app(upstream_url, **kwargs)))
+    await client.start_server()
+    return client, upstream_server
+
+
+def post(client, installation_id, prompt='hello'):
+    return client.post('/gemini', json={'prompt': prompt, 'installation_id': installation_id})
+
+
+def test_proxies_to_upstream():
+    async def scenario():
+        client, upstream = await proxy_client(make_upstream())
+        try:
+            response = await post(client, 'async-ok')
+            assert response.status == 200
+            body = await response.json()
+            assert body['status'] == 'success'
+            assert body['data']['candidates'][0]['content']['parts'][0]['text'] == 'HELLO'
+
+            response = await client.post('/gemini', json={'installation_id': 'async-ok'})
+            assert response.status == 400
+            response = await client.post('/gemini', data='not json')
+            assert response.status == 400
+            response = await post(client, 'async-ok', {'text': 'hello'})
+            assert response.status == 400
+
+            # Normalization only affects the cache key; upstream gets the prompt as sent
+            response = await post(client, 'async-ok', ' spaced\r\n')
+            assert (await response.json())['data']['candidates'][0]['content']['parts'][0]['text'] == ' SPACED\r\n'
+        finally:
+            await client.close()
+            await upstream.close()
+
+    asyncio.run(scenario())
+
+
+def test_saturated_requests_get_503_with_retry_after():
+    async def scenario():
+        release = asyncio.Event()
+        client, upstream = await proxy_client(make_upstream(release), max_in_flight=2)
+        in_flight = client.app[IN_FLIGHT]
+        try:
+            slow = [asyncio.ensure_future(post(client, f'async-slow-{i}', f'slow {i}')) for i in range(2)]
+            while in_flight.current < 2:
+                await asyncio.sleep(0.01)
+
+            refused = await post(client, 'async-refused', 'another prompt')
+            assert refused.status == 503
+            assert refused.headers['Retry-After'] == '1'
+
+            release.set()
+            assert [response.status for response in await asyncio.gather(*slow)] == [200, 200]
+            assert (in_flight.current, in_flight.peak, in_flight.rejected) == (0, 2, 1)
+            # Capacity is back once the slow calls finish
+            assert (await post(client, 'async-refused', 'another prompt')).status == 200
+        finally:
+            await client.close()
+            await upstream.close()
+
+    asyncio.run(scenario())
+
+
+def test_identical_prompts_share_one_upstream_call():
+    async def scenario():
+        release = asyncio.Event()
+        client, upstream = await proxy_client(make_upstream(release), max_in_flight=1)
+        cache = client.app[RESPONSE_CACHE]
+        try:
+            waiting = [asyncio.ensure_future(post(client, f'async-same-{i}', 'template prompt')) for i in range(5)]
+            while cache.stats()['coalesced'] < 4:
+                await asyncio.sleep(0.01)
+            release.set()
+            responses = await asyncio.gather(*waiting)
+            assert sorted(response.headers['X-Cache'] for response in responses) == ['COALESCED'] * 4 + ['MISS']
+            for response in responses:
+                assert (await response.json())['data']['candidates'][0]['content']['parts'][0]['text'] == 'TEMPLATE PROMPT'
+
+            # Whitespace-only differences hit the cache without an in-flight slot
+            hit = await post(client, 'async-same-hit', '  template prompt\n')
+            assert hit.headers['X-Cache'] == 'HIT'
+            stats = await (await client.get('/cache/stats')).json()
+            assert stats['cache'] == {'hits': 1, 'misses': 1, 'shared_hits': 0, 'coalesced': 4, 'evicted': 0,
+                                      'entries': 1, 'bytes': cache.stats()['bytes'], 'in_flight': 0}
+
+            text = await (await client.get('/metrics')).text()
+            assert 'gemini_cache_coalesced_total 4' in text
+            assert 'gemini_upstream_duration_seconds_count{outcome="success"} 1' in text
+            assert 'http_requests_total{route="/gemini",method="POST",status="200"} 6' in text
+        finally:
+            await client.close()
+            await upstream.close()
+
+    asyncio.run(scenario())
+
+
+def test_upstream_errors_are_reported():
+    async def scenario():
+        client, upstream = await proxy_client(make_upstream(status=502), query='?key=secret-key')
+        try:
+            response = await post(client, 'async-error')
+            assert response.status == 500
+            body = await response.json()
+            assert body['status'] == 'error'
+            assert '502' in body['error']
+            assert 'secret-key' not in body['error']
+            assert client.app[IN_FLIGHT].current == 0
+        finally:
+            await client.close()
+            await upstream.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,93 @@
+import threading
+
+from flask import Flask
+
+import metrics
+from metrics import Registry, instrument_flask
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests.', ('route', 'status'))
+    in_flight = registry.gauge('in_flight', 'In flight.')
+    latency = registry.histogram('latency_seconds', 'Latency.', ('route',), buckets=(0.1, 1.0))
+    registry.gauge('entries', 'Entries.', function=lambda: 7)
+
+    requests.inc('/a', '200')
+    requests.inc('/a', '200')
+    requests.inc('/b "quoted"', '429')
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value, '/a')
+
+    assert registry.render().splitlines() == [
+        '# HELP requests_total Requests.',
+        '# TYPE requests_total counter',
+        'requests_total{route="/a",status="200"} 2',
+        'requests_total{route="/b \\"quoted\\"",status="429"} 1',
+        '# HELP in_flight In flight.',
+        '# TYPE in_flight gauge',
+        'in_flight 1',
+        '# HELP latency_seconds Latency.',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 3.65',
+        'latency_seconds_count{route="/a"} 4',
+        '# HELP entries Entries.',
+        '# TYPE entries gauge',
+        'entries 7',
+    ]
+
+
+def test_concurrent_recording_loses_nothing(monkeypatch):
+    monkeypatch.setattr(metrics, 'FOLD_AT', 100)  # Fold often while other threads keep appending
+    registry = Registry()
+    counter = registry.counter('hits_total', 'Hits.', ('worker',))
+    histogram = registry.histogram('sizes', 'Sizes.', buckets=(10,))
+
+    def record(worker):
+        for i in range(5000):
+            counter.inc(str(worker % 2))
+            histogram.observe(i % 20)
+
+    threads = [threading.Thread(target=record, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.collect() == {('0',): 20000, ('1',): 20000}
+    counts, total, count = histogram.collect()[()]
+    assert (counts, count) == ([22000, 18000], 40000)
+    assert total == 8 * 250 * sum(range(20))
+
+
+def test_flask_requests_are_recorded_by_route():
+    app = Flask(__name__)
+
+    @app.route('/items/<int:item>', methods=['POST'])
+    def item(item):
+        return {'item': item}
+
+    @app.route('/broken')
+    def broken():
+        raise RuntimeError('boom')
+
+    instrument_flask(app)
+    client = app.test_client()
+    client.post('/items/1', data=b'x' * 100)
+    client.post('/items/2', data=b'x' * 100)
+    client.get('/broken')
+    client.get('/missing')
+    text = client.get('/metrics').get_data(as_text=True)
+
+    assert 'http_requests_total{route="/items/<int:item>",method="POST",status="200"} 2' in text
+    assert 'http_requests_total{route="/broken",method="GET",status="500"} 1' in text
+    assert 'http_requests_total{route="<unmatched>",method="GET",status="404"} 1' in text
+    assert 'http_request_size_bytes_bucket{route="/items/<int:item>",le="256"} 2' in text
+    assert 'http_request_duration_seconds_count{route="/items/<int:item>",method="POST"} 2' in text
+    assert 'http_requests_in_flight 1' in text  # The scrape itself
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+
+from proxy_cache import COALESCED, HIT, MISS, ResponseCache, cache_key, normalize_prompt
+
+
+def test_ttl_and_lru_bounds():
+    cache = ResponseCache(max_entries=2, max_bytes=10, ttl=60.0)
+    cache.put('a', b'aaa', now=0.0)
+    cache.put('b', b'bbb', now=0.0)
+    assert cache.get('a', now=1.0) == b'aaa'  # 'a' is now the most recently used
+    cache.put('c', b'ccc', now=1.0)
+    assert cache.get('b', now=1.0) is None
+    assert cache.get('a', now=60.5) is None  # Expired
+    assert cache.get('c', now=2.0) == b'ccc'
+
+    cache.put('big', b'x' * 9, now=2.0)  # Over max_bytes together with 'c'
+    assert (len(cache), cache.stats()['bytes']) == (1, 9)
+    cache.put('huge', b'x' * 11, now=2.0)  # Larger than the whole cache: not kept
+    assert cache.get('huge', now=2.0) is None
+    assert cache.evicted == 2
+
+
+def test_keys_ignore_formatting_but_not_content():
+    payload = {'contents': [{'parts': [{'text': normalize_prompt(' Hi\r\nthere ')}]}]}
+    same = {'contents': [{'parts': [{'text': 'Hi\nthere'}]}]}
+    assert cache_key('endpoint', payload) == cache_key('endpoint', same)
+    assert cache_key('endpoint', payload) != cache_key('other', payload)
+    assert cache_key('endpoint', payload) != cache_key('endpoint', {'contents': [{'parts': [{'text': 'hi'}]}]})
+
+
+def test_concurrent_identical_fetches_share_one_call():
+    cache = ResponseCache()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def call():
+        calls.append(1)
+        release.wait()
+        return b'{"text": "shared"}'
+
+    def fetch():
+        results.append(cache.fetch('key', call))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()['coalesced'] < 7:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == [COALESCED] * 7 + [MISS]
+    assert cache.fetch('key', call) == (b'{"text": "shared"}', HIT)
+    assert (cache.hits, cache.misses, cache.coalesced) == (1, 1, 7)
+
+
+def test_errors_reach_waiters_and_are_not_cached():
+    cache = ResponseCache()
+
+    def fail():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        cache.fetch('key', fail)
+    assert cache.fetch('key', lambda: b'{}') == (b'{}', MISS)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def fail_later():
+            await release.wait()
+            raise RuntimeError('upstream down')
+
+        waiters = [asyncio.ensure_future(cache.fetch_async('async-key', fail_later)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert cache.get('async-key') is None
+        assert cache.stats()['in_flight'] == 0
+
+    asyncio.run(scenario())
+    assert cache.coalesced == 2
@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from rate_limiter import RateLimiter, Tier, load_tiers, retry_after_header
+
+
+def make_limiter(**kwargs):
+    return RateLimiter({'default': Tier(3, 60.0), 'pro': Tier(6, 60.0)}, **kwargs)
+
+
+def test_allows_limit_then_refuses_with_retry_after():
+    limiter = make_limiter()
+    decisions = [limiter.allow('a', now=0.0) for _ in range(4)]
+
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+    assert decisions[3].retry_after == pytest.approx(20.0)
+    assert retry_after_header(decisions[3]) == '20'
+    # One token refills every 20 s
+    assert not limiter.allow('a', now=19.0).allowed
+    assert limiter.allow('a', now=40.0).allowed
+
+
+def test_tiers_have_separate_limits():
+    limiter = make_limiter()
+    assert sum(limiter.allow('free', now=0.0).allowed for _ in range(10)) == 3
+    assert sum(limiter.allow('paid', 'pro', now=0.0).allowed for _ in range(10)) == 6
+    # Unknown tiers fall back to the default
+    assert sum(limiter.allow('other', 'gold', now=0.0).allowed for _ in range(10)) == 3
+
+
+def test_idle_installations_are_evicted():
+    limiter = make_limiter()
+    for i in range(1000):
+        limiter.allow(f'install-{i}', now=0.0)
+    assert len(limiter) == 1000
+
+    # Each request past the idle window evicts a batch of idle buckets
+    now = 61.0
+    while len(limiter) > 1:
+        limiter.allow('active', now=now)
+        now += 0.001
+    assert limiter.evicted == 1000
+    # An evicted installation starts again with a full bucket
+    assert limiter.allow('install-0', now=now).remaining == 2
+
+
+def test_max_keys_drops_least_recently_seen():
+    limiter = make_limiter(max_keys=2)
+    for key in ('a', 'b', 'c'):
+        limiter.allow(key, now=0.0)
+    assert len(limiter) == 2
+    assert limiter.allow('a', now=0.0).remaining == 2  # 'a' was dropped and starts fresh
+
+
+def test_concurrent_requests_never_exceed_the_limit():
+    limiter = RateLimiter({'default': Tier(100, 3600.0)})
+    allowed = []
+
+    def hammer():
+        allowed.append(sum(limiter.allow('shared', now=0.0).allowed for _ in range(100)))
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sum(allowed) == 100
+
+
+def test_load_tiers():
+    tiers = load_tiers('{"pro": [120, 60]}', 10, 60)
+    assert tiers == {'default': Tier(10, 60.0), 'pro': Tier(120, 60.0)}
+    with pytest.raises(ValueError):
+        RateLimiter({'pro': Tier(0, 60.0)}, default_tier='pro')
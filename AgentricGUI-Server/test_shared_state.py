@@ -0,0 +1,179 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from proxy_cache import HIT, MISS, ResponseCache
+from rate_limiter import Tier
+from shared_state import SharedResponseStore, SQLiteRateLimiter, init_shared_state
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def take(path, key, count):
+    limiter = SQLiteRateLimiter(path, {'default': Tier(100, 3600.0)})
+    return sum(limiter.allow(key, now=0.0).allowed for _ in range(count))
+
+
+def send(url, installation_id, count):
+    statuses = []
+    for i in range(count):
+        body = json.dumps({'prompt': f'prompt {installation_id} {i}', 'installation_id': installation_id}).encode()
+        request = urllib.request.Request(url, body, {'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                statuses.append(response.status)
+        except urllib.error.HTTPError as e:
+            statuses.append(e.code)
+    return statuses
+
+
+def test_sqlite_limiter_matches_in_memory_limiter(tmp_path):
+    limiter = SQLiteRateLimiter(str(tmp_path / 'state.db'), {'default': Tier(3, 60.0), 'pro': Tier(6, 60.0)})
+    decisions = [limiter.allow('a', now=0.0) for _ in range(4)]
+
+    assert [d.allowed for d in decisions] == [True, True, True, False]
+    assert [d.remaining for d in decisions[:3]] == [2, 1, 0]
+    assert decisions[3].retry_after == pytest.approx(20.0)
+    assert not limiter.allow('a', now=19.0).allowed
+    assert limiter.allow('a', now=40.0).allowed
+    assert sum(limiter.allow('paid', 'pro', now=0.0).allowed for _ in range(10)) == 6
+    assert len(limiter) == 2
+
+
+def test_connection_pool_is_capped_and_closes(tmp_path):
+    limiter = SQLiteRateLimiter(str(tmp_path / 'state.db'), {'default': Tier(1000, 60.0)})
+    limiter._pool.max_size = 2
+    threads = [threading.Thread(target=lambda i=i: [limiter.allow(f'k{i}') for _ in range(20)]) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(limiter) == 8
+    assert limiter._pool._open <= 2
+
+    limiter.close()
+    assert limiter._pool._open == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        limiter.allow('k0')
+
+
+def test_failed_update_rolls_back_and_raises(tmp_path):
+    limiter = SQLiteRateLimiter(str(tmp_path / 'state.db'), {'default': Tier(3, 60.0)})
+    with pytest.raises(sqlite3.Error):
+        limiter.allow(['not', 'a', 'key'])
+    with limiter._pool.connection() as conn:
+        assert not conn.in_transaction
+    assert limiter.allow('a').allowed
+
+
+def test_limit_holds_across_processes(tmp_path):
+    path = init_shared_state(str(tmp_path / 'state.db'))
+    with multiprocessing.get_context('spawn').Pool(4) as pool:
+        allowed = pool.starmap(take, [(path, 'shared', 60)] * 4)
+    assert sum(allowed) == 100
+
+
+def test_shared_store_answers_other_workers(tmp_path):
+    path = init_shared_state(str(tmp_path / 'state.db'))
+    first = ResponseCache(store=SharedResponseStore(path, 60.0))
+    second = ResponseCache(store=SharedResponseStore(path, 60.0))
+    calls = []
+
+    def call():
+        calls.append(1)
+        return b'{"text": "once"}'
+
+    assert first.fetch('key', call) == (b'{"text": "once"}', MISS)
+    assert second.fetch('key', call) == (b'{"text": "once"}', HIT)
+    assert len(calls) == 1
+    assert second.shared_hits == 1
+
+
+def test_async_fetch_uses_store_off_the_loop(tmp_path):
+    path = init_shared_state(str(tmp_path / 'state.db'))
+    store = SharedResponseStore(path, 60.0)
+    threads = []
+
+    class RecordingStore:
+        def get(self, key):
+            threads.append(threading.get_ident())
+            return store.get(key)
+
+        def put(self, key, body):
+            threads.append(threading.get_ident())
+            store.put(key, body)
+
+    async def scenario():
+        async def call():
+            return b'{}'
+
+        cache = ResponseCache(store=RecordingStore())
+        assert await cache.fetch_async('key', call) == (b'{}', MISS)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(threads) == 2 and loop_thread not in threads
+    assert store.get('key') == b'{}'
+
+
+class StubUpstream(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        body = b'{"candidates": [{"content": {"parts": [{"text": "stub"}]}}]}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def test_workers_enforce_one_limit(tmp_path):
+    upstream = ThreadingHTTPServer(('127.0.0.1', 0), StubUpstream)
+    threading.Thread(target=upstream.serve_forever, daemon=True).start()
+    port = free_port()
+    env = dict(os.environ, GEMINI_API_KEY='test-key', RATE_LIMIT='20', RATE_LIMIT_WINDOW='3600',
+               GEMINI_API_ENDPOINT=f'http://127.0.0.1:{upstream.server_port}/generate')
+    workers = subprocess.Popen([sys.executable, 'workers.py', '--host', '127.0.0.1', '--port', str(port),
+                                '--workers', '3', '--state', str(tmp_path / 'state.db')],
+                               cwd=SERVER_DIR, env=env, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/test', timeout=5)
+                break
+            except OSError:
+                assert time.monotonic() < deadline and workers.poll() is None
+                time.sleep(0.2)
+
+        # Four client processes share one installation's limit of 20 across three workers
+        with multiprocessing.get_context('spawn').Pool(4) as pool:
+            results = pool.starmap(send, [(f'http://127.0.0.1:{port}/gemini', 'shared-install', 15)] * 4)
+        statuses = [status for result in results for status in result]
+        assert statuses.count(200) == 20
+        assert statuses.count(429) == 40
+    finally:
+        workers.terminate()
+        workers.wait()
+        upstream.shutdown()
@@ -0,0 +1,103 @@
+"""
+Multi-process serving mode for the Gemini proxy.
+
+Binds the port once and starts ``--workers`` processes that all accept on
+that socket, each running ``server.py``'s Flask app (threaded) or, with
+``--async``, the aiohttp app from ``async_server.py``. Rate limits and
+cached responses live in the WAL-mode SQLite file at ``SHARED_STATE_PATH``
+(``--state``), so an installation's limit holds across every worker.
+Workers that exit are restarted.
+
+    GEMINI_API_KEY=... python workers.py --workers 4 --port 8080
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from shared_state import init_shared_state
+
+RESTART_DELAY = 1.0  # Seconds before restarting a worker that exited
+
+
+def serve_worker(fd: int, use_async: bool):
+    """Serve requests arriving on the inherited listening socket ``fd``."""
+    sock = socket.socket(fileno=fd)
+    if use_async:
+        from aiohttp import web
+
+        from async_server import create_app, raise_open_file_limit
+
+        raise_open_file_limit()
+        web.run_app(create_app(), sock=sock, access_log=None, print=None)
+    else:
+        from werkzeug.serving import make_server
+
+        from server import app
+
+        host, port = sock.getsockname()[:2]
+        make_server(host, port, app, threaded=True, fd=sock.detach()).serve_forever()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the Gemini proxy from several worker processes.")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="Run the aiohttp app in each worker instead of Flask")
+    parser.add_argument('--state', default=os.environ.get('SHARED_STATE_PATH', 'proxy_state.db'),
+                        help="SQLite file shared by the workers")
+    parser.add_argument('--backlog', type=int, default=1024)
+    parser.add_argument('--worker-fd', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker_fd is not None:
+        serve_worker(args.worker_fd, args.use_async)
+        return 0
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    env = dict(os.environ, SHARED_STATE_PATH=init_shared_state(args.state))
+    listener = socket.create_server((args.host, args.port), backlog=args.backlog)
+    fd = listener.fileno()
+    command = [sys.executable, os.path.abspath(__file__), '--worker-fd', str(fd)]
+    if args.use_async:
+        command.append('--async')
+
+    def start():
+        return subprocess.Popen(command, pass_fds=(fd,), env=env)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    workers = [start() for _ in range(args.workers)]
+    logging.info(f"Serving on {args.host}:{args.port} with {args.workers} workers, state in {env['SHARED_STATE_PATH']}")
+    try:
+        while not stopping:
+            for i, worker in enumerate(workers):
+                if worker.poll() is not None:
+                    logging.warning(f"Worker {worker.pid} exited with {worker.returncode}, restarting")
+                    time.sleep(RESTART_DELAY)
+                    workers[i] = start()
+            time.sleep(0.2)
+    finally:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.wait()
+        listener.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
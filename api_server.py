@@ -1,7 +1,17 @@
 from flask import Flask, render_template, jsonify, request
+from itertools import islice
 import logging
+import os
+import sys
+
+from app.flow_format import FlowFormatError, load_flow, write_flow
+
+# Request metrics at GET /metrics, shared with the Gemini proxy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'AgentricGUI-Server'))
+from metrics import instrument_flask  # noqa: E402
 
 app = Flask(__name__)
+instrument_flask(app)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -18,6 +28,12 @@ DEFAULT_SETTINGS = {
     'experienceLevel': 'Novice'
 }
 
+# Saved flow file (.agflow is binary, anything else JSON)
+FLOW_PATH = os.environ.get('AGENTRIC_FLOW_PATH', 'flow.agflow')
+WEB_NODE_TYPE = 'web.Node'  # Node type recorded for nodes without a 'type'
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+
 # In-memory storage
 nodes = DEFAULT_NODES.copy()
 connections = []
@@ -72,4 +88,86 @@ def load_settings():
             'error': str(e)}
         ), 500
 
-app.run(host='0.0.0.0', port=8000, debug=True)
+def to_session(flow_nodes, flow_connections):
+    """Convert web nodes ({'id', 'name', 'x', 'y', ...}) to a NodeGraphQt-style session."""
+    session_nodes = {}
+    for node in flow_nodes:
+        session_nodes[str(node['id'])] = {
+            'type_': node.get('type', WEB_NODE_TYPE),
+            'name': node.get('name', ''),
+            'pos': [node.get('x', 0), node.get('y', 0)],
+            'custom': node  # Kept whole so extra fields round-trip
+        }
+    session_connections = [{'out': [str(c['out'][0]), c['out'][1]], 'in': [str(c['in'][0]), c['in'][1]]}
+                           for c in flow_connections]
+    return {'nodes': session_nodes, 'connections': session_connections}
+
+def to_web_node(flow_node):
+    # Ids come back as strings, matching the ids used in connections
+    node = dict(flow_node.properties.get('custom', {}))
+    node.update(id=flow_node.id, name=flow_node.name, x=flow_node.pos[0], y=flow_node.pos[1])
+    return node
+
+def page_args():
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), 0), MAX_PAGE_SIZE)
+    return offset, limit
+
+@app.route('/api/save_flow', methods=['POST'])
+def save_flow():
+    try:
+        global nodes, connections
+        data = request.json
+        flow_nodes = data.get('nodes', [])
+        flow_connections = data.get('connections', [])
+        write_flow(FLOW_PATH, to_session(flow_nodes, flow_connections))
+        nodes, connections = flow_nodes, flow_connections
+        logger.info(f"Flow with {len(flow_nodes)} nodes saved to {FLOW_PATH}")
+        return jsonify({'success': True})
+    except (FlowFormatError, KeyError, IndexError, TypeError) as e:
+        return jsonify({'success': False, 'error': f"Invalid flow: {str(e)}"}), 400
+    except Exception as e:
+        logger.error(f"Error saving flow: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/flow_summary', methods=['GET'])
+def flow_summary():
+    """Counts and node types of the saved flow, without decoding node properties."""
+    try:
+        with load_flow(FLOW_PATH) as flow:
+            return jsonify(flow.summary())
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': 'No saved flow'}), 404
+    except Exception as e:
+        logger.error(f"Error reading flow: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/load_flow', methods=['GET'])
+def load_saved_flow():
+    """
+    One page of the saved flow: nodes[offset:offset + limit] and the
+    connections at the same positions. Only the requested nodes are decoded.
+    """
+    try:
+        offset, limit = page_args()
+        with load_flow(FLOW_PATH) as flow:
+            end = min(offset + limit, flow.node_count)
+            page_nodes = [to_web_node(flow.node(index)) for index in range(offset, end)]
+            page_connections = [{'out': [c.out_id, c.out_port], 'in': [c.in_id, c.in_port]}
+                                for c in islice(flow.iter_connections(), offset, offset + limit)]
+            return jsonify({
+                'nodes': page_nodes,
+                'connections': page_connections,
+                'offset': offset,
+                'limit': limit,
+                'total_nodes': flow.node_count,
+                'total_connections': flow.connection_count
+            })
+    except FileNotFoundError:
+        return jsonify({'success': False, 'error': 'No saved flow'}), 404
+    except Exception as e:
+        logger.error(f"Error reading flow: {str(e)}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=8000, debug=True)
@@ -0,0 +1,99 @@
+"""
+Conversation state for the AI Assistant dock.
+
+Qt-free so it can be tested and reused outside the desktop app; the dock
+runs ``stream_reply`` on a worker thread.
+"""
+from typing import Iterator, List
+
+from app.utils import GEMINI_ENDPOINT, GEMINI_MODEL, stream_gemini_text
+
+DEFAULT_TOKEN_BUDGET = 8000  # Tokens of history sent with each question
+DEFAULT_SUMMARY_BUDGET = 500  # Tokens of the summary that replaces trimmed turns
+SUMMARY_LINE_CHARS = 200  # Characters kept from each trimmed turn
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+class Conversation:
+    """
+    Bounded chat history sent along with each assistant question.
+
+    Recent turns are sent verbatim. When they no longer fit in
+    ``token_budget``, the oldest are moved into a short running summary
+    (the first ``SUMMARY_LINE_CHARS`` characters of each turn, newest kept
+    first) that is capped at ``summary_budget`` tokens.
+    """
+
+    def __init__(self, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 summary_budget: int = DEFAULT_SUMMARY_BUDGET):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+        self.turns = []  # [(role, text, tokens)] with role 'user' or 'model'
+        self.summary_lines = []  # One compact line per trimmed turn, oldest first
+        self._tokens = 0
+
+    def add_exchange(self, prompt: str, reply: str):
+        """Record a completed question and answer, trimming history to budget."""
+        for role, text in (('user', prompt), ('model', reply)):
+            tokens = estimate_tokens(text)
+            self.turns.append((role, text, tokens))
+            self._tokens += tokens
+        self._trim()
+
+    def _trim(self):
+        # Drop whole exchanges so the history always starts with a user turn
+        while self.turns and self._tokens > self.token_budget:
+            for _ in range(2):
+                if not self.turns:
+                    break
+                role, text, tokens = self.turns.pop(0)
+                self._tokens -= tokens
+                speaker = 'User' if role == 'user' else 'Assistant'
+                line = ' '.join(text.split())
+                if len(line) > SUMMARY_LINE_CHARS:
+                    line = line[:SUMMARY_LINE_CHARS] + '...'
+                self.summary_lines.append(f"{speaker}: {line}")
+
+        summary_tokens = sum(estimate_tokens(line) for line in self.summary_lines)
+        while self.summary_lines and summary_tokens > self.summary_budget:
+            summary_tokens -= estimate_tokens(self.summary_lines.pop(0))
+
+    def history_tokens(self) -> int:
+        return self._tokens
+
+    def build_contents(self, prompt: str) -> List[dict]:
+        """
+        Build the ``contents`` of a Gemini request for ``prompt``.
+
+        Returns:
+            list: Summary (if any), retained turns and the new question
+        """
+        contents = []
+        if self.summary_lines:
+            summary = "Summary of our earlier conversation:\n" + '\n'.join(self.summary_lines)
+            contents.append({'role': 'user', 'parts': [{'text': summary}]})
+            contents.append({'role': 'model', 'parts': [{'text': "Understood."}]})
+        for role, text, _ in self.turns:
+            contents.append({'role': role, 'parts': [{'text': text}]})
+        contents.append({'role': 'user', 'parts': [{'text': prompt}]})
+        return contents
+
+    def clear(self):
+        self.turns = []
+        self.summary_lines = []
+        self._tokens = 0
+
+    def stream_reply(self, prompt: str, api_key: str, endpoint: str = GEMINI_ENDPOINT,
+                     model: str = GEMINI_MODEL) -> Iterator[str]:
+        """
+        Ask ``prompt`` with the conversation so far and yield the reply as it streams.
+
+        The exchange is not recorded; call ``add_exchange`` with the full reply
+        once it has arrived.
+        """
+        payload = {'contents': self.build_contents(prompt)}
+        yield from stream_gemini_text(endpoint, model, api_key, payload)
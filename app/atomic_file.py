@@ -0,0 +1,43 @@
+"""Atomic file replacement, shared by the settings store and flow files."""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+REPLACE_RETRIES = 5  # Windows refuses to replace a file another process has open
+
+
+def _replace(temp_path: str, path: str):
+    for attempt in range(REPLACE_RETRIES):
+        try:
+            os.replace(temp_path, path)
+            return
+        except PermissionError:
+            if attempt == REPLACE_RETRIES - 1:
+                raise
+            time.sleep(0.05)
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = 'w', prefix: str = '.tmp-'):
+    """
+    Write to a temp file next to ``path`` and rename it over ``path`` on success.
+
+    The data is on disk before the rename, so readers see either the old
+    file or the complete new one. If the block raises, the temp file is
+    removed and ``path`` is left untouched.
+    """
+    fd, temp_path = tempfile.mkstemp(prefix=prefix, suffix='.tmp',
+                                     dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
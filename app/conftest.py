@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """QApplication for tests that build Qt items; rendered offscreen, so no display is needed."""
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    QtWidgets = pytest.importorskip('PyQt5.QtWidgets')
+    pytest.importorskip('NodeGraphQt')
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
@@ -0,0 +1,94 @@
+import logging
+from collections import deque, namedtuple
+from typing import List, Optional
+
+from app.flow_engine import CURRENT_NODE
+
+DEFAULT_MAX_LINES = 5000
+
+# Loggers shown in the Console besides records made while a node is running
+CONSOLE_LOGGERS = ('AgentricGUI', 'FlowEngine')
+
+LogEntry = namedtuple('LogEntry', ['level', 'node', 'text'])
+
+
+class LogBuffer(logging.Handler):
+    """
+    Thread-safe ring buffer of formatted log lines for the Console tab.
+
+    ``emit`` only formats and appends, so logging from worker threads is
+    cheap; the GUI drains new entries on a timer and renders them in one
+    batch. At most ``max_lines`` entries are retained, and if the GUI falls
+    behind the oldest undrained entries are dropped and counted.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_MAX_LINES):
+        super().__init__()
+        self.lines = deque(maxlen=max_lines)
+        self._pending = deque(maxlen=max_lines)
+        self.dropped = 0  # Entries discarded before the GUI drained them
+        self.nodes = set()  # Node names seen so far, for the node filter
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'node'):
+            record.node = CURRENT_NODE.get()
+        if record.node is None and not record.name.startswith(CONSOLE_LOGGERS):
+            return False
+        return super().filter(record)
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            entry = LogEntry(record.levelno, record.node, self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        # Handler.handle() holds self.lock around emit()
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self.lines.append(entry)
+        self._pending.append(entry)
+        if entry.node is not None:
+            self.nodes.add(entry.node)
+
+    def drain(self) -> List[LogEntry]:
+        """Return and forget the entries logged since the last call."""
+        self.acquire()
+        try:
+            entries = list(self._pending)
+            self._pending.clear()
+            return entries
+        finally:
+            self.release()
+
+    def take_dropped(self) -> int:
+        """Return and reset the number of entries dropped since the last call."""
+        self.acquire()
+        try:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+        finally:
+            self.release()
+
+    def snapshot(self) -> List[LogEntry]:
+        """Return every retained entry, oldest first."""
+        self.acquire()
+        try:
+            return list(self.lines)
+        finally:
+            self.release()
+
+    def clear(self):
+        self.acquire()
+        try:
+            self.lines.clear()
+            self._pending.clear()
+            self.dropped = 0
+        finally:
+            self.release()
+
+
+def filter_entries(entries: List[LogEntry], min_level: int = logging.NOTSET,
+                   node: Optional[str] = None) -> List[str]:
+    """Return the text of the entries at or above ``min_level``, optionally for one node."""
+    return [entry.text for entry in entries
+            if entry.level >= min_level and (node is None or entry.node == node)]
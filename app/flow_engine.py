@@ -1,12 +1,132 @@
-from typing import Dict, List, Set
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
 import logging
+import threading
+import time
+
+from app.http_client import close_async_session
+from app.response_cache import log_response_cache_use, response_cache_counters
+from app.spill import BUFFER_TYPES, SpilledValue, SpillFile, SpillRecord, resolve_value, spill_value
+from app.tracing import FlowTracer, get_tracer
+
+# Outputs larger than this many encoded bytes are moved to memory-mapped files
+DEFAULT_SPILL_THRESHOLD = 64 * 1024 * 1024
+
+# Sync nodes whose last run was faster than this many seconds are called on the
+# loop thread in parallel runs; handing them to a worker thread costs more
+INLINE_SYNC_BELOW = 0.001
+# Inline calls made before the scheduler lets running async nodes progress
+INLINE_BATCH = 64
+
+# Name of the node being processed, for tagging log records made by node code
+CURRENT_NODE = contextvars.ContextVar('current_node', default=None)
+
+# Node status set for each progress event reported to ``progress_callback``
+EVENT_STATUS = {'started': 'processing', 'finished': 'success',
+                'failed': 'error', 'cancelled': ''}
+
+# NodeGraphQt signals that change the shape of the graph
+GRAPH_CHANGE_SIGNALS = ('port_connected', 'port_disconnected', 'node_created',
+                        'nodes_deleted', 'session_changed')
+
+
+class CircularDependencyError(ValueError):
+    """Raised when the graph contains a cycle; ``path`` lists the nodes on it."""
+
+    def __init__(self, path: List[str]):
+        self.path = path
+        super().__init__(f"Circular dependency detected: {' -> '.join(path)}")
+
+
+class ExecutionPlan:
+    """Compiled, immutable view of a graph used to schedule a run."""
+
+    def __init__(self, nodes: dict, dependencies: Dict[str, Set[str]],
+                 order: List[str], inputs: Dict[str, list]):
+        self.nodes = nodes                # node_id -> node
+        self.dependencies = dependencies  # node_id -> upstream node ids
+        self.order = order                # topological execution order
+        self.inputs = inputs              # node_id -> [(port_name, upstream_id)]
+        self.dependents = {node_id: [] for node_id in dependencies}
+        for node_id, deps in dependencies.items():
+            for dep in deps:
+                self.dependents[dep].append(node_id)
+
+
+class NodeRunState:
+    """What a node saw and produced the last time it ran successfully."""
+
+    def __init__(self, fingerprint: str, inputs: tuple, output: Any, digest: tuple):
+        self.fingerprint = fingerprint  # Digest of the node's own configuration
+        self.inputs = inputs            # ((port_name, upstream_id, upstream_digest), ...)
+        self.output = output            # Kept on disk (SpillRecord) if downstream nodes read it
+        self.digest = digest            # (digest, encoded size) of ``output``
+
+
+def encode_value(value: Any, strict: bool = False) -> bytes:
+    """
+    Canonical JSON encoding of a node value, used for digests and sizes.
+
+    Values JSON cannot represent are encoded by ``repr``, or raise
+    TypeError if ``strict`` is set.
+    """
+    return json.dumps(value, sort_keys=True, default=None if strict else repr).encode('utf-8')
+
+
+def fingerprint_value(value: Any) -> str:
+    """Stable digest of a JSON-like value, used to detect changed data."""
+    return hashlib.sha1(encode_value(value)).hexdigest()
+
+
+class FlowRun:
+    """Bookkeeping for a single run of an execution plan."""
+
+    def __init__(self, plan: ExecutionPlan):
+        self.plan = plan
+        self.results = {}  # node_id -> output (SpilledValue, SpillRecord) still needed
+        self.digests = {}  # node_id -> (digest, encoded size) of its output
+        # Consumers that have yet to read each node's output
+        self.pending_readers = {node_id: len(dependents)
+                                for node_id, dependents in plan.dependents.items()}
+
 
 class FlowEngine:
-    def __init__(self, graph):
+    def __init__(self, graph, max_workers: int = 4, tracer: FlowTracer = None,
+                 spill_threshold: Optional[int] = DEFAULT_SPILL_THRESHOLD,
+                 spill_dir: Optional[str] = None):
         self.graph = graph
         self.logger = logging.getLogger('FlowEngine')
         self.execution_order = []
         self.processed_nodes = set()
+        self.results = {}  # node_id -> output of the latest run (final outputs only by default)
+        self.keep_intermediate = False  # Keep every node's output in ``results``
+        self.spill_threshold = spill_threshold  # Bytes; None disables spilling
+        self.spill_dir = spill_dir
+        self.max_workers = max_workers  # Thread pool size for sync nodes in parallel runs
+        self._plan = None
+        self._node_state = {}  # node_id -> NodeRunState from the last run
+        self._node_seconds = {}  # node_id -> wall time of its last sync ``process`` call
+        self._spill_file = SpillFile(spill_dir)  # Stored outputs of intermediate nodes
+        self.tracer = tracer or get_tracer()  # Per-node spans of the latest traced run
+        # Called as (event, node_id, detail) from the thread running the flow
+        self.progress_callback = None
+        self.cancelled = False  # Whether the latest run was stopped by cancel()
+        self._cancel_requested = threading.Event()
+        self._loop = None
+        self._cancel_waiter = None
+
+        # Drop the cached plan whenever the graph topology changes
+        for signal_name in GRAPH_CHANGE_SIGNALS:
+            signal = getattr(graph, signal_name, None)
+            if signal is not None:
+                signal.connect(self.invalidate_plan)
 
     def get_node_dependencies(self) -> Dict[str, Set[str]]:
         """Build a dependency map of nodes based on connections."""
@@ -20,82 +140,549 @@ class FlowEngine:
         return dependencies
 
     def topological_sort(self, dependencies: Dict[str, Set[str]]) -> List[str]:
-        """Sort nodes in topological order for execution."""
-        visited = set()
-        temp_mark = set()
-        order = []
+        """
+        Sort nodes in topological order for execution.
+
+        Iterative Kahn's algorithm, linear in nodes plus edges. Ties keep
+        the iteration order of ``dependencies``.
 
-        def visit(node_id):
-            if node_id in temp_mark:
-                raise ValueError("Circular dependency detected")
-            if node_id not in visited:
-                temp_mark.add(node_id)
-                for dep in dependencies[node_id]:
-                    visit(dep)
-                temp_mark.remove(node_id)
-                visited.add(node_id)
-                order.insert(0, node_id)
-
-        for node_id in dependencies:
-            if node_id not in visited:
-                visit(node_id)
+        Raises:
+            CircularDependencyError: If the graph contains a cycle
+        """
+        remaining = {node_id: len(deps) for node_id, deps in dependencies.items()}
+        dependents = {node_id: [] for node_id in dependencies}
+        for node_id, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(node_id)
 
+        queue = deque(node_id for node_id, count in remaining.items() if count == 0)
+        order = []
+        while queue:
+            node_id = queue.popleft()
+            order.append(node_id)
+            for dependent_id in dependents[node_id]:
+                remaining[dependent_id] -= 1
+                if remaining[dependent_id] == 0:
+                    queue.append(dependent_id)
+
+        if len(order) < len(dependencies):
+            raise CircularDependencyError(self._find_cycle(dependencies, remaining))
         return order
 
-    def run_flow(self) -> bool:
-        """Execute the node graph flow."""
+    @staticmethod
+    def _find_cycle(dependencies: Dict[str, Set[str]], remaining: Dict[str, int]) -> List[str]:
+        """Walk unsorted nodes upstream until one repeats and return that loop."""
+        node_id = next(node_id for node_id, count in remaining.items() if count)
+        seen = {}
+        path = []
+        while node_id not in seen:
+            seen[node_id] = len(path)
+            path.append(node_id)
+            # Every unsorted node has at least one unsorted dependency
+            node_id = next(dep for dep in dependencies[node_id] if remaining[dep])
+        cycle = path[seen[node_id]:] + [node_id]
+        cycle.reverse()  # Report in data-flow direction
+        return cycle
+
+    def invalidate_plan(self, *args):
+        """Discard the cached execution plan (connected to graph signals)."""
+        self._plan = None
+
+    def get_plan(self) -> ExecutionPlan:
+        """Return the cached execution plan, compiling it if the graph changed."""
+        if self._plan is None:
+            self._plan = self.compile_plan()
+            # Forget stored outputs of nodes that left the graph
+            for node_id in set(self._node_state) - set(self._plan.nodes):
+                del self._node_state[node_id]
+            for node_id in set(self._node_seconds) - set(self._plan.nodes):
+                del self._node_seconds[node_id]
+        return self._plan
+
+    def compile_plan(self) -> ExecutionPlan:
+        """Walk the graph once and build a fresh execution plan."""
+        nodes = {}
+        dependencies = {}
+        inputs = {}
+        for node in self.graph.all_nodes():
+            nodes[node.id] = node
+            dependencies[node.id] = set()
+            inputs[node.id] = []
+            for port in node.input_ports():
+                connected_ports = port.connected_ports()
+                for connected_port in connected_ports:
+                    dependencies[node.id].add(connected_port.node.id)
+                if connected_ports:
+                    # Data flows from the first connection, as in BaseNode.execute
+                    inputs[node.id].append((port.name(), connected_ports[0].node.id))
+
         try:
-            # Get dependencies and sort nodes
-            dependencies = self.get_node_dependencies()
-            self.execution_order = self.topological_sort(dependencies)
-            
-            # Store intermediate results
-            results = {}
-            
-            # Execute nodes in order
-            for node_id in self.execution_order:
-                node = self.graph.get_node_by_id(node_id)
-                
+            order = self.topological_sort(dependencies)
+        except CircularDependencyError as e:
+            raise CircularDependencyError([nodes[node_id].name() for node_id in e.path]) from None
+        return ExecutionPlan(nodes, dependencies, order, inputs)
+
+    def collect_input_data(self, node_id: str, results: dict,
+                           plan: Optional[ExecutionPlan] = None) -> dict:
+        """
+        Collect input data for a node from the results of its upstream nodes.
+
+        ``plan`` is the plan of the run in progress; the current one is
+        compiled if omitted.
+        """
+        input_data = {}
+        for port_name, upstream_id in (plan or self.get_plan()).inputs[node_id]:
+            if upstream_id in results:
+                input_data[port_name] = resolve_value(results[upstream_id])
+        return input_data
+
+    def run_flow(self, parallel: bool = False, force: bool = False) -> bool:
+        """
+        Execute the node graph flow.
+
+        Thin synchronous wrapper around :meth:`run_flow_async`; must not be
+        called from inside a running event loop.
+
+        Args:
+            parallel (bool): Run each node as soon as its dependencies have
+                finished instead of strictly one after another.
+            force (bool): Re-run every node instead of reusing the outputs
+                of nodes whose configuration and inputs are unchanged.
+
+        Returns:
+            bool: True if every node was processed successfully
+        """
+        return asyncio.run(self.run_flow_async(parallel=parallel, force=force))
+
+    async def run_flow_async(self, parallel: bool = False, force: bool = False) -> bool:
+        """
+        Execute the node graph flow on the running event loop.
+
+        Nodes that define an ``async_process`` coroutine are awaited directly.
+        In parallel mode, plain ``process`` methods run on a pool of
+        ``max_workers`` threads; sequential runs use a single worker thread.
+        Either way, sync nodes that last ran in under ``INLINE_SYNC_BELOW``
+        seconds are called on the loop thread instead.
+
+        Unless ``force`` is set, a node whose fingerprint and upstream outputs
+        match its last successful run is skipped and its stored output reused.
+
+        Intermediate outputs are dropped from ``results`` once every consumer
+        has read them (unless ``keep_intermediate`` is set), and outputs larger
+        than ``spill_threshold`` bytes are moved to memory-mapped temp files.
+        Stored outputs of intermediate nodes are kept in a temp file rather
+        than in memory, and read back only if a dirty node consumes them.
+
+        :meth:`cancel` stops the run from any thread. Each node's progress is
+        reported through ``progress_callback`` as it starts, finishes, fails
+        or is cancelled.
+
+        Args:
+            parallel (bool): Schedule every ready node concurrently
+            force (bool): Ignore stored outputs and re-run every node
+
+        Returns:
+            bool: True if every node was processed successfully
+        """
+        self.cancelled = False
+        self._cancel_requested.clear()
+        self._loop = asyncio.get_running_loop()
+        self._cancel_waiter = asyncio.Event()
+        cache_counters = response_cache_counters()
+        try:
+            # Reuse the compiled plan unless the graph changed since last run
+            plan = self.get_plan()
+            self.execution_order = plan.order
+            run = FlowRun(plan)
+            self.results = run.results
+            self._spill_file.compact([state.output for state in self._node_state.values()
+                                      if isinstance(state.output, SpillRecord)])
+            self.tracer.begin_run()
+
+            # Sequential runs still hand slow sync nodes to a thread, so cancel() need not wait for them
+            executor = ThreadPoolExecutor(max_workers=self.max_workers if parallel else 1)
+            try:
+                if parallel:
+                    return await self._run_parallel(run, executor, force)
+                return await self._run_sequential(run, executor, force)
+            finally:
+                # Don't block a cancelled run on sync nodes still running
+                executor.shutdown(wait=not self.cancelled, cancel_futures=True)
+
+        except Exception as e:
+            self.logger.error(f"Flow execution error: {str(e)}")
+            return False
+        finally:
+            # Async nodes share an aiohttp session that must close with this loop
+            await close_async_session()
+            log_response_cache_use(cache_counters)
+            self._loop = None
+            self._cancel_waiter = None
+
+    def cancel(self):
+        """
+        Stop the current run; safe to call from any thread.
+
+        No new nodes are started, in-flight async nodes are cancelled and the
+        run returns without waiting for sync nodes still on worker threads
+        (their results are discarded). Nodes called inline on the loop thread
+        are short enough to finish first.
+        """
+        self._cancel_requested.set()
+        loop, waiter = self._loop, self._cancel_waiter
+        if loop is not None and waiter is not None:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                pass  # The run finished and its loop closed in the meantime
+
+    def _notify(self, event: str, node, detail: Any = None):
+        """Update a node's status and report the event to ``progress_callback``."""
+        node.set_property('status', EVENT_STATUS[event])
+        if self.progress_callback is not None:
+            self.progress_callback(event, node.id, detail)
+
+    def _fail_node(self, node, span, error: Exception):
+        self.logger.error(f"Error processing node {node.name()}: {str(error)}", extra={'node': node.name()})
+        node.set_property('error_message', str(error))
+        self._notify('failed', node, str(error))
+        self._node_state.pop(node.id, None)
+        if span is not None:
+            span.status = 'error'
+
+    def node_fingerprint(self, node):
+        """
+        Digest of a node's configuration, or None if it cannot be tracked.
+
+        Nodes opt in to incremental runs by providing ``fingerprint()``.
+        """
+        fingerprint = getattr(node, 'fingerprint', None)
+        if fingerprint is None:
+            return None
+        return fingerprint_value(fingerprint())
+
+    def _input_size(self, run: 'FlowRun', node_id: str) -> int:
+        """Encoded size of everything a node reads from upstream, for tracing."""
+        return sum(run.digests[upstream_id][1] for _, upstream_id in run.plan.inputs[node_id]
+                   if upstream_id in run.digests)
+
+    def _input_signature(self, run: 'FlowRun', node_id: str) -> tuple:
+        return tuple((port_name, upstream_id, run.digests.get(upstream_id))
+                     for port_name, upstream_id in run.plan.inputs[node_id])
+
+    def _take_inputs(self, run: 'FlowRun', node_id: str) -> dict:
+        """Collect a node's inputs and release upstream outputs it was the last reader of."""
+        input_data = self.collect_input_data(node_id, run.results, run.plan)
+        self._release_inputs(run, node_id)
+        return input_data
+
+    def _release_inputs(self, run: 'FlowRun', node_id: str):
+        for upstream_id in run.plan.dependencies[node_id]:
+            run.pending_readers[upstream_id] -= 1
+            if run.pending_readers[upstream_id] == 0 and not self.keep_intermediate:
+                output = run.results.pop(upstream_id, None)
+                if isinstance(output, (SpilledValue, SpillRecord)):
+                    output.evict()  # Decoded for its consumers; the stored copy stays on disk
+
+    def _reuse_output(self, run: 'FlowRun', node_id: str) -> bool:
+        """Reuse the stored output of a clean node; returns False if it is dirty."""
+        state = self._node_state.get(node_id)
+        if state is None:
+            return False
+        node = run.plan.nodes[node_id]
+        fingerprint = self.node_fingerprint(node)
+        if fingerprint is None or fingerprint != state.fingerprint:
+            return False
+        if self._input_signature(run, node_id) != state.inputs:
+            return False
+
+        self.logger.info(f"Reusing output of unchanged node: {node.name()}", extra={'node': node.name()})
+        span = self.tracer.open_span(node, self._input_size(run, node_id))
+        self._release_inputs(run, node_id)
+        run.results[node_id] = state.output
+        run.digests[node_id] = state.digest
+        self.processed_nodes.add(node_id)
+        self._notify('finished', node)
+        if span is not None:
+            span.status = 'reused'
+            span.bytes_out = state.digest[1]
+        return True
+
+    def _record_output(self, run: 'FlowRun', node_id: str, output: Any, span=None):
+        """Store a fresh output for this run and remember it for the next one."""
+        if isinstance(output, BUFFER_TYPES):
+            # Hash raw buffers directly instead of JSON-encoding their repr
+            encoded = memoryview(output)
+            digest = (hashlib.sha1(output).hexdigest(), encoded.nbytes)
+        else:
+            try:
+                encoded = encode_value(output, strict=True)
+            except TypeError:
+                encoded = None  # Not plain JSON, so it cannot be stored for reuse
+            digest_input = encoded if encoded is not None else encode_value(output)
+            digest = (hashlib.sha1(digest_input).hexdigest(), len(digest_input))
+            del digest_input
+
+        if self.spill_threshold is not None and digest[1] > self.spill_threshold and encoded is not None:
+            spilled = spill_value(output, self.spill_dir, encoded)
+            if spilled is not None:
+                self.logger.info(f"Spilled {digest[1]} byte output of node "
+                                 f"{run.plan.nodes[node_id].name()} to disk")
+                output = spilled
+
+        run.results[node_id] = output
+        run.digests[node_id] = digest
+        self.processed_nodes.add(node_id)
+        if span is not None:
+            span.status = 'success'
+            span.bytes_out = digest[1]
+
+        fingerprint = self.node_fingerprint(run.plan.nodes[node_id])
+        # Error payloads are not worth reusing; retry those nodes next run
+        if fingerprint is None or (isinstance(output, dict) and 'error' in output):
+            self._node_state.pop(node_id, None)
+            return
+        stored = output
+        if run.plan.dependents[node_id] and not isinstance(stored, SpilledValue):
+            # Only final outputs stay in memory; the rest are freed after their
+            # last reader and reused from the spill file
+            if encoded is None:
+                self._node_state.pop(node_id, None)
+                return
+            stored = self._spill_file.store(encoded, isinstance(output, BUFFER_TYPES))
+        self._node_state[node_id] = NodeRunState(
+            fingerprint, self._input_signature(run, node_id), stored, digest)
+
+    async def process_node(self, node, input_data: dict, executor=None, span=None,
+                           run: Optional['FlowRun'] = None) -> Any:
+        """
+        Run a single node, preferring its ``async_process`` coroutine.
+
+        Sync nodes are dispatched to ``executor`` when one is given and are
+        called on the loop thread otherwise. ``span`` (from the tracer) is
+        filled in with the node's timings. Streamed chunks are forwarded
+        along the plan of ``run``.
+        """
+        if run is not None and hasattr(node, 'chunk_callback'):
+            node.chunk_callback = lambda chunk: self.forward_chunk(run, node.id, chunk)
+
+        token = CURRENT_NODE.set(node.name())
+        try:
+            async_process = getattr(node, 'async_process', None)
+            if async_process is not None and inspect.iscoroutinefunction(async_process):
+                if span is None:
+                    return await async_process(input_data)
+                return await span.run_async(async_process(input_data))
+
+            process = node.process if span is None else span.wrap(node.process)
+            node_id = node.id
+
+            def timed_process(input_data):
+                start = time.perf_counter()
+                try:
+                    return process(input_data)
+                finally:
+                    self._node_seconds[node_id] = time.perf_counter() - start
+
+            if executor is None:
+                return timed_process(input_data)
+            # Carry CURRENT_NODE over to the worker thread
+            in_context = functools.partial(contextvars.copy_context().run, timed_process)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, in_context, input_data)
+        finally:
+            CURRENT_NODE.reset(token)
+
+    def forward_chunk(self, run: 'FlowRun', node_id: str, chunk: Any):
+        """Deliver a streamed chunk to every node reading from ``node_id`` in ``run``."""
+        plan = run.plan
+        for dependent_id in plan.dependents.get(node_id, ()):
+            receive_chunk = getattr(plan.nodes[dependent_id], 'receive_chunk', None)
+            if receive_chunk is None:
+                continue
+            for port_name, upstream_id in plan.inputs[dependent_id]:
+                if upstream_id == node_id:
+                    receive_chunk(port_name, chunk)
+
+    def _runs_inline(self, node) -> bool:
+        """Whether a run should call ``node`` on the loop thread rather than a worker thread."""
+        async_process = getattr(node, 'async_process', None)
+        if async_process is not None and inspect.iscoroutinefunction(async_process):
+            return False
+        return self._node_seconds.get(node.id, INLINE_SYNC_BELOW) < INLINE_SYNC_BELOW
+
+    async def _run_sequential(self, run: 'FlowRun', executor: ThreadPoolExecutor, force: bool) -> bool:
+        """
+        Run the nodes one at a time in plan order.
+
+        A node that is not called inline is awaited alongside the cancel
+        waiter, so :meth:`cancel` abandons it instead of waiting for it.
+        """
+        plan = run.plan
+        cancel_task = asyncio.ensure_future(self._cancel_waiter.wait())
+        try:
+            for node_id in plan.order:
+                if self._cancel_requested.is_set():
+                    self.logger.info("Flow execution cancelled")
+                    self.cancelled = True
+                    return False
+                node = plan.nodes[node_id]
+                if not force and self._reuse_output(run, node_id):
+                    continue
+
                 # Collect input data from connected nodes
-                input_data = {}
-                for input_port in node.input_ports():
-                    connected_ports = input_port.connected_ports()
-                    if connected_ports:
-                        # Get data from the connected node's output
-                        connected_node = connected_ports[0].node
-                        if connected_node.id in results:
-                            input_data[input_port.name()] = results[connected_node.id]
+                input_data = self._take_inputs(run, node_id)
 
+                span = self.tracer.open_span(node, self._input_size(run, node_id))
                 try:
                     # Process the node
-                    self.logger.info(f"Processing node: {node.name()}")
-                    output = node.process(input_data)
-                    results[node_id] = output
-                    self.processed_nodes.add(node_id)
-                    
+                    self.logger.info(f"Processing node: {node.name()}", extra={'node': node.name()})
+                    self._notify('started', node)
+                    if self._runs_inline(node):
+                        output = await self.process_node(node, input_data, span=span, run=run)
+                    else:
+                        task = asyncio.ensure_future(self.process_node(node, input_data, executor, span, run))
+                        await asyncio.wait((task, cancel_task), return_when=asyncio.FIRST_COMPLETED)
+                        if not task.done():
+                            self.logger.info("Flow execution cancelled")
+                            self.cancelled = True
+                            task.cancel()
+                            self._notify('cancelled', node)
+                            if span is not None:
+                                span.status = 'cancelled'
+                            return False
+                        output = task.result()
+                    del input_data
+                    self._record_output(run, node_id, output, span)
+
                     # Update node visual state (e.g., border color to indicate success)
-                    node.set_property('status', 'success')
-                    
+                    self._notify('finished', node)
+
                 except Exception as e:
-                    self.logger.error(f"Error processing node {node.name()}: {str(e)}")
-                    node.set_property('status', 'error')
+                    self._fail_node(node, span, e)
                     return False
 
             return True
+        finally:
+            cancel_task.cancel()
 
-        except Exception as e:
-            self.logger.error(f"Flow execution error: {str(e)}")
-            return False
+    async def _run_parallel(self, run: 'FlowRun', executor: ThreadPoolExecutor, force: bool) -> bool:
+        """
+        Wavefront scheduler: start every node whose dependencies are done.
+
+        Node status updates happen on the loop thread; only sync ``process``
+        calls run on the worker threads. Sync nodes that last ran in under
+        ``INLINE_SYNC_BELOW`` seconds are called directly instead.
+        """
+        plan = run.plan
+        remaining = {node_id: len(deps) for node_id, deps in plan.dependencies.items()}
+
+        def finish(node_id):
+            for dependent_id in plan.dependents[node_id]:
+                remaining[dependent_id] -= 1
+                if remaining[dependent_id] == 0:
+                    ready.append(dependent_id)
+
+        # Seed the queue in execution order so ties keep a stable order
+        ready = deque(node_id for node_id in plan.order if remaining[node_id] == 0)
+        running = {}
+        failed = False
+        # Finished node tasks (and the cancel waiter) report here through done
+        # callbacks, so each wake-up costs only the tasks that completed
+        completed = asyncio.Queue()
+        cancel_task = asyncio.ensure_future(self._cancel_waiter.wait())
+        cancel_task.add_done_callback(completed.put_nowait)
+
+        try:
+            while ready or running:
+                if self._cancel_requested.is_set():
+                    self.logger.info("Flow execution cancelled")
+                    self.cancelled = True
+                    for task, (node, span) in running.items():
+                        task.cancel()
+                        self._notify('cancelled', node)
+                        if span is not None:
+                            span.status = 'cancelled'
+                    return False
+
+                inline_budget = INLINE_BATCH
+                while ready and not failed and inline_budget:
+                    node_id = ready.popleft()
+                    if not force and self._reuse_output(run, node_id):
+                        finish(node_id)
+                        continue
+                    node = plan.nodes[node_id]
+                    span = self.tracer.open_span(node, self._input_size(run, node_id))
+                    input_data = self._take_inputs(run, node_id)
+                    self.logger.info(f"Processing node: {node.name()}", extra={'node': node.name()})
+                    self._notify('started', node)
+                    if not self._runs_inline(node):
+                        task = asyncio.ensure_future(self.process_node(node, input_data, executor, span, run))
+                        task.add_done_callback(completed.put_nowait)
+                        running[task] = (node, span)
+                        del input_data
+                        continue
+
+                    inline_budget -= 1
+                    try:
+                        # Without an executor a sync node returns without suspending
+                        output = await self.process_node(node, input_data, span=span, run=run)
+                        del input_data
+                        self._record_output(run, node_id, output, span)
+                    except Exception as e:
+                        self._fail_node(node, span, e)
+                        failed = True
+                        continue
+                    del output
+                    self._notify('finished', node)
+                    finish(node_id)
+                if failed:
+                    ready.clear()
+                if not running:
+                    continue
+
+                if ready:
+                    # Out of inline budget: let running nodes progress, then keep scheduling
+                    await asyncio.sleep(0)
+                    done = []
+                else:
+                    done = [await completed.get()]
+                while not completed.empty():
+                    done.append(completed.get_nowait())
+                for task in done:
+                    if task is cancel_task:
+                        continue
+                    node, span = running.pop(task)
+                    try:
+                        self._record_output(run, node.id, task.result(), span)
+                    except Exception as e:
+                        self._fail_node(node, span, e)
+                        # Stop scheduling new work but let in-flight nodes finish
+                        failed = True
+                        continue
+
+                    self._notify('finished', node)
+                    finish(node.id)
+        finally:
+            cancel_task.cancel()
+
+        return not failed
 
     def reset_flow(self):
         """Reset the flow state."""
         self.execution_order = []
         self.processed_nodes.clear()
+        self.results = {}
+        self._node_state.clear()
+        self._node_seconds.clear()
+        self._spill_file.close()
         for node in self.graph.all_nodes():
             node.set_property('status', '')
 
     def get_node_output(self, node_id: str) -> dict:
         """Get the output data for a specific node."""
+        if node_id in self.results:
+            return resolve_value(self.results[node_id])
         if node_id in self.processed_nodes:
             node = self.graph.get_node_by_id(node_id)
             return node.get_property('output_data', {})
@@ -0,0 +1,430 @@
+"""
+Versioned flow file format.
+
+Flows are saved either as compact binary ``.agflow`` files or as JSON.
+Both load into the same reader interface (``load_flow``), which can list
+and count nodes without decoding their properties, stream nodes and
+connections one at a time, or rebuild a NodeGraphQt session dict.
+
+Binary layout (version 1, little-endian)::
+
+    header       HEADER
+    strings      (string_count + 1) u32 offsets, then the UTF-8 blob
+    nodes        node_count NODE_RECORDs (fixed size, so random access)
+    connections  connection_count CONNECTION_RECORDs
+    properties   compact JSON documents, one per distinct node body
+    metadata     compact JSON of the session's other top-level keys
+
+Ids, node types, names and port names are interned in the string table;
+a node's properties (its NodeGraphQt session entry minus id, type, name
+and position) are only decoded when asked for, and identical bodies are
+stored once.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import weakref
+from array import array
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, Iterator, Optional, Union
+
+from app.atomic_file import atomic_open
+
+MAGIC = b'AGFLOW'
+VERSION = 1
+JSON_FORMAT_NAME = 'agentric-flow'
+BINARY_EXTENSION = '.agflow'
+
+# magic, version, flags, node_count, connection_count, string_count,
+# strings/nodes/connections/properties/metadata offsets, metadata length
+HEADER = struct.Struct('<6sHHIIIQQQQQI')
+# id, type, name (string indexes), x, y, properties offset and length
+NODE_RECORD = struct.Struct('<IIIddQI')
+# out node index, out port string, in node index, in port string
+CONNECTION_RECORD = struct.Struct('<IIII')
+
+FlowNode = namedtuple('FlowNode', ['id', 'type_', 'name', 'pos', 'properties'])
+FlowConnection = namedtuple('FlowConnection', ['out_id', 'out_port', 'in_id', 'in_port'])
+
+# Keys of a NodeGraphQt session node entry stored outside the properties blob
+_CORE_KEYS = ('type_', 'name', 'pos')
+
+_decode_json = json.JSONDecoder().decode
+
+
+class FlowFormatError(ValueError):
+    """Raised for files that are not flows, are corrupt or use an unsupported version."""
+
+
+@contextmanager
+def _decoding():
+    """Report malformed binary data as a FlowFormatError."""
+    try:
+        yield
+    except FlowFormatError:
+        raise
+    except (struct.error, ValueError, IndexError) as e:
+        # UnicodeDecodeError and JSONDecodeError are ValueErrors
+        raise FlowFormatError(f"Corrupt flow file: {e}") from None
+
+
+class FlowWriter:
+    """
+    Build a binary flow file node by node.
+
+    Nodes must be added before the connections that reference them. Nothing
+    is written until ``close``, which writes a temp file and renames it
+    over ``path``.
+    """
+
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.metadata = metadata or {}
+        self._strings = {}
+        self._nodes = []
+        self._node_index = {}
+        self._connections = []
+        self._bodies = {}  # encoded properties -> offset in the blob
+        self._blob = bytearray()
+
+    def _intern(self, text: str) -> int:
+        index = self._strings.get(text)
+        if index is None:
+            index = self._strings[text] = len(self._strings)
+        return index
+
+    def add_node(self, node_id: str, type_: str, name: str, pos=(0.0, 0.0),
+                 properties: Optional[Dict[str, Any]] = None):
+        encoded = json.dumps(properties or {}, separators=(',', ':'), sort_keys=True).encode('utf-8')
+        offset = self._bodies.get(encoded)
+        if offset is None:
+            offset = self._bodies[encoded] = len(self._blob)
+            self._blob += encoded
+        self._node_index[node_id] = len(self._nodes)
+        x, y = (pos or (0.0, 0.0))[:2]
+        self._nodes.append((self._intern(node_id), self._intern(type_), self._intern(name or ''),
+                            float(x), float(y), offset, len(encoded)))
+
+    def add_connection(self, out_id: str, out_port: str, in_id: str, in_port: str):
+        try:
+            out_index, in_index = self._node_index[out_id], self._node_index[in_id]
+        except KeyError as e:
+            raise FlowFormatError(f"Connection references unknown node {e.args[0]!r}") from None
+        self._connections.append((out_index, self._intern(out_port), in_index, self._intern(in_port)))
+
+    def close(self):
+        strings = [text.encode('utf-8') for text in self._strings]
+        offsets = array('I', [0])
+        for encoded in strings:
+            offsets.append(offsets[-1] + len(encoded))
+        metadata = json.dumps(self.metadata, separators=(',', ':')).encode('utf-8')
+
+        strings_offset = HEADER.size
+        nodes_offset = strings_offset + len(offsets) * offsets.itemsize + offsets[-1]
+        connections_offset = nodes_offset + len(self._nodes) * NODE_RECORD.size
+        properties_offset = connections_offset + len(self._connections) * CONNECTION_RECORD.size
+        metadata_offset = properties_offset + len(self._blob)
+
+        with atomic_open(self.path, 'wb', prefix='.flow-') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(self._nodes), len(self._connections),
+                                len(strings), strings_offset, nodes_offset, connections_offset,
+                                properties_offset, metadata_offset, len(metadata)))
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+            f.write(offsets.tobytes())
+            f.write(b''.join(strings))
+            f.write(b''.join(NODE_RECORD.pack(*node) for node in self._nodes))
+            f.write(b''.join(CONNECTION_RECORD.pack(*conn) for conn in self._connections))
+            f.write(self._blob)
+            f.write(metadata)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+
+
+class _FlowReader:
+    """Interface shared by the binary and JSON readers."""
+
+    format = None
+    version = VERSION
+    node_count = 0
+    connection_count = 0
+
+    def node(self, index: int, properties: bool = True) -> FlowNode:
+        raise NotImplementedError
+
+    def iter_nodes(self, properties: bool = True) -> Iterator[FlowNode]:
+        raise NotImplementedError
+
+    def iter_connections(self) -> Iterator[FlowConnection]:
+        raise NotImplementedError
+
+    def metadata(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts and node types, without decoding node properties."""
+        return {
+            'format': self.format,
+            'version': self.version,
+            'nodes': self.node_count,
+            'connections': self.connection_count,
+            'node_types': self.node_types()
+        }
+
+    def node_types(self) -> Dict[str, int]:
+        """Number of nodes of each type."""
+        return dict(Counter(node.type_ for node in self.iter_nodes(properties=False)))
+
+    def to_session(self) -> Dict[str, Any]:
+        """Rebuild a NodeGraphQt session dict (nodes keyed by id)."""
+        session = self.metadata()
+        nodes = {}
+        for node in self.iter_nodes():
+            entry = dict(node.properties)
+            entry.update(type_=node.type_, name=node.name, pos=node.pos)
+            nodes[node.id] = entry
+        session['nodes'] = nodes
+        session['connections'] = [{'out': [c.out_id, c.out_port], 'in': [c.in_id, c.in_port]}
+                                  for c in self.iter_connections()]
+        return session
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BinaryFlow(_FlowReader):
+    """Lazy reader over a binary flow held in memory or memory-mapped from disk."""
+
+    format = 'binary'
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview, mmap.mmap], source=None):
+        self._source = source  # File kept open for the lifetime of the mapping
+        self._data = data
+        view = memoryview(data)
+        if len(view) < HEADER.size or bytes(view[:len(MAGIC)]) != MAGIC:
+            raise FlowFormatError("Not a binary flow file")
+        (_, self.version, _, self.node_count, self.connection_count, string_count,
+         strings_offset, self._nodes_offset, self._connections_offset,
+         self._properties_offset, metadata_offset, metadata_length) = HEADER.unpack_from(view)
+        if self.version > VERSION:
+            raise FlowFormatError(f"Flow format version {self.version} is newer than supported ({VERSION})")
+        offsets_end = strings_offset + (string_count + 1) * 4
+        if max(offsets_end, self._nodes_offset + self.node_count * NODE_RECORD.size,
+               self._connections_offset + self.connection_count * CONNECTION_RECORD.size,
+               metadata_offset + metadata_length) > len(view):
+            raise FlowFormatError("Truncated flow file")
+
+        self._string_offsets = array('I')
+        self._string_offsets.frombytes(view[strings_offset:offsets_end])
+        if sys.byteorder == 'big':
+            self._string_offsets.byteswap()
+        self._string_blob = offsets_end
+        self._strings = [None] * string_count
+        self._metadata = (metadata_offset, metadata_length)
+        self._view = view
+        # Open generators hold slices of the view; close() has to finish them first
+        self._iterators = weakref.WeakSet()
+
+    def _string(self, index: int) -> str:
+        text = self._strings[index]
+        if text is None:
+            start = self._string_blob + self._string_offsets[index]
+            end = self._string_blob + self._string_offsets[index + 1]
+            text = self._strings[index] = str(self._view[start:end], 'utf-8')
+        return text
+
+    def _properties(self, offset: int, length: int) -> Dict[str, Any]:
+        start = self._properties_offset + offset
+        # Shared bodies are decoded again for each node so callers never alias
+        return _decode_json(str(self._view[start:start + length], 'utf-8'))
+
+    def _records(self) -> Iterator[tuple]:
+        end = self._nodes_offset + self.node_count * NODE_RECORD.size
+        return NODE_RECORD.iter_unpack(self._view[self._nodes_offset:end])
+
+    def _node(self, record: tuple, properties: bool) -> FlowNode:
+        id_index, type_index, name_index, x, y, offset, length = record
+        return FlowNode(self._string(id_index), self._string(type_index), self._string(name_index),
+                        [x, y], self._properties(offset, length) if properties else None)
+
+    def node(self, index: int, properties: bool = True) -> FlowNode:
+        """Return the ``index``-th node without touching any other."""
+        if not 0 <= index < self.node_count:
+            raise IndexError(index)
+        with _decoding():
+            record = NODE_RECORD.unpack_from(self._view, self._nodes_offset + index * NODE_RECORD.size)
+            return self._node(record, properties)
+
+    def _track(self, iterator: Generator) -> Generator:
+        self._iterators.add(iterator)
+        return iterator
+
+    def iter_nodes(self, properties: bool = True) -> Iterator[FlowNode]:
+        """Yield nodes in file order; ``properties=False`` skips decoding their bodies."""
+        return self._track(self._nodes(properties))
+
+    def _nodes(self, properties: bool) -> Iterator[FlowNode]:
+        with _decoding():
+            for record in self._records():
+                yield self._node(record, properties)
+
+    def node_types(self) -> Dict[str, int]:
+        with _decoding():
+            counts = Counter(record[1] for record in self._records())
+            return {self._string(index): count for index, count in counts.items()}
+
+    def iter_connections(self) -> Iterator[FlowConnection]:
+        return self._track(self._connections())
+
+    def _connections(self) -> Iterator[FlowConnection]:
+        with _decoding():
+            node_ids = [self._string(record[0]) for record in self._records()]
+            string = self._string
+            end = self._connections_offset + self.connection_count * CONNECTION_RECORD.size
+            for out_index, out_port, in_index, in_port in CONNECTION_RECORD.iter_unpack(
+                    self._view[self._connections_offset:end]):
+                yield FlowConnection(node_ids[out_index], string(out_port), node_ids[in_index], string(in_port))
+
+    def metadata(self) -> Dict[str, Any]:
+        offset, length = self._metadata
+        with _decoding():
+            return json.loads(bytes(self._view[offset:offset + length]))
+
+    def close(self):
+        """Release the data; iterators still open stop early."""
+        for iterator in list(self._iterators):
+            iterator.close()
+        self._view.release()
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        if self._source is not None:
+            self._source.close()
+
+
+class JsonFlow(_FlowReader):
+    """Reader over a JSON flow or a NodeGraphQt session, with the BinaryFlow interface."""
+
+    format = 'json'
+
+    def __init__(self, data: Dict[str, Any]):
+        if not isinstance(data, dict) or not isinstance(data.get('nodes', {}), (dict, list)):
+            raise FlowFormatError("Not a flow file")
+        if data.get('format') == JSON_FORMAT_NAME:
+            self.version = data.get('version', VERSION)
+            if self.version > VERSION:
+                raise FlowFormatError(f"Flow format version {self.version} is newer than supported ({VERSION})")
+            self._nodes = data.get('nodes', [])
+        else:
+            # Plain NodeGraphQt session: nodes keyed by id
+            self.version = 0
+            self._nodes = [dict(node, id=node_id) for node_id, node in data.get('nodes', {}).items()]
+        self._connections = data.get('connections', [])
+        self._metadata = {key: value for key, value in data.items()
+                          if key not in ('format', 'version', 'nodes', 'connections')}
+        self.node_count = len(self._nodes)
+        self.connection_count = len(self._connections)
+
+    @staticmethod
+    def _node(entry: dict, properties: bool) -> FlowNode:
+        body = {key: value for key, value in entry.items() if key not in _CORE_KEYS + ('id',)}
+        return FlowNode(entry['id'], entry.get('type_', ''), entry.get('name', ''),
+                        list(entry.get('pos', [0.0, 0.0])), body if properties else None)
+
+    def node(self, index: int, properties: bool = True) -> FlowNode:
+        return self._node(self._nodes[index], properties)
+
+    def iter_nodes(self, properties: bool = True) -> Iterator[FlowNode]:
+        for entry in self._nodes:
+            yield self._node(entry, properties)
+
+    def iter_connections(self) -> Iterator[FlowConnection]:
+        for connection in self._connections:
+            (out_id, out_port), (in_id, in_port) = connection['out'], connection['in']
+            yield FlowConnection(out_id, out_port, in_id, in_port)
+
+    def metadata(self) -> Dict[str, Any]:
+        return dict(self._metadata)
+
+
+def load_flow(path: str) -> Union[BinaryFlow, JsonFlow]:
+    """
+    Open a saved flow, detecting binary or JSON from the file contents.
+
+    Binary files are memory-mapped and decoded on access; close the returned
+    reader (or use it as a context manager) when done.
+
+    Raises:
+        FlowFormatError: If the file is not a flow or its version is unsupported
+    """
+    f = open(path, 'rb')
+    try:
+        head = f.read(len(MAGIC))
+        if head == MAGIC:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return BinaryFlow(data, source=f)
+        f.seek(0)
+        try:
+            data = json.load(f)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise FlowFormatError(f"Not a flow file: {e}") from None
+        f.close()
+        return JsonFlow(data)
+    except BaseException:
+        f.close()
+        raise
+
+
+def loads_flow(data: Union[bytes, str, Dict[str, Any]]) -> Union[BinaryFlow, JsonFlow]:
+    """Open a flow from bytes (binary or JSON), a JSON string or an already parsed dict."""
+    if isinstance(data, dict):
+        return JsonFlow(data)
+    if isinstance(data, (bytes, bytearray)) and data[:len(MAGIC)] == MAGIC:
+        return BinaryFlow(bytes(data))
+    try:
+        return JsonFlow(json.loads(data))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise FlowFormatError(f"Not a flow file: {e}") from None
+
+
+def write_flow(path: str, session: Dict[str, Any], binary: Optional[bool] = None):
+    """
+    Save a NodeGraphQt session dict as a flow file.
+
+    Args:
+        path (str): Destination file
+        session (dict): Session with 'nodes' keyed by id and 'connections'
+        binary (bool): Binary or JSON; defaults to binary for ``.agflow`` paths
+    """
+    if binary is None:
+        binary = path.endswith(BINARY_EXTENSION)
+    metadata = {key: value for key, value in session.items() if key not in ('nodes', 'connections')}
+
+    if not binary:
+        nodes = [dict(node, id=node_id) for node_id, node in session.get('nodes', {}).items()]
+        with atomic_open(path, 'w', prefix='.flow-') as f:
+            json.dump(dict(metadata, format=JSON_FORMAT_NAME, version=VERSION, nodes=nodes,
+                           connections=session.get('connections', [])), f)
+        return
+
+    with FlowWriter(path, metadata) as writer:
+        for node_id, node in session.get('nodes', {}).items():
+            body = {key: value for key, value in node.items() if key not in _CORE_KEYS}
+            writer.add_node(node_id, node.get('type_', ''), node.get('name', ''),
+                            node.get('pos', (0.0, 0.0)), body)
+        for connection in session.get('connections', []):
+            (out_id, out_port), (in_id, in_port) = connection['out'], connection['in']
+            writer.add_connection(out_id, out_port, in_id, in_port)
@@ -0,0 +1,105 @@
+import threading
+
+from PyQt5.QtCore import QCoreApplication, QObject, QThread, pyqtSignal, pyqtSlot
+
+
+class _GuiDispatcher(QObject):
+    """Runs callables on the GUI thread; lives there so its slot is queued."""
+    call = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.call.connect(self._invoke)
+
+    @pyqtSlot(object)
+    def _invoke(self, func):
+        func()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def call_in_gui_thread(func):
+    """
+    Run ``func`` on the GUI thread.
+
+    Called from the GUI thread (or before a QApplication exists) it runs
+    immediately; from any other thread it is queued and runs later.
+    """
+    global _dispatcher
+    app = QCoreApplication.instance()
+    if app is None or QThread.currentThread() is app.thread():
+        func()
+        return
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = _GuiDispatcher()
+            _dispatcher.moveToThread(app.thread())
+    _dispatcher.call.emit(func)
+
+
+class FlowWorker(QThread):
+    """
+    Runs a FlowEngine off the GUI thread and reports progress as Qt signals.
+
+    Signals are emitted from the worker thread; connected slots on GUI
+    objects are invoked on the GUI thread.
+    """
+    node_started = pyqtSignal(str)        # node_id
+    node_finished = pyqtSignal(str)       # node_id
+    node_failed = pyqtSignal(str, str)    # node_id, error message
+    node_cancelled = pyqtSignal(str)      # node_id
+    flow_finished = pyqtSignal(bool, bool)  # success, cancelled
+
+    def __init__(self, flow_engine, parallel: bool = False, force: bool = False, parent=None):
+        super().__init__(parent)
+        self.flow_engine = flow_engine
+        self.parallel = parallel
+        self.force = force
+
+    def run(self):
+        self.flow_engine.progress_callback = self._report
+        try:
+            success = self.flow_engine.run_flow(parallel=self.parallel, force=self.force)
+        finally:
+            self.flow_engine.progress_callback = None
+        self.flow_finished.emit(success, self.flow_engine.cancelled)
+
+    def stop(self):
+        """Ask the running flow to stop; ``flow_finished`` follows once it has."""
+        self.flow_engine.cancel()
+
+    def _report(self, event: str, node_id: str, detail):
+        if event == 'started':
+            self.node_started.emit(node_id)
+        elif event == 'finished':
+            self.node_finished.emit(node_id)
+        elif event == 'failed':
+            self.node_failed.emit(node_id, detail or '')
+        elif event == 'cancelled':
+            self.node_cancelled.emit(node_id)
+
+
+class AssistantWorker(QThread):
+    """Streams one AI Assistant reply off the GUI thread."""
+    chunk_received = pyqtSignal(str)
+    reply_finished = pyqtSignal(str, str)  # prompt, full reply
+    reply_failed = pyqtSignal(str)        # error message
+
+    def __init__(self, conversation, prompt: str, api_key: str, parent=None):
+        super().__init__(parent)
+        self.conversation = conversation
+        self.prompt = prompt
+        self.api_key = api_key
+
+    def run(self):
+        chunks = []
+        try:
+            for chunk in self.conversation.stream_reply(self.prompt, self.api_key):
+                chunks.append(chunk)
+                self.chunk_received.emit(chunk)
+        except Exception as e:
+            self.reply_failed.emit(str(e))
+            return
+        self.reply_finished.emit(self.prompt, ''.join(chunks))
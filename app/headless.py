@@ -0,0 +1,251 @@
+"""
+Pure-Python graph model for running flows without Qt.
+
+``HeadlessGraph`` exposes the subset of the NodeGraphQt API that
+``FlowEngine`` uses, and the node classes registered here share their
+``process`` logic with the desktop nodes through ``app.nodes.logic``.
+Nothing in this module imports PyQt5 or NodeGraphQt.
+"""
+import copy
+import logging
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.flow_format import load_flow
+from app.nodes.logic import NodeLogic, AgentLogic, APILogic
+
+# node type ("identifier.ClassName", as in NodeGraphQt sessions) -> node class
+NODE_REGISTRY = {}
+
+
+def register_node(node_class):
+    """Register a headless node class under its ``type_``; usable as a decorator."""
+    NODE_REGISTRY[node_class.type_] = node_class
+    return node_class
+
+
+class Signal:
+    """Minimal stand-in for a Qt signal so FlowEngine can track graph changes."""
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class HeadlessPort:
+    def __init__(self, node, name: str, required: bool = False):
+        self.node = node
+        self._name = name
+        self.required = required
+        self._connected = []
+
+    def name(self) -> str:
+        return self._name
+
+    def connected_ports(self) -> List['HeadlessPort']:
+        return list(self._connected)
+
+
+@register_node
+class HeadlessNode(NodeLogic):
+    type_ = 'agentric.BaseNode'
+    NODE_NAME = 'Node'
+    INPUTS = (('input', True),)  # (port name, required)
+    OUTPUTS = ('output',)
+    PROPERTIES = {}  # Default custom properties, mirroring the desktop node
+
+    def __init__(self, graph=None, name: Optional[str] = None, node_id: Optional[str] = None):
+        self.id = node_id or uuid.uuid4().hex
+        self.graph = graph
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._name = name or self.NODE_NAME
+        self._properties = {'status': '', 'error_message': '', 'output_data': {}}
+        self._properties.update(copy.deepcopy(self.PROPERTIES))
+        self._inputs = [HeadlessPort(self, port_name, required) for port_name, required in self.INPUTS]
+        self._outputs = [HeadlessPort(self, port_name) for port_name in self.OUTPUTS]
+
+    def name(self) -> str:
+        return self._name
+
+    def input_ports(self) -> List[HeadlessPort]:
+        return list(self._inputs)
+
+    def output_ports(self) -> List[HeadlessPort]:
+        return list(self._outputs)
+
+    def add_input(self, name: str, required: bool = False) -> HeadlessPort:
+        port = HeadlessPort(self, name, required)
+        self._inputs.append(port)
+        return port
+
+    def add_output(self, name: str) -> HeadlessPort:
+        port = HeadlessPort(self, name)
+        self._outputs.append(port)
+        return port
+
+    def get_input(self, name: str) -> Optional[HeadlessPort]:
+        return next((port for port in self._inputs if port.name() == name), None)
+
+    def get_output(self, name: str) -> Optional[HeadlessPort]:
+        return next((port for port in self._outputs if port.name() == name), None)
+
+    def get_property(self, name: str, default: Any = None) -> Any:
+        return self._properties.get(name, default)
+
+    def set_property(self, name: str, value: Any):
+        self._properties[name] = value
+
+    def properties(self) -> Dict[str, Any]:
+        return dict(self._properties)
+
+    def fingerprint(self) -> dict:
+        return {name: value for name, value in self._properties.items()
+                if name not in self.RUNTIME_PROPERTIES}
+
+
+@register_node
+class HeadlessAgentNode(AgentLogic, HeadlessNode):
+    type_ = 'agentric.AgentNode'
+    NODE_NAME = 'Agent'
+    INPUTS = (('instruction', True), ('context', False))
+    OUTPUTS = ('response', 'error')
+    PROPERTIES = {
+        'name': 'MyAgent',
+        'purpose': 'General Assistant',
+        'internet_access': True,
+        'agent_type': 'General Assistant',
+        'system_prompt': 'You are a helpful AI assistant.'
+    }
+
+
+@register_node
+class HeadlessAPINode(APILogic, HeadlessNode):
+    type_ = 'agentric.APINode'
+    NODE_NAME = 'API'
+    INPUTS = (('prompt', True), ('parameters', False))
+    OUTPUTS = ('response', 'error')
+    PROPERTIES = {
+        'api_name': 'Gemini',
+        'endpoint': 'https://generativelanguage.googleapis.com/v1beta/models',
+        'model': 'gemini-pro',
+        'use_cache': True,
+        'stream': False,
+        'batch_size': '32',
+        'output_text': ''
+    }
+
+    def get_api_key(self) -> str:
+        return self.get_property('api_key') or getattr(self.graph, 'api_key', '')
+
+
+class HeadlessGraph:
+    """In-memory node graph with the NodeGraphQt calls FlowEngine relies on."""
+
+    def __init__(self, api_key: str = ''):
+        self.api_key = api_key
+        self._nodes = {}
+        self.node_created = Signal()
+        self.nodes_deleted = Signal()
+        self.port_connected = Signal()
+        self.port_disconnected = Signal()
+
+    def create_node(self, node_type: str, name: Optional[str] = None, node_id: Optional[str] = None,
+                    properties: Optional[Dict[str, Any]] = None) -> HeadlessNode:
+        """
+        Create a registered node and add it to the graph.
+
+        Args:
+            node_type (str): Registered type, e.g. 'agentric.APINode'
+            name (str): Display name
+            node_id (str): Keep this id (e.g. when loading a saved flow)
+            properties (dict): Custom property values to apply
+
+        Returns:
+            HeadlessNode: The new node
+        """
+        if node_type not in NODE_REGISTRY:
+            raise ValueError(f"Unknown node type: {node_type}")
+        node = NODE_REGISTRY[node_type](self, name=name, node_id=node_id)
+        for prop_name, value in (properties or {}).items():
+            node.set_property(prop_name, value)
+        self._nodes[node.id] = node
+        self.node_created.emit(node)
+        return node
+
+    def delete_node(self, node: HeadlessNode):
+        for port in node.input_ports() + node.output_ports():
+            for other in port.connected_ports():
+                self.disconnect_ports(port, other)
+        del self._nodes[node.id]
+        self.nodes_deleted.emit([node.id])
+
+    def connect_ports(self, out_port: HeadlessPort, in_port: HeadlessPort):
+        out_port._connected.append(in_port)
+        in_port._connected.append(out_port)
+        self.port_connected.emit(in_port, out_port)
+
+    def disconnect_ports(self, port: HeadlessPort, other: HeadlessPort):
+        port._connected.remove(other)
+        other._connected.remove(port)
+        self.port_disconnected.emit(port, other)
+
+    def all_nodes(self) -> List[HeadlessNode]:
+        return list(self._nodes.values())
+
+    def get_node_by_id(self, node_id: str) -> Optional[HeadlessNode]:
+        return self._nodes.get(node_id)
+
+    def get_node_by_name(self, name: str) -> Optional[HeadlessNode]:
+        return next((node for node in self._nodes.values() if node.name() == name), None)
+
+    def load_session_data(self, data: dict):
+        """
+        Add the nodes and connections of a serialized NodeGraphQt session.
+
+        Args:
+            data (dict): Session dict with 'nodes' and optional 'connections'
+        """
+        for node_id, node_data in data.get('nodes', {}).items():
+            self.create_node(node_data['type_'], name=node_data.get('name'), node_id=node_id,
+                             properties=node_data.get('custom', {}))
+
+        for connection in data.get('connections', []):
+            out_id, out_name = connection['out']
+            in_id, in_name = connection['in']
+            out_port = self._nodes[out_id].get_output(out_name)
+            in_port = self._nodes[in_id].get_input(in_name)
+            if out_port is None or in_port is None:
+                raise ValueError(f"Unknown port in connection: {connection}")
+            self.connect_ports(out_port, in_port)
+
+    def load_flow(self, flow):
+        """
+        Add the nodes and connections of a flow reader, one at a time.
+
+        Args:
+            flow: Reader returned by ``app.flow_format.load_flow``
+        """
+        for node in flow.iter_nodes():
+            self.create_node(node.type_, name=node.name, node_id=node.id,
+                             properties=node.properties.get('custom', {}))
+
+        for connection in flow.iter_connections():
+            out_port = self._nodes[connection.out_id].get_output(connection.out_port)
+            in_port = self._nodes[connection.in_id].get_input(connection.in_port)
+            if out_port is None or in_port is None:
+                raise ValueError(f"Unknown port in connection: {connection}")
+            self.connect_ports(out_port, in_port)
+
+    @classmethod
+    def from_session_file(cls, path: str, api_key: str = '') -> 'HeadlessGraph':
+        """Build a graph from a saved flow (binary ``.agflow``, flow JSON or a NodeGraphQt session)."""
+        graph = cls(api_key=api_key)
+        with load_flow(path) as flow:
+            graph.load_flow(flow)
+        return graph
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import TYPE_CHECKING, Any, Dict
+from urllib.parse import urlsplit
+
+if TYPE_CHECKING:
+    import aiohttp
+    import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 20
+DEFAULT_CONNECT_TIMEOUT = 5  # Seconds to establish a connection
+DEFAULT_READ_TIMEOUT = 120  # Seconds to wait for response data (generation can be slow)
+
+# Cumulative request time per thread, read by the flow tracer
+_thread_stats = threading.local()
+
+
+def thread_http_time() -> float:
+    """Return the seconds the current thread has spent in HTTP requests so far."""
+    return getattr(_thread_stats, 'elapsed', 0.0)
+
+
+class HTTPClient:
+    """
+    Shared keep-alive HTTP client for all outbound API traffic.
+
+    Wraps a single ``requests.Session`` whose connection pool is reused
+    across calls and threads, applies default connect/read timeouts and
+    records per-host latency.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT):
+        # Imported here so requests stays off the desktop app's startup path
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._stats_lock = threading.Lock()
+        self._latency = {}  # host -> [count, total_seconds, max_seconds, errors]
+        self._async_sessions = weakref.WeakKeyDictionary()  # event loop -> aiohttp session
+
+    def request(self, method: str, url: str, **kwargs) -> 'requests.Response':
+        """
+        Send a request through the pooled session and record its latency.
+
+        With ``stream=True`` the latency runs until the body has been read
+        to the end or the response is closed.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except BaseException:
+            self._finish(host, start, True)
+            raise
+        if kwargs.get('stream') and not response.raw.closed:
+            self._finish_on_release(response, host, start)
+        else:
+            self._finish(host, start, False)
+        return response
+
+    def _finish(self, host: str, start: float, failed: bool):
+        elapsed = time.perf_counter() - start
+        _thread_stats.elapsed = thread_http_time() + elapsed
+        self._record(host, elapsed, failed)
+
+    def _finish_on_release(self, response: 'requests.Response', host: str, start: float):
+        """Record once urllib3 releases the connection: at the end of the body or on close."""
+        raw = response.raw
+        release_conn = raw.release_conn
+        pending = [True]
+
+        def release():
+            if pending:
+                pending.clear()
+                self._finish(host, start, False)
+            release_conn()
+
+        raw.release_conn = release
+
+    def get(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> 'requests.Response':
+        return self.request('POST', url, **kwargs)
+
+    def async_session(self) -> 'aiohttp.ClientSession':
+        """
+        Return the aiohttp session for the running event loop, creating it on first use.
+
+        aiohttp sessions belong to one loop, so each loop gets its own with
+        the same pool size and timeouts; :func:`close_async_session` closes
+        it before the loop ends.
+        """
+        loop = asyncio.get_running_loop()
+        with self._stats_lock:
+            session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            # Imported here so aiohttp stays optional and off the startup path
+            import aiohttp
+
+            connect_timeout, read_timeout = self.timeout
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout))
+            with self._stats_lock:
+                self._async_sessions[loop] = session
+        return session
+
+    async def async_post_json(self, url: str, payload: Any) -> Any:
+        """POST ``payload`` as JSON on the loop's aiohttp session and return the decoded reply."""
+        host = urlsplit(url).netloc
+        start = time.perf_counter()
+        failed = True
+        try:
+            async with self.async_session().post(url, json=payload) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+            failed = False
+            return data
+        finally:
+            self._record(host, time.perf_counter() - start, failed)
+
+    async def _close_async_session(self):
+        with self._stats_lock:
+            session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def _record(self, host: str, elapsed: float, failed: bool):
+        with self._stats_lock:
+            stats = self._latency.setdefault(host, [0, 0.0, 0.0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            if failed:
+                stats[3] += 1
+
+    def latency_stats(self) -> Dict[str, dict]:
+        """
+        Return latency figures per host.
+
+        Returns:
+            dict: host -> {'count', 'errors', 'avg_ms', 'max_ms', 'total_ms'}
+        """
+        with self._stats_lock:
+            snapshot = {host: list(stats) for host, stats in self._latency.items()}
+        return {
+            host: {
+                'count': count,
+                'errors': errors,
+                'avg_ms': total / count * 1000 if count else 0.0,
+                'max_ms': longest * 1000,
+                'total_ms': total * 1000
+            }
+            for host, (count, total, longest, errors) in snapshot.items()
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Return the process-wide HTTP client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
+
+
+async def close_async_session():
+    """Close the shared client's aiohttp session for the running loop, if it has one."""
+    client = _client
+    if client is not None:
+        await client._close_async_session()
+
+
+def configure_http_client(pool_size: int = DEFAULT_POOL_SIZE,
+                          connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                          read_timeout: float = DEFAULT_READ_TIMEOUT) -> HTTPClient:
+    """Replace the shared client with one using the given pool size and timeouts."""
+    global _client
+    with _client_lock:
+        previous, _client = _client, HTTPClient(pool_size, connect_timeout, read_timeout)
+    if previous is not None:
+        previous.close()
+    return _client
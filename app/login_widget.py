@@ -2,7 +2,6 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                             QLineEdit, QPushButton, QMessageBox, QInputDialog)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont, QIcon
-import sqlite3
 import hashlib
 
 class LoginWidget(QDialog):
@@ -122,6 +121,7 @@ class LoginWidget(QDialog):
         return hashlib.sha256(password.encode()).hexdigest()
 
     def authenticate_user(self, username, hashed_password):
+        import sqlite3  # Deferred so importing the login dialog stays off the startup path
         conn = sqlite3.connect('users.db')
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM users WHERE username=? AND password=?", (username, hashed_password))
@@ -162,6 +162,7 @@ class LoginWidget(QDialog):
             QMessageBox.warning(self, "Password Recovery Error", "Username not found.")
 
     def save_user_credentials(self, username, hashed_password):
+        import sqlite3
         conn = sqlite3.connect('users.db')
         cursor = conn.cursor()
         try:
@@ -174,6 +175,7 @@ class LoginWidget(QDialog):
             conn.close()
 
     def update_user_password(self, username, hashed_password):
+        import sqlite3
         conn = sqlite3.connect('users.db')
         cursor = conn.cursor()
         cursor.execute("UPDATE users SET password=? WHERE username=?", (hashed_password, username))
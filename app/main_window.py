@@ -1,22 +1,66 @@
 from PyQt5.QtWidgets import (QMainWindow, QTabWidget, QWidget, QVBoxLayout,
                              QLabel, QPushButton, QLineEdit, QFileDialog,
                              QFormLayout, QTextEdit, QDockWidget, QHBoxLayout,
-                             QComboBox, QMessageBox)
+                             QComboBox, QMessageBox, QTableWidget, QTableWidgetItem,
+                             QPlainTextEdit, QCheckBox)
 import logging
-from PyQt5.QtCore import Qt
-from NodeGraphQt import NodeGraph, setup_context_menu
-from app.nodes.agent_node import AgentNode
-from app.nodes.api_node import APINode
-from app.nodes.base_node import BaseNode
-from app.utils import call_gemini_assistant, check_for_updates
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QTextCursor
+from app.utils import check_for_updates
+from app.settings_store import default_settings_path, get_settings_store
+from app.tracing import get_tracer
+from app.node_updates import PropertyUpdates
+from app.flow_worker import AssistantWorker, FlowWorker, call_in_gui_thread
+from app.assistant import Conversation
+from app.console_log import DEFAULT_MAX_LINES, LogBuffer, filter_entries
 import json
 import os
+import threading
+import time
 import uuid
 import sys
 
 class MainWindow(QMainWindow):
+    # (header, row key) for the trace table in the Console tab
+    TRACE_COLUMNS = [
+        ("Node", 'node'), ("Type", 'type'), ("Status", 'status'),
+        ("Queue ms", 'queue_ms'), ("Wall ms", 'wall_ms'), ("CPU ms", 'cpu_ms'),
+        ("HTTP ms", 'http_ms'), ("Bytes In", 'bytes_in'), ("Bytes Out", 'bytes_out')
+    ]
+
+    # (label, minimum level) for the Console level filter
+    CONSOLE_LEVELS = [
+        ("All Levels", logging.NOTSET), ("Info", logging.INFO),
+        ("Warnings", logging.WARNING), ("Errors", logging.ERROR)
+    ]
+    CONSOLE_REFRESH_MS = 100  # Console repaints at most this often
+    NODE_UPDATE_MS = 33  # Node status/output changes reach the scene at most this often
+    LARGE_FLOW_NODES = 2000  # Ask before building editor items for bigger flows
+    FLOW_FILE_FILTER = "Flow Files (*.agflow);;JSON Files (*.json)"
+
+    # Flow toolbar buttons, styled once through the toolbar by object name
+    TOOLBAR_STYLE = """
+        QPushButton#runFlowButton, QPushButton#resetFlowButton, QPushButton#stopFlowButton {
+            color: white;
+            border: none;
+            padding: 8px 15px;
+            border-radius: 4px;
+            font-weight: bold;
+        }
+        QPushButton#runFlowButton { background-color: #2ecc71; }
+        QPushButton#runFlowButton:hover { background-color: #27ae60; }
+        QPushButton#runFlowButton:pressed { background-color: #219a52; }
+        QPushButton#resetFlowButton { background-color: #e74c3c; }
+        QPushButton#resetFlowButton:hover { background-color: #c0392b; }
+        QPushButton#resetFlowButton:pressed { background-color: #a93226; }
+        QPushButton#stopFlowButton { background-color: #7f8c8d; }
+        QPushButton#stopFlowButton:hover { background-color: #707b7c; }
+        QPushButton#stopFlowButton:disabled { background-color: #bdc3c7; }
+    """
+
     def __init__(self):
         super().__init__()
+        init_start = time.perf_counter()
 
         self.setWindowTitle("AgentricGUI")
 
@@ -46,57 +90,53 @@ class MainWindow(QMainWindow):
         toolbar = QWidget()
         toolbar_layout = QHBoxLayout(toolbar)
         toolbar_layout.setContentsMargins(10, 10, 10, 10)
-        
+        toolbar.setStyleSheet(self.TOOLBAR_STYLE)
+
         # Run flow button
         self.run_flow_btn = QPushButton("Run Flow")
-        self.run_flow_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2ecc71;
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #27ae60;
-            }
-            QPushButton:pressed {
-                background-color: #219a52;
-            }
-        """)
+        self.run_flow_btn.setObjectName("runFlowButton")
         self.run_flow_btn.clicked.connect(self.execute_flow)
         toolbar_layout.addWidget(self.run_flow_btn)
+
+        # Re-run every node, ignoring outputs kept from earlier runs
+        self.run_all_btn = QPushButton("Run All (Ignore Cache)")
+        self.run_all_btn.setToolTip("Re-run every node, even those unchanged since the last run")
+        self.run_all_btn.clicked.connect(lambda: self.execute_flow(force=True))
+        toolbar_layout.addWidget(self.run_all_btn)
         
         # Reset flow button
         self.reset_flow_btn = QPushButton("Reset")
-        self.reset_flow_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #e74c3c;
-                color: white;
-                border: none;
-                padding: 8px 15px;
-                border-radius: 4px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #c0392b;
-            }
-            QPushButton:pressed {
-                background-color: #a93226;
-            }
-        """)
+        self.reset_flow_btn.setObjectName("resetFlowButton")
         self.reset_flow_btn.clicked.connect(self.reset_flow)
         toolbar_layout.addWidget(self.reset_flow_btn)
+
+        # Stop button, enabled while a flow is running
+        self.stop_flow_btn = QPushButton("Stop")
+        self.stop_flow_btn.setObjectName("stopFlowButton")
+        self.stop_flow_btn.setEnabled(False)
+        self.stop_flow_btn.clicked.connect(self.stop_flow)
+        toolbar_layout.addWidget(self.stop_flow_btn)
+
+        # Open/save the flow as .agflow (binary) or JSON
+        self.open_flow_btn = QPushButton("Open Flow")
+        self.open_flow_btn.clicked.connect(self.open_flow)
+        toolbar_layout.addWidget(self.open_flow_btn)
+        self.save_flow_btn = QPushButton("Save Flow")
+        self.save_flow_btn.clicked.connect(self.save_flow)
+        toolbar_layout.addWidget(self.save_flow_btn)
         
         toolbar_layout.addStretch()
         self.create_tab_layout.addWidget(toolbar)
 
-        # Create the node graph
+        # Create the node graph; NodeGraphQt and the node modules load here,
+        # so importing this module stays cheap
+        from NodeGraphQt import NodeGraph
+        from app.nodes.agent_node import AgentNode
+        from app.nodes.api_node import APINode
+        from app.nodes.base_node import BaseNode
         self.graph = NodeGraph()
         self.graph_widget = self.graph.widget
         self.create_tab_layout.addWidget(self.graph_widget)
-        setup_context_menu(self.graph)
 
         # Register custom nodes
         self.graph.register_node(AgentNode)
@@ -106,15 +146,37 @@ class MainWindow(QMainWindow):
         # Initialize flow engine
         from app.flow_engine import FlowEngine
         self.flow_engine = FlowEngine(self.graph)
+        self.flow_worker = None  # Background thread of the running flow
+
+        # Node status and output changes are applied in batches, once per frame
+        self.node_updates = PropertyUpdates()
+        BaseNode.update_channel = self.node_updates
+        self.node_update_timer = QTimer(self)
+        self.node_update_timer.timeout.connect(self.flush_node_updates)
+        self.node_update_timer.start(self.NODE_UPDATE_MS)
 
         # --- Console Tab Setup ---
         self.console_tab_layout = QVBoxLayout(self.console_tab)
         
+        # Console filters
+        console_toolbar = QHBoxLayout()
+        self.console_level_combo = QComboBox()
+        self.console_level_combo.addItems([label for label, _ in self.CONSOLE_LEVELS])
+        self.console_level_combo.currentIndexChanged.connect(self.rerender_console)
+        console_toolbar.addWidget(self.console_level_combo)
+        self.console_node_combo = QComboBox()
+        self.console_node_combo.addItem("All Nodes")
+        self.console_node_combo.currentIndexChanged.connect(self.rerender_console)
+        console_toolbar.addWidget(self.console_node_combo)
+        console_toolbar.addStretch()
+        self.console_tab_layout.addLayout(console_toolbar)
+
         # Add console output
-        self.console_output = QTextEdit()
+        self.console_output = QPlainTextEdit()
         self.console_output.setReadOnly(True)
+        self.console_output.setMaximumBlockCount(DEFAULT_MAX_LINES)
         self.console_output.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #2c3e50;
                 color: #ecf0f1;
                 font-family: monospace;
@@ -123,39 +185,56 @@ class MainWindow(QMainWindow):
             }
         """)
         self.console_tab_layout.addWidget(self.console_output)
+
+        # Per-node trace of the latest run
+        trace_toolbar = QHBoxLayout()
+        self.tracing_mode_combo = QComboBox()
+        self.tracing_mode_combo.addItems(["Tracing: On", "Tracing: Sample 10%", "Tracing: Off"])
+        self.tracing_mode_combo.currentTextChanged.connect(self.update_tracing_mode)
+        trace_toolbar.addWidget(self.tracing_mode_combo)
+        self.export_trace_button = QPushButton("Export Chrome Trace")
+        self.export_trace_button.clicked.connect(self.export_trace)
+        trace_toolbar.addWidget(self.export_trace_button)
+        trace_toolbar.addStretch()
+        self.console_tab_layout.addLayout(trace_toolbar)
+
+        self.trace_table = QTableWidget(0, len(self.TRACE_COLUMNS))
+        self.trace_table.setHorizontalHeaderLabels([label for label, _ in self.TRACE_COLUMNS])
+        self.trace_table.setSortingEnabled(True)
+        self.trace_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.console_tab_layout.addWidget(self.trace_table)
         
         # Setup logging to console
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger('AgentricGUI')
         
-        # Custom handler to redirect logs to console widget
-        class QTextEditHandler(logging.Handler):
-            def __init__(self, widget):
-                super().__init__()
-                self.widget = widget
-
-            def emit(self, record):
-                msg = self.format(record)
-                self.widget.append(msg)
-        
-        console_handler = QTextEditHandler(self.console_output)
-        console_handler.setFormatter(
+        # Buffer log records from any thread and render them in batches
+        self.console_buffer = LogBuffer(DEFAULT_MAX_LINES)
+        self.console_buffer.setFormatter(
             logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         )
-        self.logger.addHandler(console_handler)
+        logging.getLogger().addHandler(self.console_buffer)
+        self.console_timer = QTimer(self)
+        self.console_timer.timeout.connect(self.flush_console)
+        self.console_timer.start(self.CONSOLE_REFRESH_MS)
 
         # --- Settings Tab Setup ---
         self.settings_tab_layout = QFormLayout(self.settings_tab)
         self.api_key_input = QLineEdit()
+        # Nodes run off the GUI thread, so they read the key mirrored onto the graph
+        self.graph.api_key = ""
+        self.api_key_input.textChanged.connect(self.update_graph_api_key)
         self.settings_tab_layout.addRow("API Key:", self.api_key_input)
 
         # Experience Level Dropdown
         self.experience_level_combo = QComboBox()
         self.experience_level_combo.addItems(["Novice", "Moderate", "Expert"])
-        self.experience_level_combo.currentTextChanged.connect(
-            self.update_ui_for_experience_level)
         self.settings_tab_layout.addRow("Experience Level:", self.experience_level_combo)
 
+        # Start each node once its inputs are ready instead of one at a time
+        self.parallel_checkbox = QCheckBox("Run independent nodes in parallel")
+        self.settings_tab_layout.addRow("Execution:", self.parallel_checkbox)
+
         self.save_settings_button = QPushButton("Save Settings")
         self.save_settings_button.clicked.connect(self.save_settings)
         self.settings_tab_layout.addRow(self.save_settings_button)
@@ -164,6 +243,10 @@ class MainWindow(QMainWindow):
         self.load_settings_button.clicked.connect(self.load_settings)
         self.settings_tab_layout.addRow(self.load_settings_button)
 
+        self.purge_cache_button = QPushButton("Purge Response Cache")
+        self.purge_cache_button.clicked.connect(self.purge_response_cache)
+        self.settings_tab_layout.addRow(self.purge_cache_button)
+
         # --- Assistant Panel (Dock Widget) ---
         self.assistant_dock = QDockWidget("AI Assistant", self)
         self.addDockWidget(Qt.RightDockWidgetArea, self.assistant_dock)
@@ -183,138 +266,330 @@ class MainWindow(QMainWindow):
         self.assistant_output.setReadOnly(True)
         self.assistant_layout.addWidget(self.assistant_output)
 
+        self.new_conversation_button = QPushButton("New Conversation")
+        self.new_conversation_button.clicked.connect(self.new_conversation)
+        self.assistant_layout.addWidget(self.new_conversation_button)
+
+        # Follow-up questions are sent with a bounded history
+        self.assistant_conversation = Conversation()
+        self.assistant_worker = None
+
         # --- Load settings on startup ---
-        self.load_settings()
+        # Read the known settings file without a dialog; "Load Settings" still asks
+        self.settings_path = default_settings_path()
+        self.load_settings_from(self.settings_path)
+
+        # Build the initial graph once, for the loaded experience level
+        self.update_ui_for_experience_level()
+        self.experience_level_combo.currentTextChanged.connect(
+            self.update_ui_for_experience_level)
 
         # --- Check for updates and kill switch ---
         self.check_for_updates_and_kill_switch()
-
-        self.update_ui_for_experience_level()
-        self.setup_initial_nodes()
         
         # Log startup complete
-        self.logger.info("AgentricGUI initialized successfully")
-
-    def setup_initial_nodes(self):
-        """Create initial nodes in the graph."""
-        try:
-            # Create an agent node
-            agent_node = self.graph.create_node(
-                'agentric.AgentNode',
-                name='MyAgent',
-                pos=[0, 0]
-            )
-            
-            # Create an API node
-            api_node = self.graph.create_node(
-                'agentric.APINode',
-                name='GeminiAPI',
-                pos=[300, 0]
-            )
-            
-            self.logger.info("Initial nodes created successfully")
-            
-        except Exception as e:
-            self.logger.error(f"Error creating initial nodes: {str(e)}")
+        self.logger.info(f"AgentricGUI initialized in {(time.perf_counter() - init_start) * 1000:.0f} ms")
 
-    def execute_flow(self):
-        """Execute the current node graph flow."""
+    def execute_flow(self, force: bool = False):
+        """Execute the current node graph flow on a background thread; ``force`` re-runs every node."""
+        if self.flow_worker is not None:
+            return
         try:
             self.logger.info("Starting flow execution...")
-            self.console_output.clear()
+            self.clear_console()
             
             # Validate connections
             if not self.flow_engine.validate_connections():
                 self.logger.error("Flow validation failed - check node connections")
                 return
             
-            # Run the flow
-            success = self.flow_engine.run_flow()
-            
-            if success:
-                self.logger.info("Flow execution completed successfully")
-            else:
-                self.logger.error("Flow execution failed - check console for details")
+            # Run the flow; node status reaches the scene through node_updates
+            self.flow_worker = FlowWorker(self.flow_engine, parallel=self.parallel_checkbox.isChecked(),
+                                          force=force, parent=self)
+            self.flow_worker.flow_finished.connect(self.on_flow_finished)
+            self.set_flow_running(True)
+            self.flow_worker.start()
                 
         except Exception as e:
             self.logger.error(f"Error executing flow: {str(e)}")
+            self.flow_worker = None
+            self.set_flow_running(False)
+
+    def update_graph_api_key(self, api_key: str):
+        self.graph.api_key = api_key
+
+    def stop_flow(self):
+        """Cancel the running flow."""
+        if self.flow_worker is not None:
+            self.logger.info("Stopping flow execution...")
+            self.stop_flow_btn.setEnabled(False)
+            self.flow_worker.stop()
+
+    def set_flow_running(self, running: bool):
+        self.run_flow_btn.setEnabled(not running)
+        self.run_all_btn.setEnabled(not running)
+        self.reset_flow_btn.setEnabled(not running)
+        self.stop_flow_btn.setEnabled(running)
+
+    def flush_node_updates(self):
+        """Apply the node property changes posted since the last frame."""
+        for node, changes in self.node_updates.drain():
+            # Skip nodes deleted while their changes were pending
+            if self.graph.get_node_by_id(node.id) is node:
+                node.apply_updates(changes)
+
+    def on_flow_finished(self, success: bool, cancelled: bool):
+        if cancelled:
+            self.logger.info("Flow execution stopped")
+        elif success:
+            self.logger.info("Flow execution completed successfully")
+        else:
+            self.logger.error("Flow execution failed - check console for details")
+        self.flow_worker.wait()
+        self.flow_worker.deleteLater()
+        self.flow_worker = None
+        self.flush_node_updates()
+        self.set_flow_running(False)
+        self.refresh_trace_table()
+
+    def console_filter(self):
+        """Return the (minimum level, node name or None) selected in the Console."""
+        min_level = self.CONSOLE_LEVELS[self.console_level_combo.currentIndex()][1]
+        node = self.console_node_combo.currentText()
+        return min_level, (None if self.console_node_combo.currentIndex() == 0 else node)
+
+    def flush_console(self):
+        """Append log lines buffered since the last tick in a single update."""
+        entries = self.console_buffer.drain()
+        dropped = self.console_buffer.take_dropped()
+        if not entries and not dropped:
+            return
+        lines = filter_entries(entries, *self.console_filter())
+        if dropped:
+            lines.insert(0, f"... {dropped} log lines dropped ...")
+        if lines:
+            self.console_output.appendPlainText('\n'.join(lines))
+
+        known = {self.console_node_combo.itemText(i) for i in range(1, self.console_node_combo.count())}
+        new_nodes = sorted(self.console_buffer.nodes - known)
+        if new_nodes:
+            self.console_node_combo.addItems(new_nodes)
+
+    def rerender_console(self, *args):
+        """Redraw the Console from the retained lines after a filter change."""
+        self.flush_console()
+        lines = filter_entries(self.console_buffer.snapshot(), *self.console_filter())
+        self.console_output.setPlainText('\n'.join(lines))
+        self.console_output.moveCursor(QTextCursor.End)
+
+    def clear_console(self):
+        self.console_buffer.clear()
+        self.console_output.clear()
+
+    def closeEvent(self, event):
+        """Stop a running flow before the window goes away."""
+        if self.flow_worker is not None:
+            self.flow_worker.stop()
+            self.flow_worker.wait()
+        if self.assistant_worker is not None:
+            self.assistant_worker.wait()
+        logging.getLogger().removeHandler(self.console_buffer)
+        from app.nodes.base_node import BaseNode
+        if BaseNode.update_channel is self.node_updates:
+            BaseNode.update_channel = None
+        super().closeEvent(event)
+
+    def refresh_trace_table(self):
+        """Show the spans of the latest traced run in the Console tab."""
+        rows = get_tracer().table_rows()
+        self.trace_table.setSortingEnabled(False)
+        self.trace_table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, (_, key) in enumerate(self.TRACE_COLUMNS):
+                value = row[key]
+                item = QTableWidgetItem()
+                # Store numbers as numbers so column sorting is numeric
+                item.setData(Qt.DisplayRole, round(value, 2) if isinstance(value, float) else value)
+                self.trace_table.setItem(row_index, column, item)
+        self.trace_table.setSortingEnabled(True)
+
+    def update_tracing_mode(self, mode: str):
+        if mode.endswith("Off"):
+            get_tracer().configure(enabled=False)
+        elif mode.endswith("10%"):
+            get_tracer().configure(enabled=True, sample_rate=0.1)
+        else:
+            get_tracer().configure(enabled=True, sample_rate=1.0)
+
+    def export_trace(self):
+        """Save the latest run's spans as a Chrome trace-event JSON file."""
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export Trace",
+                                                    os.path.join(".", "flow_trace.json"),
+                                                    "JSON Files (*.json)")
+        if file_path:
+            try:
+                get_tracer().export_chrome_trace(file_path)
+                self.logger.info(f"Trace exported to {file_path}")
+            except Exception as e:
+                self.logger.error(f"Error exporting trace: {str(e)}")
 
     def reset_flow(self):
         """Reset the flow state of all nodes."""
         try:
             self.flow_engine.reset_flow()
-            self.console_output.clear()
+            self.clear_console()
             self.logger.info("Flow reset complete")
         except Exception as e:
             self.logger.error(f"Error resetting flow: {str(e)}")
 
+    def save_flow(self):
+        from app.flow_format import BINARY_EXTENSION, write_flow
+        file_path, _ = QFileDialog.getSaveFileName(self, "Save Flow",
+                                                    os.path.join(".", "flow" + BINARY_EXTENSION),
+                                                    self.FLOW_FILE_FILTER)
+        if file_path:
+            try:
+                write_flow(file_path, self.graph.serialize_session())
+                self.logger.info(f"Flow saved to {file_path}")
+            except Exception as e:
+                self.logger.error(f"Error saving flow: {str(e)}")
+
+    def open_flow(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Open Flow", ".", self.FLOW_FILE_FILTER)
+        if file_path:
+            self.open_flow_from(file_path)
+
+    def open_flow_from(self, file_path: str):
+        """Load a saved flow into the editor, confirming first if it is very large."""
+        from app.flow_format import FlowFormatError, load_flow
+        try:
+            with load_flow(file_path) as flow:
+                summary = flow.summary()
+                self.logger.info(f"{file_path}: {summary['nodes']} nodes, "
+                                 f"{summary['connections']} connections ({summary['format']})")
+                if summary['nodes'] > self.LARGE_FLOW_NODES:
+                    types = ', '.join(f"{count} {type_}" for type_, count in summary['node_types'].items())
+                    answer = QMessageBox.question(
+                        self, "Large Flow",
+                        f"This flow has {summary['nodes']} nodes ({types}). "
+                        f"Showing it in the editor may take a while. Open it anyway?")
+                    if answer != QMessageBox.Yes:
+                        return
+                session = flow.to_session()
+        except (OSError, FlowFormatError) as e:
+            self.logger.error(f"Could not open flow {file_path}: {str(e)}")
+            return
+        self.graph.deserialize_session(session)
+        self.flow_engine.invalidate_plan()
+        self.logger.info(f"Flow loaded from {file_path}")
+
     def save_settings(self):
-        settings = {
-            "api_key": self.api_key_input.text(),
-            "experience_level": self.experience_level_combo.currentText(),
-            "installation_id": self.installation_id
-        }
         file_path, _ = QFileDialog.getSaveFileName(self, "Save Settings",
-                                                    os.path.join(".", "settings.json"),
+                                                    self.settings_path,
                                                     "JSON Files (*.json)")
         if file_path:
-            with open(file_path, 'w') as f:
-                json.dump(settings, f)
-            print(f"Settings saved to {file_path}")
+            self.write_settings(file_path)
+
+    def write_settings(self, file_path: str):
+        # Merge so keys written by the web app are kept
+        get_settings_store(file_path).update({
+            "api_key": self.api_key_input.text(),
+            "experience_level": self.experience_level_combo.currentText(),
+            "parallel_execution": self.parallel_checkbox.isChecked(),
+            "installation_id": self.installation_id
+        })
+        self.logger.info(f"Settings saved to {file_path}")
 
     def load_settings(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Load Settings",
-                                                    os.path.join(".", "settings.json"),
+                                                    self.settings_path,
                                                     "JSON Files (*.json)")
         if file_path:
-            try:
-                with open(file_path, 'r') as f:
-                    settings = json.load(f)
-                    self.api_key_input.setText(settings.get("api_key", ""))
-                    self.experience_level_combo.setCurrentText(settings.get("experience_level", "Novice"))
-                    self.installation_id = settings.get("installation_id", str(uuid.uuid4()))
-
-                print(f"Settings loaded from {file_path}")
-            except FileNotFoundError:
-                print("Settings file not found. Creating with defaults.")
-                self.installation_id = str(uuid.uuid4())
-                self.save_settings()
-            except json.JSONDecodeError:
-                print("Invalid JSON format in settings file.")
-                self.installation_id = str(uuid.uuid4())
-                self.save_settings()
+            self.load_settings_from(file_path)
 
-        else:
+    def load_settings_from(self, file_path: str):
+        """Apply a settings file, creating it with defaults if it does not exist."""
+        store = get_settings_store(file_path)
+        if not os.path.exists(store.path):
+            self.logger.info(f"Settings file {file_path} not found. Creating with defaults.")
+            self.installation_id = str(uuid.uuid4())
+            self.write_settings(file_path)
+            return
+        try:
+            settings = store.load()
+        except json.JSONDecodeError:
+            self.logger.error(f"Invalid JSON format in settings file {file_path}; using defaults.")
             self.installation_id = str(uuid.uuid4())
-            self.save_settings()
+            return
+        self.api_key_input.setText(settings.get("api_key", ""))
+        self.experience_level_combo.setCurrentText(settings.get("experience_level", "Novice"))
+        self.parallel_checkbox.setChecked(bool(settings.get("parallel_execution", False)))
+        self.installation_id = settings.get("installation_id", str(uuid.uuid4()))
+        self.logger.info(f"Settings loaded from {file_path}")
+
+    def purge_response_cache(self):
+        """Delete all cached API responses."""
+        # Opening the cache (and importing sqlite3) waits until it is needed
+        from app.response_cache import get_response_cache
+        try:
+            stats = get_response_cache().stats()
+            get_response_cache().purge()
+            self.logger.info(f"Purged {stats['entries']} cached responses "
+                             f"({stats['bytes']} bytes, {stats['hits']} hits, {stats['misses']} misses)")
+        except Exception as e:
+            self.logger.error(f"Error purging response cache: {str(e)}")
 
     def send_to_assistant(self):
         user_input = self.assistant_input.toPlainText()
-        if user_input.strip() == "":
+        if user_input.strip() == "" or self.assistant_worker is not None:
             return
 
         self.assistant_output.append(f"You: {user_input}")
         self.assistant_input.clear()
 
-        try:
-            response = call_gemini_assistant(user_input, self.graph)
-            if not response:
-                self.assistant_output.append("Assistant: No response received.")
-            else:
-                self.assistant_output.append(f"Assistant: {response}")
-        except Exception as e:
-            self.assistant_output.append(f"Assistant: Error: {e}")
+        api_key = self.api_key_input.text()
+        if not api_key:
+            self.assistant_output.append("Assistant: Error: API key not set in settings")
+            return
+
+        # Stream the reply on a worker thread; chunks are appended as they arrive
+        self.assistant_output.append("Assistant: ")
+        self.assistant_worker = AssistantWorker(self.assistant_conversation, user_input, api_key, self)
+        self.assistant_worker.chunk_received.connect(self.append_assistant_chunk)
+        self.assistant_worker.reply_finished.connect(self.on_assistant_reply)
+        self.assistant_worker.reply_failed.connect(self.on_assistant_error)
+        self.assistant_worker.finished.connect(self.on_assistant_worker_done)
+        self.send_button.setEnabled(False)
+        self.assistant_worker.start()
+
+    def append_assistant_chunk(self, chunk: str):
+        cursor = self.assistant_output.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(chunk)
+        self.assistant_output.setTextCursor(cursor)
+
+    def on_assistant_reply(self, prompt: str, reply: str):
+        if not reply:
+            self.append_assistant_chunk("No response received.")
+            return
+        self.assistant_conversation.add_exchange(prompt, reply)
+
+    def on_assistant_error(self, message: str):
+        self.append_assistant_chunk(f"Error: {message}")
+
+    def on_assistant_worker_done(self):
+        self.assistant_worker.deleteLater()
+        self.assistant_worker = None
+        self.send_button.setEnabled(True)
+
+    def new_conversation(self):
+        """Forget the assistant history so the next question starts fresh."""
+        self.assistant_conversation.clear()
+        self.assistant_output.clear()
 
     def update_ui_for_experience_level(self):
         experience_level = self.experience_level_combo.currentText()
 
-        for node in self.graph.all_nodes():
-            if node.type_ == 'agentric.APINode':
-                if experience_level == "Novice":
-                    node.action_button.setVisible(False)
-                else:
-                    node.action_button.setVisible(True)
-
         if experience_level == "Novice":
             self.setup_novice_graph()
         elif experience_level == "Moderate":
@@ -322,25 +597,37 @@ class MainWindow(QMainWindow):
         else:
             self.setup_expert_graph()
 
+        for node in self.graph.all_nodes():
+            if node.type_ == 'agentric.APINode':
+                node.set_widget_visible('refresh_models', experience_level != "Novice")
+
     def setup_novice_graph(self):
-        self.graph.clear()
+        self.graph.clear_session()
         self.graph.create_node('agentric.AgentNode', name='MyAgent', pos=[0, 0]).set_property('purpose', 'Respond to questions')
 
     def setup_moderate_graph(self):
-        self.graph.clear()
+        self.graph.clear_session()
         self.graph.create_node('agentric.AgentNode', name='MyAgent', pos=[0, 0])
         self.graph.create_node('agentric.APINode', name='GeminiAPI', pos=[300, 0])
 
     def setup_expert_graph(self):
-        self.graph.clear()
+        self.graph.clear_session()
         self.graph.create_node('agentric.AgentNode', name='MyAgent', pos=[0, 0])
         self.graph.create_node('agentric.APINode', name='GeminiAPI', pos=[300, 0])
 
     def check_for_updates_and_kill_switch(self):
-        latest_version, update_url, blacklist = check_for_updates(self.installation_id)
+        """Check for updates on a background thread so startup is not held up."""
+        installation_id = self.installation_id
+
+        def check():
+            result = check_for_updates(installation_id)
+            call_in_gui_thread(lambda: self.handle_update_check(*result))
 
+        threading.Thread(target=check, name='update-check', daemon=True).start()
+
+    def handle_update_check(self, latest_version, update_url, blacklist):
         if latest_version is None:
-            print("Error checking for updates.")
+            self.logger.error("Error checking for updates.")
             return
 
         if blacklist is True:
@@ -361,4 +648,4 @@ class MainWindow(QMainWindow):
             if msg_box.exec_() == QMessageBox.Yes:
                 import webbrowser
                 webbrowser.open(update_url)
-</create_file>
+
@@ -0,0 +1,47 @@
+"""
+Coalescing channel for node property changes made while flows run.
+
+Nodes post runtime property changes (status, outputs) here from any
+thread instead of touching the scene; the GUI drains the channel on a
+timer and applies each node's latest values in one go. Qt-free so it can
+be tested without a display.
+"""
+import threading
+from typing import Any, Dict, List, Tuple
+
+
+class PropertyUpdates:
+    """
+    Thread-safe buffer of pending node property changes, latest value wins.
+
+    A node that changes status three times and streams fifty output chunks
+    between two drains is applied once, with its final values.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}  # node -> {property name: value}, in first-changed order
+        self.posted = 0
+        self.coalesced = 0  # Changes replaced by a newer value before being applied
+
+    def put(self, node, name: str, value: Any):
+        with self._lock:
+            changes = self._pending.get(node)
+            if changes is None:
+                changes = self._pending[node] = {}
+            elif name in changes:
+                self.coalesced += 1
+            changes[name] = value
+            self.posted += 1
+
+    def drain(self) -> List[Tuple[Any, Dict[str, Any]]]:
+        """Return and forget the pending changes as (node, {name: value}) pairs."""
+        with self._lock:
+            if not self._pending:
+                return []
+            pending, self._pending = self._pending, {}
+        return list(pending.items())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending)
@@ -1,8 +1,22 @@
-from .agent_node import AgentNode
-from .api_node import APINode
-from .base_node import BaseNode
+import importlib
 
 __all__ = ['AgentNode', 'APINode', 'BaseNode']
 
+# The node classes pull in PyQt5 and NodeGraphQt, so they are imported on
+# first access; Qt-free modules such as app.nodes.logic stay importable
+# on machines without a display.
+_NODE_MODULES = {
+    'AgentNode': 'agent_node',
+    'APINode': 'api_node',
+    'BaseNode': 'base_node',
+}
+
+
+def __getattr__(name):
+    if name in _NODE_MODULES:
+        module = importlib.import_module(f'.{_NODE_MODULES[name]}', __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Author: Brandon Myers
 # GitHub: https://github.com/BAMmyers/AgentricGUI.git
@@ -1,25 +1,20 @@
 
 from app.nodes.base_node import BaseNode
-import requests
-import json
-from PyQt5.QtWidgets import QPushButton, QComboBox
-from typing import Dict, Any
+from app.nodes.logic import APILogic
+from app.http_client import get_http_client
 
-class APINode(BaseNode):
+class APINode(APILogic, BaseNode):
     NODE_NAME = 'API'
+    DEFAULT_PORTS = False
 
     def __init__(self):
         super().__init__()
         
-        # Remove default ports from base class
-        self.delete_input(0)
-        self.delete_output(0)
-        
         # Add specific ports
-        self.add_input('prompt', label='Prompt')
-        self.add_input('parameters', label='Parameters', required=False)
-        self.add_output('response', label='Response')
-        self.add_output('error', label='Error')
+        self.add_input('prompt')
+        self.add_input('parameters', required=False)
+        self.add_output('response')
+        self.add_output('error')
 
         # Add API configuration
         self.add_text_input('api_name', 'API Name', text='Gemini')
@@ -27,89 +22,33 @@ class APINode(BaseNode):
                            text='https://generativelanguage.googleapis.com/v1beta/models')
         
         # Add model selector
-        self.model_combo = QComboBox()
-        self.model_combo.addItems([
+        self.add_combo_menu('model', 'Model', items=[
             'gemini-pro',
             'gemini-pro-vision',
             'embedding-001'
         ])
-        self.add_custom_widget(self.model_combo)
+
+        # Reuse identical responses from the on-disk cache
+        self.add_checkbox('use_cache', 'Use Response Cache', state=True)
+
+        # Deliver partial text as it is generated
+        self.add_checkbox('stream', 'Stream Response', state=False)
+
+        # Prompts per upstream request (embeddings) or concurrent requests (generation)
+        self.add_text_input('batch_size', 'Batch Size', text='32')
 
         # Add refresh models button
-        self.refresh_btn = QPushButton('Refresh Models', self.view)
-        self.refresh_btn.clicked.connect(self.refresh_models)
-        self.add_custom_widget(self.refresh_btn)
+        self.add_action_button('refresh_models', 'Refresh Models', self.refresh_models)
 
         # Add a text output to show results
         self.add_text_output('output_text', 'Result', text="")
 
-    def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Process the input data and make API call.
-        
-        Args:
-            input_data (dict): Contains 'prompt' and optional 'parameters'
-            
-        Returns:
-            dict: Contains 'response' or 'error'
-        """
-        try:
-            # Get API configuration
-            main_window = self.graph.window()
-            api_key = main_window.api_key_input.text()
-            
-            if not api_key:
-                raise ValueError("API Key not set in settings")
-            
-            # Get input data
-            prompt = input_data.get('prompt', '')
-            parameters = input_data.get('parameters', {})
-            
-            if not prompt:
-                raise ValueError("No prompt provided")
-            
-            # Prepare API request
-            model = self.model_combo.currentText()
-            endpoint = self.get_property('endpoint')
-            
-            url = f"{endpoint}/{model}:generateContent?key={api_key}"
-            
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }]
-            }
-            
-            # Add any additional parameters
-            if parameters:
-                payload.update(parameters)
-            
-            # Make API call
-            self.logger.info(f"Making API call to {model}")
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Update output text widget
-            result = json.dumps(data, indent=2)
-            self.set_property('output_text', result)
-            
-            return {"response": data}
-            
-        except requests.exceptions.RequestException as e:
-            error_msg = f"API request failed: {str(e)}"
-            self.logger.error(error_msg)
-            self.set_property('output_text', error_msg)
-            return {"error": error_msg}
-            
-        except Exception as e:
-            error_msg = f"Error processing API node: {str(e)}"
-            self.logger.error(error_msg)
-            self.set_property('output_text', error_msg)
-            return {"error": error_msg}
+    def get_api_key(self) -> str:
+        # Mirrored from the settings field by MainWindow; widgets must not be read from flow threads
+        return getattr(self.graph, 'api_key', '')
+
+    def get_model(self) -> str:
+        return self.get_property('model')
 
     def refresh_models(self):
         """Refresh the available models list from the API."""
@@ -123,15 +62,14 @@ class APINode(BaseNode):
             endpoint = self.get_property('endpoint')
             url = f"{endpoint}?key={api_key}"
             
-            response = requests.get(url)
+            response = get_http_client().get(url)
             response.raise_for_status()
             
             data = response.json()
             model_names = [model['name'].split('/')[-1] for model in data['models']]
             
             # Update model combo box
-            self.model_combo.clear()
-            self.model_combo.addItems(model_names)
+            self.set_combo_items('model', model_names)
             
             # Update output text
             self.set_property('output_text', "Available Models:\n" + '\n'.join(model_names))
@@ -1,63 +1,193 @@
 from NodeGraphQt import BaseNode as _BaseNode
+from NodeGraphQt.widgets.node_widgets import (NodeBaseWidget, NodeCheckBox, NodeComboBox,
+                                              NodeLineEdit)
 
-from PyQt5.QtWidgets import QPushButton, QLabel
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QPushButton
+from app.flow_worker import call_in_gui_thread
+from app.nodes.node_item import PaintedNodeItem
+from app.nodes.logic import NodeLogic
+from app.tracing import get_tracer
 import logging
 
-class BaseNode(_BaseNode):  # Use a different name to avoid conflicts
+class BaseNode(NodeLogic, _BaseNode):  # Use a different name to avoid conflicts
     __identifier__ = 'agentric'  # Unique identifier for our nodes
 
+    # PropertyUpdates set by the main window; runtime property changes are
+    # posted there and applied to the scene in batches
+    update_channel = None
+
+    # Subclasses that declare their own ports set this to False
+    DEFAULT_PORTS = True
+
     def __init__(self):
-        super().__init__()
+        super().__init__(qgraphics_item=PaintedNodeItem)
         self.logger = logging.getLogger(self.__class__.__name__)
+        self._widget_factories = []  # Embedded widgets not built yet
+        self._combo_items = {}
+        self._hidden_widgets = set()
         
         # Add status properties
-        self.add_property('status', '')  # success, error, processing
-        self.add_property('error_message', '')
-        self.add_property('output_data', {})
+        self.create_property('status', '')  # success, error, processing
+        self.create_property('error_message', '')
+        self.create_property('output_data', {})
         
-        # Add status indicator
-        self.status_label = QLabel('')
-        self.status_label.setAlignment(Qt.AlignCenter)
-        self.add_custom_widget(self.status_label)
+        # Status and Execute are painted by the node item; the other
+        # embedded widgets are built when the node is selected or zoomed in
+        self.view.execute_callback = self.execute
+        self.view.widget_builder = self.build_widgets
         
-        # Add execute button
-        self.execute_btn = QPushButton('Execute')
-        self.execute_btn.clicked.connect(self.execute)
-        self.add_custom_widget(self.execute_btn)
-        
-        self.setup_default_ports()
+        if self.DEFAULT_PORTS:
+            self.setup_default_ports()
 
     def setup_default_ports(self):
         """Setup default input and output ports."""
         # Default input port
-        input_port = self.add_input('input')
-        input_port.required = True  # Mark as required for validation
-        
+        self.add_input('input')
+
         # Default output port
         self.add_output('output')
 
-    def process(self, input_data: dict) -> dict:
+    def add_input(self, name='input', required=True, **kwargs):
+        """Add an input port; flows are not run while a ``required`` one is unconnected."""
+        port = super().add_input(name, **kwargs)
+        port.required = required
+        return port
+
+    def set_property(self, name, value, push_undo=True):
+        """
+        Set a node property.
+        Safe to call from the flow worker: the change (and the widget update
+        that comes with it) is applied on the GUI thread. Runtime properties
+        never create undo entries, and with an ``update_channel`` they are
+        applied in the next batch rather than one call at a time.
         """
-        Process the node's input data and return output.
-        To be implemented by child classes.
+        if name in self.RUNTIME_PROPERTIES:
+            channel = BaseNode.update_channel
+            if channel is not None:
+                channel.put(self, name, value)
+                return
+            call_in_gui_thread(lambda: self.apply_updates({name: value}))
+            return
+        call_in_gui_thread(lambda: super(BaseNode, self).set_property(name, value, push_undo))
+
+    def apply_updates(self, changes):
+        """Apply runtime property changes on the GUI thread, without undo entries."""
+        for name, value in changes.items():
+            super().set_property(name, value, push_undo=False)
+        if 'status' in changes or 'error_message' in changes:
+            self.update_status_display()
+
+    def add_text_input(self, name, label='', text='', tooltip=None):
+        """Add a text property; its line edit is built with the other embedded widgets."""
+        if name in self.model.properties:
+            # A built-in property such as 'name': only give it a widget
+            self.set_property(name, text, push_undo=False)
+        else:
+            self.create_property(name, text)
+        self._defer_widget(tooltip, lambda: NodeLineEdit(self.view, name, label, self.get_property(name)))
+
+    def add_text_output(self, name, label='', text='', tooltip=None):
+        """Add a text property shown read-only, for results the node writes itself."""
+        self.create_property(name, text)
+
+        def create():
+            widget = NodeLineEdit(self.view, name, label, self.get_property(name))
+            widget.get_custom_widget().setReadOnly(True)
+            return widget
+        self._defer_widget(tooltip, create, bind=False)
+
+    def add_checkbox(self, name, label='', text='', state=False, tooltip=None):
+        """Add a boolean property; its checkbox is built with the other embedded widgets."""
+        self.create_property(name, state)
+        self._defer_widget(tooltip, lambda: NodeCheckBox(self.view, name, label, text,
+                                                         self.get_property(name)))
+
+    def add_combo_menu(self, name, label='', items=None, tooltip=None):
+        """Add a choice property; its combo box is built with the other embedded widgets."""
+        self._combo_items[name] = list(items or [])
+        self.create_property(name, self._combo_items[name][0] if items else '')
+
+        def create():
+            widget = NodeComboBox(self.view, name, label, self._combo_items[name])
+            widget.set_value(self.get_property(name))
+            return widget
+        self._defer_widget(tooltip, create)
+
+    def add_action_button(self, name, text, callback, tooltip=None):
+        """Add a push button (no property) that calls ``callback`` when clicked."""
+        def create():
+            widget = NodeBaseWidget(self.view, name)
+            button = QPushButton(text)
+            button.clicked.connect(callback)
+            widget.set_custom_widget(button)
+            return widget
+        self._defer_widget(tooltip, create, bind=False)
+
+    def set_combo_items(self, name, items):
+        """Replace the choices of a combo menu property, keeping the value if still offered."""
+        self._combo_items[name] = list(items)
+        if self.view.has_widget(name):
+            widget = self.view.get_widget(name)
+            widget.clear()
+            widget.add_items(self._combo_items[name])
+        if items and self.get_property(name) not in items:
+            self.set_property(name, items[0])
+        elif self.view.has_widget(name):
+            self.view.get_widget(name).set_value(self.get_property(name))
+
+    def set_widget_visible(self, name, visible):
+        """Show or hide an embedded widget, whether or not it has been built yet."""
+        if visible:
+            self._hidden_widgets.discard(name)
+        else:
+            self._hidden_widgets.add(name)
+        if self.view.has_widget(name):
+            self.view.get_widget(name).setVisible(visible)
+            self.view.draw_node()
+
+    def _defer_widget(self, tooltip, create, bind=True):
+        def build():
+            widget = create()
+            widget.setToolTip(tooltip or '')
+            if bind:
+                widget.value_changed.connect(lambda k, v: self.set_property(k, v))
+            widget.setVisible(widget.get_name() not in self._hidden_widgets)
+            self.view.add_widget(widget)
+        self._widget_factories.append(build)
+        if self.view.widget_builder is None:
+            # Widgets were already built; add this one straight away
+            self.build_widgets()
+
+    def build_widgets(self):
+        """Create the embedded widgets still pending; the node item calls this on demand."""
+        factories, self._widget_factories = self._widget_factories, []
+        for build in factories:
+            build()
+        if factories:
+            self.view.draw_node()
+
+    def fingerprint(self) -> dict:
+        """
+        Return the configuration that determines this node's output.
+        Used by the flow engine to skip nodes that have not changed.
+        Child classes should add state held outside of node properties.
         
-        Args:
-            input_data (dict): Data from connected input ports
-            
         Returns:
-            dict: Output data to be passed to connected nodes
+            dict: JSON-serializable configuration values
         """
-        raise NotImplementedError("Process method must be implemented by child class")
+        return {name: value for name, value in self.model.custom_properties.items()
+                if name not in self.RUNTIME_PROPERTIES}
 
     def execute(self):
         """
         Execute this node individually.
         Useful for testing and debugging.
         """
+        # Only FlowEngine starts trace runs; beginning one here would wipe the
+        # spans of a flow that is running, so the span joins the latest run
+        span = get_tracer().open_span(self)
         try:
             self.set_property('status', 'processing')
-            self.status_label.setText('Processing...')
             
             # Collect input data from connected nodes
             input_data = {}
@@ -68,33 +198,22 @@ class BaseNode(_BaseNode):  # Use a different name to avoid conflicts
                     input_data[port.name()] = connected_node.get_property('output_data', {})
             
             # Process the node
-            output = self.process(input_data)
+            process = self.process if span is None else span.wrap(self.process)
+            output = process(input_data)
             
             # Store the output
             self.set_property('output_data', output)
             self.set_property('status', 'success')
-            self.status_label.setText('✓')
-            self.status_label.setStyleSheet('color: green;')
+            if span is not None:
+                span.status = 'success'
             
         except Exception as e:
+            if span is not None:
+                span.status = 'error'
             self.logger.error(f"Error executing node: {str(e)}")
-            self.set_property('status', 'error')
             self.set_property('error_message', str(e))
-            self.status_label.setText('✗')
-            self.status_label.setStyleSheet('color: red;')
+            self.set_property('status', 'error')
 
     def update_status_display(self):
         """Update the visual status of the node."""
-        status = self.get_property('status')
-        if status == 'success':
-            self.status_label.setText('✓')
-            self.status_label.setStyleSheet('color: green;')
-        elif status == 'error':
-            self.status_label.setText('✗')
-            self.status_label.setStyleSheet('color: red;')
-        elif status == 'processing':
-            self.status_label.setText('...')
-            self.status_label.setStyleSheet('color: blue;')
-        else:
-            self.status_label.setText('')
-            self.status_label.setStyleSheet('')
+        self.view.set_status(self.get_property('status'), self.get_property('error_message'))
@@ -0,0 +1,386 @@
+"""
+Qt-free processing logic shared by the desktop nodes and the headless runner.
+
+The mixins here only rely on ``get_property``/``set_property``, ``logger``
+and a few small hooks (``get_api_key``, ``get_model``, ``get_agent_type``)
+that each node implementation provides.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+import asyncio
+import json
+
+from app.http_client import get_http_client
+from app.response_cache import get_response_cache, make_cache_key
+from app.utils import extract_response_text, make_text_response, stream_gemini_text
+
+
+class NodeLogic:
+    # Properties written during execution; they never affect a node's output
+    RUNTIME_PROPERTIES = ('status', 'error_message', 'output_data', 'output_text')
+
+    # Set by the flow engine to forward streamed output downstream
+    chunk_callback = None
+
+    def process(self, input_data: dict) -> dict:
+        """
+        Process the node's input data and return output.
+        To be implemented by child classes.
+
+        Nodes doing I/O may also define ``async def async_process(self,
+        input_data)``, as ``APILogic`` does; the flow engine awaits it
+        instead of calling ``process`` on a worker thread.
+        
+        Args:
+            input_data (dict): Data from connected input ports
+            
+        Returns:
+            dict: Output data to be passed to connected nodes
+        """
+        raise NotImplementedError("Process method must be implemented by child class")
+
+    def emit_chunk(self, chunk):
+        """
+        Publish a piece of partial output while ``process`` is still running.
+        The flow engine delivers it to ``receive_chunk`` on downstream nodes.
+        """
+        if self.chunk_callback is not None:
+            self.chunk_callback(chunk)
+
+    def receive_chunk(self, port_name: str, chunk):
+        """
+        Handle partial output streamed by an upstream node.
+        The full output still arrives through ``process``; override to react
+        early. May be called from a worker thread.
+        
+        Args:
+            port_name (str): Input port connected to the streaming node
+            chunk: Partial output emitted by the upstream node
+        """
+        pass
+
+
+class AgentLogic(NodeLogic):
+    def get_agent_type(self) -> str:
+        """Return the selected agent type."""
+        return self.get_property('agent_type')
+
+    def fingerprint(self) -> dict:
+        fingerprint = super().fingerprint()
+        fingerprint['agent_type'] = self.get_agent_type()
+        # On desktop nodes 'name' is NodeGraphQt's built-in property, not a custom one
+        fingerprint['name'] = self.get_property('name')
+        return fingerprint
+
+    def process(self, input_data: dict) -> dict:
+        """
+        Process the input data and generate agent response.
+        
+        Args:
+            input_data (dict): Contains 'instruction' and optional 'context'
+            
+        Returns:
+            dict: Contains 'response' or 'error'
+        """
+        try:
+            # Get agent configuration
+            agent_name = self.get_property('name')
+            agent_type = self.get_agent_type()
+            system_prompt = self.get_property('system_prompt')
+            internet_access = self.get_property('internet_access')
+            
+            # Get input data
+            instruction = input_data.get('instruction', '')
+            context = input_data.get('context', '')
+            
+            if not instruction:
+                raise ValueError("No instruction provided")
+            
+            # Prepare agent message
+            message = {
+                "role": "system",
+                "content": system_prompt
+            }
+            
+            if context:
+                message["context"] = context
+                
+            message["instruction"] = instruction
+            
+            # Log the processing
+            self.logger.info(f"Processing with agent {agent_name} ({agent_type})")
+            self.logger.debug(f"Input message: {json.dumps(message, indent=2)}")
+            
+            # TODO: Implement actual agent processing logic here
+            # For now, return a simple response
+            response = {
+                "response": f"Agent {agent_name} ({agent_type}) received instruction: {instruction}"
+            }
+            
+            if context:
+                response["response"] += f"\nWith context: {context}"
+            
+            return response
+            
+        except Exception as e:
+            self.logger.error(f"Error in agent processing: {str(e)}")
+            return {"error": str(e)}
+
+
+class APILogic(NodeLogic):
+    def get_api_key(self) -> str:
+        """Return the API key used for requests."""
+        return self.get_property('api_key')
+
+    def get_model(self) -> str:
+        """Return the selected model name."""
+        return self.get_property('model')
+
+    def fingerprint(self) -> Dict[str, Any]:
+        fingerprint = super().fingerprint()
+        fingerprint['model'] = self.get_model()
+        return fingerprint
+
+    def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process the input data and make API call.
+        
+        Args:
+            input_data (dict): Contains 'prompt' and optional 'parameters'.
+                A list of prompts is sent in batches and answered in order.
+            
+        Returns:
+            dict: Contains 'response' (a list for batched prompts) or 'error'
+        """
+        import requests
+
+        try:
+            # Get API configuration
+            api_key = self.get_api_key()
+            
+            if not api_key:
+                raise ValueError("API Key not set in settings")
+            
+            # Get input data
+            prompt = input_data.get('prompt', '')
+            parameters = input_data.get('parameters', {})
+            
+            if not prompt:
+                raise ValueError("No prompt provided")
+            
+            # Prepare API request
+            model = self.get_model()
+            endpoint = self.get_property('endpoint')
+
+            if isinstance(prompt, (list, tuple)):
+                data = self.process_batch(list(prompt), parameters, model, endpoint, api_key)
+                self.set_property('output_text', f"Processed {len(data)} prompts with {model}")
+                return {"response": data}
+
+            if self.get_property('stream'):
+                data = self.generate_stream(prompt, parameters, model, endpoint, api_key)
+                return {"response": data}
+
+            data = self.generate(prompt, parameters, model, endpoint, api_key)
+            
+            # Update output text widget
+            result = json.dumps(data, indent=2)
+            self.set_property('output_text', result)
+            
+            return {"response": data}
+            
+        except requests.exceptions.RequestException as e:
+            return self.report_error(f"API request failed: {str(e)}")
+            
+        except Exception as e:
+            return self.report_error(f"Error processing API node: {str(e)}")
+
+    async def async_process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Like ``process``, but a single non-streamed prompt is sent on the
+        shared aiohttp session, so it holds no thread and a cancelled run
+        aborts the request.
+
+        Batches, streamed prompts, invalid input and installs without
+        aiohttp are handed to ``process`` on a worker thread.
+        """
+        try:
+            # Imported here so aiohttp stays optional and off the startup path
+            import aiohttp
+        except ImportError:
+            aiohttp = None
+
+        api_key = self.get_api_key()
+        prompt = input_data.get('prompt', '')
+        if (aiohttp is None or not api_key or not prompt or isinstance(prompt, (list, tuple))
+                or self.get_property('stream')):
+            return await asyncio.to_thread(self.process, input_data)
+
+        try:
+            data = await self.async_generate(prompt, input_data.get('parameters', {}), self.get_model(),
+                                             self.get_property('endpoint'), api_key)
+        except aiohttp.ClientResponseError as e:
+            return self.report_error(f"API request failed: {e.status} {e.message}")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # The exception text can carry the request URL, and with it the API key
+            return self.report_error(f"API request failed: {type(e).__name__}")
+        except Exception as e:
+            return self.report_error(f"Error processing API node: {str(e)}")
+
+        self.set_property('output_text', json.dumps(data, indent=2))
+        return {"response": data}
+
+    def report_error(self, error_msg: str) -> Dict[str, Any]:
+        """Log and show ``error_msg`` and return it as the node's error output."""
+        self.logger.error(error_msg)
+        self.set_property('output_text', error_msg)
+        return {"error": error_msg}
+
+    def get_batch_size(self) -> int:
+        """Return the configured batch size (at least 1)."""
+        try:
+            return max(1, int(self.get_property('batch_size')))
+        except (TypeError, ValueError):
+            return 1
+
+    @staticmethod
+    def request_payload(prompt: Any, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a generateContent request body for ``prompt`` plus any extra parameters."""
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }]
+        }
+        
+        # Add any additional parameters
+        if parameters:
+            payload.update(parameters)
+        return payload
+
+    def generate(self, prompt: Any, parameters: Dict[str, Any], model: str,
+                 endpoint: str, api_key: str) -> Dict[str, Any]:
+        """Send a single generateContent request, served from the cache when possible."""
+        url = f"{endpoint}/{model}:generateContent?key={api_key}"
+        payload = self.request_payload(prompt, parameters)
+        
+        # Serve repeated requests from the response cache
+        use_cache = self.get_property('use_cache')
+        cache_key = make_cache_key(endpoint, model, prompt, parameters)
+        data = get_response_cache().get(cache_key) if use_cache else None
+
+        if data is None:
+            # Make API call
+            self.logger.info(f"Making API call to {model}")
+            response = get_http_client().post(url, json=payload)
+            response.raise_for_status()
+            
+            data = response.json()
+            if use_cache:
+                get_response_cache().put(cache_key, data)
+        return data
+
+    async def async_generate(self, prompt: Any, parameters: Dict[str, Any], model: str,
+                             endpoint: str, api_key: str) -> Dict[str, Any]:
+        """``generate`` on the running event loop; the SQLite cache is read and written on a thread."""
+        use_cache = self.get_property('use_cache')
+        cache_key = make_cache_key(endpoint, model, prompt, parameters)
+        data = await asyncio.to_thread(get_response_cache().get, cache_key) if use_cache else None
+
+        if data is None:
+            self.logger.info(f"Making API call to {model}")
+            url = f"{endpoint}/{model}:generateContent?key={api_key}"
+            data = await get_http_client().async_post_json(url, self.request_payload(prompt, parameters))
+            if use_cache:
+                await asyncio.to_thread(get_response_cache().put, cache_key, data)
+        return data
+
+    def generate_stream(self, prompt: Any, parameters: Dict[str, Any], model: str,
+                        endpoint: str, api_key: str) -> Dict[str, Any]:
+        """
+        Generate with streamGenerateContent, showing and forwarding text as it arrives.
+
+        Each chunk updates the Result widget and is passed to ``emit_chunk``
+        for downstream nodes. Returns a generateContent-shaped response
+        holding the full text.
+        """
+        use_cache = self.get_property('use_cache')
+        cache_key = make_cache_key(endpoint, model, prompt, dict(parameters or {}, stream=True))
+        data = get_response_cache().get(cache_key) if use_cache else None
+        if data is not None:
+            text = extract_response_text(data) or ''
+            self.set_property('output_text', text)
+            self.emit_chunk(text)
+            return data
+
+        payload = self.request_payload(prompt, parameters)
+
+        self.logger.info(f"Streaming API call to {model}")
+        chunks = []
+        for chunk in stream_gemini_text(endpoint, model, api_key, payload):
+            chunks.append(chunk)
+            self.set_property('output_text', ''.join(chunks))
+            self.emit_chunk(chunk)
+
+        data = make_text_response(''.join(chunks))
+        if use_cache:
+            get_response_cache().put(cache_key, data)
+        return data
+
+    def process_batch(self, prompts: List[Any], parameters: Dict[str, Any], model: str,
+                      endpoint: str, api_key: str) -> List[Any]:
+        """
+        Answer a list of prompts, preserving their order.
+
+        Embedding models use batchEmbedContents with ``batch_size`` prompts per
+        request; generation models send up to ``batch_size`` concurrent
+        generateContent requests, capped at the HTTP client's pool size.
+        """
+        batch_size = self.get_batch_size()
+        if 'embedding' in model:
+            return self.embed_batch(prompts, parameters, model, endpoint, api_key, batch_size)
+
+        # More threads than pooled connections would only queue on the pool
+        workers = min(batch_size, len(prompts), get_http_client().pool_size)
+        self.logger.info(f"Generating {len(prompts)} responses with {model} ({workers} concurrent)")
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            return list(executor.map(
+                lambda prompt: self.generate(prompt, parameters, model, endpoint, api_key),
+                prompts))
+
+    def embed_batch(self, prompts: List[Any], parameters: Dict[str, Any], model: str,
+                    endpoint: str, api_key: str, batch_size: int) -> List[Any]:
+        """Embed prompts with batchEmbedContents, sending only cache misses upstream."""
+        use_cache = self.get_property('use_cache')
+        cache = get_response_cache()
+        cache_parameters = dict(parameters or {}, method='batchEmbedContents')
+        keys = [make_cache_key(endpoint, model, prompt, cache_parameters) for prompt in prompts]
+
+        cached = cache.get_many(keys) if use_cache else {}
+        embeddings = [cached.get(key) for key in keys]
+        pending = [index for index, embedding in enumerate(embeddings) if embedding is None]
+
+        url = f"{endpoint}/{model}:batchEmbedContents?key={api_key}"
+        for start in range(0, len(pending), batch_size):
+            chunk = pending[start:start + batch_size]
+            requests_payload = []
+            for index in chunk:
+                embed_request = {
+                    "model": f"models/{model}",
+                    "content": {"parts": [{"text": prompts[index]}]}
+                }
+                if parameters:
+                    embed_request.update(parameters)
+                requests_payload.append(embed_request)
+
+            self.logger.info(f"Embedding {len(chunk)} prompts with {model}")
+            response = get_http_client().post(url, json={"requests": requests_payload})
+            response.raise_for_status()
+
+            fetched = list(zip(chunk, response.json()['embeddings']))
+            for index, embedding in fetched:
+                embeddings[index] = embedding
+            if use_cache:
+                cache.put_many((keys[index], embedding) for index, embedding in fetched)
+        return embeddings
@@ -0,0 +1,114 @@
+from NodeGraphQt.qgraphics.node_base import NodeItem
+from PyQt5 import sip
+from PyQt5.QtCore import QPointF, QRectF, Qt, QTimer
+from PyQt5.QtGui import QColor, QFont, QPainter, QPolygonF
+from PyQt5.QtWidgets import QGraphicsItem, QStyleOptionGraphicsItem
+
+
+class PaintedNodeItem(NodeItem):
+    """
+    Node item that paints the status badge and Execute button itself.
+
+    Embedded widgets each cost a QGraphicsProxyWidget, which makes panning
+    and zooming slow on large canvases. Instead of creating them with the
+    node, the item calls ``widget_builder`` once the node is selected or
+    drawn at ``WIDGET_DETAIL`` scale or larger (level of detail).
+    """
+    # status -> (glyph, badge colour)
+    STATUS_STYLES = {
+        'success': ('✓', QColor(46, 204, 113)),
+        'error': ('✗', QColor(231, 76, 60)),
+        'processing': ('…', QColor(52, 152, 219)),
+    }
+    BADGE_SIZE = 14.0
+    BADGE_DETAIL = 0.35  # Below this scale only the status colour is drawn
+    WIDGET_DETAIL = 0.6  # Embedded widgets are built at this scale or larger
+
+    def __init__(self, name='node', parent=None):
+        super().__init__(name, parent)
+        self.status = ''
+        self.execute_callback = None  # Called when the painted Execute button is clicked
+        self.widget_builder = None  # Creates the embedded widgets; cleared once called
+        self._build_scheduled = False
+        self._badge_font = QFont()
+        self._badge_font.setPointSizeF(7.0)
+
+    def set_status(self, status: str, message: str = ''):
+        """Show ``status`` on the badge, with ``message`` as tooltip for errors."""
+        self.setToolTip(message if status == 'error' else '')
+        if status != self.status:
+            self.status = status
+            self.update()
+
+    def _execute_rect(self) -> QRectF:
+        return QRectF(self.width - self.BADGE_SIZE - 6.0, 4.0, self.BADGE_SIZE, self.BADGE_SIZE)
+
+    def _status_rect(self) -> QRectF:
+        return self._execute_rect().translated(-(self.BADGE_SIZE + 4.0), 0.0)
+
+    def calc_size(self, add_w=0.0, add_h=0.0):
+        # Room for the two badges next to the title
+        return super().calc_size(add_w + 2 * self.BADGE_SIZE + 14.0, add_h)
+
+    def paint(self, painter, option, widget):
+        super().paint(painter, option, widget)
+        lod = QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        detailed = lod >= self.BADGE_DETAIL
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing, detailed)
+        painter.setPen(Qt.NoPen)
+
+        glyph, color = self.STATUS_STYLES.get(self.status, ('', None))
+        if color is not None:
+            rect = self._status_rect()
+            painter.setBrush(color)
+            painter.drawEllipse(rect)
+            if detailed:
+                painter.setPen(Qt.white)
+                painter.setFont(self._badge_font)
+                painter.drawText(rect, Qt.AlignCenter, glyph)
+                painter.setPen(Qt.NoPen)
+
+        if detailed and self.execute_callback is not None:
+            rect = self._execute_rect()
+            painter.setBrush(QColor(0, 0, 0, 80))
+            painter.drawRoundedRect(rect, 3.0, 3.0)
+            enabled = self.status != 'processing'
+            painter.setBrush(QColor(236, 240, 241) if enabled else QColor(127, 140, 141))
+            arrow = rect.adjusted(4.5, 3.5, -3.5, -3.5)
+            painter.drawPolygon(QPolygonF([arrow.topLeft(), arrow.bottomLeft(),
+                                           QPointF(arrow.right(), arrow.center().y())]))
+        painter.restore()
+
+        if self.widget_builder is not None and lod >= self.WIDGET_DETAIL:
+            self._schedule_build()
+
+    def _schedule_build(self):
+        # Deferred: adding widgets changes the item's geometry, which must
+        # not happen inside paint()
+        if not self._build_scheduled:
+            self._build_scheduled = True
+            QTimer.singleShot(0, self.build_widgets)
+
+    def build_widgets(self):
+        """Create the node's embedded widgets now, if they have not been yet."""
+        self._build_scheduled = False
+        if sip.isdeleted(self):
+            return
+        builder, self.widget_builder = self.widget_builder, None
+        if builder is not None:
+            builder()
+
+    def itemChange(self, change, value):
+        if change == QGraphicsItem.ItemSelectedChange and value and self.widget_builder is not None:
+            self._schedule_build()
+        return super().itemChange(change, value)
+
+    def mousePressEvent(self, event):
+        if (event.button() == Qt.LeftButton and self.execute_callback is not None
+                and self.status != 'processing' and self._execute_rect().contains(event.pos())):
+            event.accept()
+            self.execute_callback()
+            return
+        super().mousePressEvent(event)
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Child of the 'AgentricGUI' logger so hit/miss lines reach the Console tab
+logger = logging.getLogger('AgentricGUI.ResponseCache')
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.agentricgui', 'response_cache.db')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB
+DEFAULT_TTL = 7 * 24 * 60 * 60  # One week, in seconds
+EVICT_TO = 0.9  # Eviction frees space down to this fraction of max_bytes
+EXPIRE_INTERVAL = 60.0  # Seconds between sweeps for expired entries on put
+TOUCH_BATCH = 64  # Buffered access times written per transaction
+TOUCH_INTERVAL = 5.0  # Most seconds an access time stays buffered
+QUERY_CHUNK = 500  # Keys per IN (...) query, well under SQLite's variable limit
+
+
+def make_cache_key(endpoint: str, model: str, prompt: Any, parameters: Optional[dict] = None) -> str:
+    """
+    Build a content-addressed key for an API request.
+
+    Args:
+        endpoint (str): Base URL of the API
+        model (str): Model name
+        prompt: Prompt text (or any JSON-serializable prompt payload)
+        parameters (dict): Extra request parameters
+
+    Returns:
+        str: Hex SHA-256 digest identifying the request
+    """
+    request = {
+        'endpoint': endpoint,
+        'model': model,
+        'prompt': prompt,
+        'parameters': parameters or {}
+    }
+    encoded = json.dumps(request, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent, size-bounded LRU cache of API responses backed by SQLite.
+
+    Entries older than ``ttl`` seconds are treated as misses and removed.
+    When the stored payloads exceed ``max_bytes`` the least recently used
+    entries are evicted. Safe to share between threads.
+
+    Hits do not write: access times are buffered and stored in batches,
+    so recency is approximate to within ``TOUCH_INTERVAL`` seconds.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl: float = DEFAULT_TTL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = {}  # key -> access time not yet written
+        self._touched_since = 0.0
+        self._last_expire = 0.0
+
+        import sqlite3  # Deferred so importing this module stays off the startup path
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_created ON responses (created)')
+        self._conn.commit()
+        # Running total of payload sizes; rechecked against the table before evicting
+        self._bytes = self._total_size()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for ``key``, or None on a miss."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Return ``{key: response}`` for the fresh entries among ``keys``, in one query per chunk."""
+        now = time.time()
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            expired = []
+            for start in range(0, len(keys), QUERY_CHUNK):
+                chunk = keys[start:start + QUERY_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT key, value, created, size FROM responses "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+                for key, value, created, size in rows:
+                    if now - created > self.ttl:
+                        expired.append((key,))
+                        self._bytes -= size
+                        self._touched.pop(key, None)
+                    else:
+                        found[key] = value
+            if expired:
+                self._conn.executemany('DELETE FROM responses WHERE key = ?', expired)
+                self._conn.commit()
+
+            for key in found:
+                self._touch(key, now)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            logger.debug(f"Response cache: {len(found)} of {len(keys)} found "
+                         f"(hits={self.hits}, misses={self.misses})")
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def _touch(self, key: str, now: float):
+        """Buffer a hit's access time, writing the buffer once it is full or old."""
+        if not self._touched:
+            self._touched_since = now
+        self._touched[key] = now
+        if len(self._touched) >= TOUCH_BATCH or now - self._touched_since >= TOUCH_INTERVAL:
+            self._flush_touched()
+            self._conn.commit()
+
+    def _flush_touched(self):
+        if self._touched:
+            self._conn.executemany('UPDATE responses SET accessed = ? WHERE key = ?',
+                                   [(accessed, key) for key, accessed in self._touched.items()])
+            self._touched.clear()
+
+    def put(self, key: str, value: Any):
+        """Store a JSON-serializable response under ``key``."""
+        self.put_many([(key, value)])
+
+    def put_many(self, items: Iterable[Tuple[str, Any]]):
+        """Store ``(key, response)`` pairs in a single transaction."""
+        encoded = {key: json.dumps(value) for key, value in items}
+        now = time.time()
+        keys = list(encoded)
+        with self._lock:
+            for start in range(0, len(keys), QUERY_CHUNK):
+                chunk = keys[start:start + QUERY_CHUNK]
+                for (size,) in self._conn.execute(
+                        f"SELECT size FROM responses WHERE key IN ({','.join('?' * len(chunk))})", chunk):
+                    self._bytes -= size
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO responses (key, value, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(key, value, len(value), now, now) for key, value in encoded.items()])
+            for key, value in encoded.items():
+                self._touched.pop(key, None)
+                self._bytes += len(value)
+            if now - self._last_expire >= EXPIRE_INTERVAL:
+                self._expire(now)
+            if self._bytes > self.max_bytes:
+                self._evict(now)
+            self._conn.commit()
+
+    def _total_size(self) -> int:
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def _expire(self, now: float):
+        """Drop entries older than ``ttl``."""
+        self._last_expire = now
+        cutoff = now - self.ttl
+        expired = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses WHERE created < ?',
+                                     (cutoff,)).fetchone()[0]
+        if expired:
+            self._conn.execute('DELETE FROM responses WHERE created < ?', (cutoff,))
+            self._bytes -= expired
+
+    def _evict(self, now: float):
+        """Drop expired entries, then least recently used ones until under ``EVICT_TO`` of the budget."""
+        # Other processes may share the file, so the running total is only a hint
+        self._bytes = self._total_size()
+        self._expire(now)
+        if self._bytes <= self.max_bytes:
+            return
+
+        self._flush_touched()
+        excess = self._bytes - int(self.max_bytes * EVICT_TO)
+        stale = []
+        for key, size in self._conn.execute('SELECT key, size FROM responses ORDER BY accessed'):
+            stale.append((key,))
+            excess -= size
+            self._bytes -= size
+            if excess <= 0:
+                break
+        self._conn.executemany('DELETE FROM responses WHERE key = ?', stale)
+        logger.debug(f"Evicted {len(stale)} cached responses")
+
+    def purge(self):
+        """Remove every cached response and reset the counters."""
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+            self._conn.execute('VACUUM')
+            self._touched.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+        logger.info("Response cache purged")
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current cache usage."""
+        with self._lock:
+            entries, total = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': total
+        }
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache, opening it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(os.environ.get('AGENTRIC_CACHE_PATH', DEFAULT_CACHE_PATH))
+        return _cache
+
+
+def response_cache_counters() -> Tuple[int, int]:
+    """Return (hits, misses) of the process-wide cache, or (0, 0) if it has not been opened."""
+    cache = _cache
+    return (cache.hits, cache.misses) if cache is not None else (0, 0)
+
+
+def log_response_cache_use(since: Tuple[int, int]):
+    """Log the hits and misses since ``since`` (from ``response_cache_counters``) at INFO, if any."""
+    hits, misses = response_cache_counters()
+    hits, misses = max(hits - since[0], 0), max(misses - since[1], 0)
+    if hits or misses:
+        logger.info(f"Response cache: {hits} hits, {misses} misses "
+                    f"({hits / (hits + misses):.0%} hit rate)")
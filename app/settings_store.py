@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Union
+
+from app.atomic_file import atomic_open
+
+logger = logging.getLogger('AgentricGUI.SettingsStore')
+
+# Settings file shared by the desktop app, web_app.py and the headless runner
+SETTINGS_PATH_ENV = 'AGENTRIC_SETTINGS'
+DEFAULT_SETTINGS_PATH = 'settings.json'
+
+DEFAULT_SETTINGS = {
+    'api_key': '',
+    'experience_level': 'Novice'
+}
+
+
+def default_settings_path() -> str:
+    """Return the settings file path, honouring $AGENTRIC_SETTINGS."""
+    return os.environ.get(SETTINGS_PATH_ENV, DEFAULT_SETTINGS_PATH)
+
+
+class _FileLock:
+    """Exclusive advisory lock on a sidecar file, held across processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+')
+        if os.name == 'nt':
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after ~10 s; keep waiting
+                    continue
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class SettingsStore:
+    """
+    JSON settings file with a read cache and atomic, serialized writes.
+
+    ``load`` returns the cached settings until the file's identity changes
+    (inode, mtime or size), so repeated reads cost one ``stat``. Writes go
+    to a temp file in the same directory that is renamed over the original,
+    so readers never see a partial file; they are serialized by a thread
+    lock and a ``<path>.lock`` file lock shared with other processes.
+    """
+
+    def __init__(self, path: str, defaults: Optional[Dict[str, Any]] = None):
+        self.path = os.path.abspath(path)
+        self.defaults = dict(DEFAULT_SETTINGS if defaults is None else defaults)
+        self._lock = threading.RLock()
+        self._cached = None
+        self._signature = None
+
+    def _stat_signature(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Return the current settings, re-reading the file only if it changed.
+
+        Returns:
+            dict: A copy of the settings (defaults if the file does not exist)
+
+        Raises:
+            json.JSONDecodeError: If the file is not valid JSON
+        """
+        with self._lock:
+            signature = self._stat_signature()
+            if signature is None:
+                self._cached, self._signature = None, None
+                return dict(self.defaults)
+            if signature != self._signature:
+                with open(self.path, 'r') as f:
+                    self._cached = json.load(f)
+                self._signature = signature
+                logger.debug(f"Settings reloaded from {self.path}")
+            return dict(self._cached)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.load().get(name, default)
+
+    def save(self, settings: Dict[str, Any]):
+        """Replace the settings file atomically with ``settings``."""
+        with self._lock, _FileLock(self.path + '.lock'):
+            self._write(settings)
+
+    def update(self, changes: Union[Dict[str, Any], Callable[[dict], None]]) -> Dict[str, Any]:
+        """
+        Apply ``changes`` to the stored settings in one locked read-modify-write.
+
+        Args:
+            changes: Dict to merge in, or a function that edits the settings
+                dict in place
+
+        Returns:
+            dict: The settings as written
+        """
+        with self._lock, _FileLock(self.path + '.lock'):
+            # Re-read under the lock so another process's write is not lost
+            self._signature = None
+            try:
+                settings = self.load()
+            except json.JSONDecodeError:
+                logger.error(f"Invalid JSON in {self.path}; overwriting with defaults")
+                settings = dict(self.defaults)
+            if callable(changes):
+                changes(settings)
+            else:
+                settings.update(changes)
+            self._write(settings)
+            return dict(settings)
+
+    def _write(self, settings: Dict[str, Any]):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with atomic_open(self.path, 'w', prefix='.settings-') as f:
+            json.dump(settings, f, indent=4)
+        self._cached = dict(settings)
+        self._signature = self._stat_signature()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_settings_store(path: Optional[str] = None) -> SettingsStore:
+    """Return the shared store for ``path`` (default: ``default_settings_path()``)."""
+    path = os.path.abspath(path or default_settings_path())
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = SettingsStore(path)
+        return _stores[path]
@@ -0,0 +1,167 @@
+import json
+import mmap
+import tempfile
+from typing import Any, Optional
+
+BUFFER_TYPES = (bytes, bytearray, memoryview)
+
+# A SpillFile is only rewritten once it holds at least this many unreferenced bytes
+COMPACT_MIN_BYTES = 16 * 1024 * 1024
+
+_UNREAD = object()
+
+
+class SpilledValue:
+    """
+    A node output moved out of memory into a memory-mapped temporary file.
+
+    Buffer outputs (bytes, bytearray, memoryview, array.array via
+    memoryview) are handed to consumers as a read-only memoryview over the
+    mapping, so no copy is made. Other outputs are stored as JSON and
+    decoded once, on first use, until :meth:`evict` is called.
+    """
+
+    def __init__(self, data, is_buffer: bool, directory: Optional[str] = None):
+        self.is_buffer = is_buffer
+        # Unlinked immediately on POSIX, deleted on close on Windows
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._file.write(data)
+        self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self._map)
+        self._value = _UNREAD
+
+    def get(self) -> Any:
+        """Return the stored value."""
+        if self.is_buffer:
+            return memoryview(self._map)
+        if self._value is _UNREAD:
+            self._value = json.loads(self._map[:])
+        return self._value
+
+    def evict(self):
+        """Forget the decoded value; the next ``get`` decodes the mapping again."""
+        self._value = _UNREAD
+
+    def close(self):
+        try:
+            self._map.close()
+        except BufferError:
+            # A consumer still holds a memoryview; the mapping is released with it
+            return
+        self._file.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def __repr__(self):
+        return f"<SpilledValue {self.size} bytes>"
+
+
+def spill_value(value: Any, directory: Optional[str] = None,
+                encoded: Optional[bytes] = None) -> Optional[SpilledValue]:
+    """
+    Move ``value`` to a memory-mapped temp file.
+
+    ``encoded`` is the value's JSON encoding if the caller already has it.
+
+    Returns:
+        SpilledValue: The spilled value, or None if it cannot be stored
+        losslessly (not a buffer and not plain JSON)
+    """
+    if isinstance(value, BUFFER_TYPES):
+        return SpilledValue(memoryview(value), True, directory)
+    if encoded is None:
+        try:
+            encoded = json.dumps(value).encode('utf-8')
+        except (TypeError, ValueError):
+            return None
+    return SpilledValue(encoded, False, directory)
+
+
+class SpillRecord:
+    """A value stored in a ``SpillFile``, read back and decoded on first use."""
+
+    __slots__ = ('file', 'offset', 'size', 'is_buffer', '_value')
+
+    def __init__(self, file: 'SpillFile', offset: int, size: int, is_buffer: bool):
+        self.file = file
+        self.offset = offset
+        self.size = size
+        self.is_buffer = is_buffer
+        self._value = _UNREAD
+
+    def get(self) -> Any:
+        """Return the stored value (bytes for buffers)."""
+        if self._value is _UNREAD:
+            data = self.file.read(self)
+            self._value = data if self.is_buffer else json.loads(data)
+        return self._value
+
+    def evict(self):
+        """Forget the decoded value; the next ``get`` reads it from disk again."""
+        self._value = _UNREAD
+
+    def __repr__(self):
+        return f"<SpillRecord {self.size} bytes>"
+
+
+class SpillFile:
+    """
+    Append-only temporary file holding many small encoded values.
+
+    Unlike ``SpilledValue`` every value shares one file, so it can keep the
+    outputs of thousands of nodes without a file handle each. Space of
+    values that are no longer referenced is reclaimed by :meth:`compact`.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.size = 0  # Bytes written, referenced or not
+        self._file = None
+
+    def store(self, data, is_buffer: bool) -> SpillRecord:
+        """Append encoded JSON (or raw buffer) ``data`` and return its record."""
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(dir=self.directory)
+        self._file.seek(self.size)
+        size = self._file.write(data)
+        record = SpillRecord(self, self.size, size, is_buffer)
+        self.size += size
+        return record
+
+    def read(self, record: SpillRecord) -> bytes:
+        self._file.seek(record.offset)
+        return self._file.read(record.size)
+
+    def compact(self, records: list):
+        """Rewrite the file with only ``records`` once most of it is unreferenced."""
+        live = sum(record.size for record in records)
+        if self.size - live <= max(live, COMPACT_MIN_BYTES):
+            return
+        old = self._file
+        self._file = None
+        self.size = 0
+        try:
+            for record in records:
+                old.seek(record.offset)
+                record.offset = self.store(old.read(record.size), record.is_buffer).offset
+        finally:
+            old.close()
+
+    def close(self):
+        """Discard every stored value."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.size = 0
+
+
+def resolve_value(value: Any) -> Any:
+    """Return the real value behind a possibly spilled output."""
+    if isinstance(value, (SpilledValue, SpillRecord)):
+        return value.get()
+    return value
@@ -3,7 +3,7 @@
 from app.nodes.agent_node import AgentNode
 
     
-def test_agent_node_initialization():
+def test_agent_node_initialization(qapp):
 
     node = AgentNode()
     assert node.NODE_NAME == 'Agent'
@@ -12,7 +12,7 @@ def test_agent_node_initialization():
     assert node.get_property('internet_access') is True
 
     
-def test_agent_node_property_change():
+def test_agent_node_property_change(qapp):
 
     node = AgentNode()
     node.set_property('name', 'NewAgent')
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from app.headless import HeadlessAPINode
+from app.nodes import logic
+from app.response_cache import ResponseCache
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+class FakeClient:
+    """Answers generateContent and batchEmbedContents without a network."""
+
+    def __init__(self, pool_size=20, delay=0.0):
+        self.pool_size = pool_size
+        self.delay = delay
+        self.posts = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, json=None):
+        with self._lock:
+            self.posts.append((url, json))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if url.endswith(':batchEmbedContents?key=k'):
+                return FakeResponse({'embeddings': [
+                    {'values': [request['content']['parts'][0]['text']]} for request in json['requests']]})
+            return FakeResponse({'text': json['contents'][0]['parts'][0]['text'].upper()})
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def make_node(monkeypatch, tmp_path, client, batch_size):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    monkeypatch.setattr(logic, 'get_http_client', lambda: client)
+    monkeypatch.setattr(logic, 'get_response_cache', lambda: cache)
+    node = HeadlessAPINode()
+    node.set_property('batch_size', str(batch_size))
+    return node, cache
+
+
+def test_embed_batch_chunks_and_sends_only_cache_misses(monkeypatch, tmp_path):
+    client = FakeClient()
+    node, cache = make_node(monkeypatch, tmp_path, client, batch_size=2)
+
+    # Warm the cache with the middle prompt
+    node.process_batch(['b'], {}, 'text-embedding-004', 'https://api', 'k')
+    client.posts.clear()
+
+    embeddings = node.process_batch(['a', 'b', 'c', 'd'], {}, 'text-embedding-004', 'https://api', 'k')
+
+    assert embeddings == [{'values': [text]} for text in 'abcd']
+    sent = [[request['content']['parts'][0]['text'] for request in body['requests']]
+            for _, body in client.posts]
+    assert sent == [['a', 'c'], ['d']]
+    cache.close()
+
+
+def test_generation_batch_keeps_order_and_caps_concurrency(monkeypatch, tmp_path):
+    client = FakeClient(pool_size=3, delay=0.05)
+    node, cache = make_node(monkeypatch, tmp_path, client, batch_size=100)
+    prompts = [f'p{index}' for index in range(9)]
+
+    responses = node.process_batch(prompts, {}, 'gemini-pro', 'https://api', 'k')
+
+    assert responses == [{'text': prompt.upper()} for prompt in prompts]
+    assert len(client.posts) == 9
+    assert client.max_active <= 3
+    cache.close()
+
+
+def test_async_process_posts_on_the_event_loop(monkeypatch, tmp_path):
+    pytest.importorskip('aiohttp')
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+
+    from app.http_client import close_async_session, get_http_client
+
+    calls = []
+
+    async def generate(request):
+        body = await request.json()
+        calls.append(request.query['key'])
+        return web.json_response({'text': body['contents'][0]['parts'][0]['text'].upper()})
+
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    monkeypatch.setattr(logic, 'get_response_cache', lambda: cache)
+    node = HeadlessAPINode()
+    node.set_property('api_key', 'k')
+
+    async def scenario():
+        app = web.Application()
+        app.router.add_post('/models/gemini-pro:generateContent', generate)
+        server = TestServer(app)
+        await server.start_server()
+        node.set_property('endpoint', str(server.make_url('/models')))
+        try:
+            first = await node.async_process({'prompt': 'hi'})
+            second = await node.async_process({'prompt': 'hi'})
+        finally:
+            await close_async_session()
+            await server.close()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {'response': {'text': 'HI'}}
+    assert node.get_property('output_text') == json.dumps({'text': 'HI'}, indent=2)
+    # The second answer came from the cache
+    assert calls == ['k']
+    assert get_http_client().latency_stats()
+    cache.close()
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip('flask')
+
+import api_server  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_server, 'FLOW_PATH', str(tmp_path / 'flow.agflow'))
+    return api_server.app.test_client()
+
+
+def save(client, count):
+    nodes = [{'id': index, 'name': f'Node {index}', 'x': index, 'y': 0, 'color': 'red'}
+             for index in range(count)]
+    connections = [{'out': [index, 'output'], 'in': [index + 1, 'input']} for index in range(count - 1)]
+    return client.post('/api/save_flow', json={'nodes': nodes, 'connections': connections})
+
+
+def test_saved_flow_is_summarized_and_paged(client):
+    assert save(client, 5).get_json() == {'success': True}
+
+    summary = client.get('/api/flow_summary').get_json()
+    assert summary['nodes'] == 5
+    assert summary['connections'] == 4
+    assert summary['node_types'] == {api_server.WEB_NODE_TYPE: 5}
+
+    page = client.get('/api/load_flow?offset=1&limit=2').get_json()
+    assert page['nodes'] == [
+        {'id': '1', 'name': 'Node 1', 'x': 1, 'y': 0, 'color': 'red'},
+        {'id': '2', 'name': 'Node 2', 'x': 2, 'y': 0, 'color': 'red'},
+    ]
+    assert page['connections'] == [{'out': ['1', 'output'], 'in': ['2', 'input']},
+                                   {'out': ['2', 'output'], 'in': ['3', 'input']}]
+    assert (page['total_nodes'], page['total_connections']) == (5, 4)
+
+
+def test_invalid_and_missing_flows(client):
+    assert client.get('/api/flow_summary').status_code == 404
+    assert client.get('/api/load_flow').status_code == 404
+
+    response = client.post('/api/save_flow', json={'nodes': [{'name': 'no id'}]})
+    assert response.status_code == 400
+
+    # A connection to an unknown node is rejected and nothing is written
+    response = client.post('/api/save_flow', json={'nodes': [{'id': 1}],
+                                                   'connections': [{'out': [1, 'output'], 'in': [2, 'input']}]})
+    assert response.status_code == 400
+    assert client.get('/api/flow_summary').status_code == 404
+
+
+def test_corrupt_saved_flow_is_reported(client):
+    save(client, 3)
+    with open(api_server.FLOW_PATH, 'r+b') as f:
+        f.truncate(f.seek(0, 2) // 2)
+
+    for url in ('/api/flow_summary', '/api/load_flow'):
+        response = client.get(url)
+        assert response.status_code == 500
+        assert response.get_json()['success'] is False
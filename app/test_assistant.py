@@ -0,0 +1,67 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.assistant import Conversation, estimate_tokens
+from app.utils import make_text_response
+
+
+class EchoSSEHandler(BaseHTTPRequestHandler):
+    """Streams back the number of contents it received, in two chunks."""
+    requests = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.requests.append(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for text in ('got ', str(len(body['contents']))):
+            event = json.dumps(make_text_response(text))
+            self.wfile.write(f'data: {event}\r\n\r\n'.encode('utf-8'))
+            self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_history_is_sent_with_follow_ups():
+    conversation = Conversation()
+    conversation.add_exchange('What is a node?', 'A unit of work.')
+    contents = conversation.build_contents('And a flow?')
+
+    assert [item['role'] for item in contents] == ['user', 'model', 'user']
+    assert contents[-1]['parts'][0]['text'] == 'And a flow?'
+
+
+def test_old_turns_are_trimmed_into_a_bounded_summary():
+    conversation = Conversation(token_budget=100, summary_budget=60)
+    for i in range(20):
+        conversation.add_exchange(f'question {i} ' + 'x' * 100, f'answer {i}')
+
+    assert conversation.history_tokens() <= 100
+    assert conversation.turns[0][0] == 'user'
+    assert conversation.turns[-1][1] == 'answer 19'
+    assert sum(estimate_tokens(line) for line in conversation.summary_lines) <= 60
+    assert conversation.summary_lines[-1].startswith('Assistant: answer')
+
+    contents = conversation.build_contents('next')
+    assert contents[0]['parts'][0]['text'].startswith('Summary of our earlier conversation:')
+
+    conversation.clear()
+    assert len(conversation.build_contents('next')) == 1
+
+
+def test_stream_reply_streams_chunks_with_history():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoSSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conversation = Conversation()
+    conversation.add_exchange('hi', 'hello')
+    try:
+        endpoint = f'http://127.0.0.1:{server.server_port}/v1beta/models'
+        chunks = list(conversation.stream_reply('again', 'key', endpoint=endpoint))
+    finally:
+        server.shutdown()
+
+    assert chunks == ['got ', '3']
+    assert len(conversation.turns) == 2  # Recording the reply is up to the caller
@@ -0,0 +1,74 @@
+import logging
+
+from app.console_log import LogBuffer, filter_entries
+from app.flow_engine import FlowEngine
+from app.headless import HeadlessGraph, HeadlessNode, register_node
+
+
+@register_node
+class ChattyNode(HeadlessNode):
+    type_ = 'test.ChattyNode'
+    INPUTS = ()
+
+    def process(self, input_data):
+        for i in range(3):
+            self.logger.info(f"step {i}")
+        return {}
+
+
+def make_buffer(max_lines=100):
+    buffer = LogBuffer(max_lines)
+    buffer.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    logger = logging.getLogger('AgentricGUI.test')
+    logger.setLevel(logging.DEBUG)
+    return buffer, logger
+
+
+def test_ring_buffer_caps_lines_and_counts_dropped():
+    buffer, logger = make_buffer(max_lines=3)
+    logger.addHandler(buffer)
+    try:
+        for i in range(5):
+            logger.info(f"line {i}")
+    finally:
+        logger.removeHandler(buffer)
+
+    assert [entry.text for entry in buffer.snapshot()] == ['INFO line 2', 'INFO line 3', 'INFO line 4']
+    assert len(buffer.drain()) == 3
+    assert buffer.take_dropped() == 2
+    assert buffer.drain() == [] and buffer.take_dropped() == 0
+
+
+def test_unrelated_loggers_are_ignored():
+    buffer, _ = make_buffer()
+    other = logging.getLogger('urllib3.test')
+    other.addHandler(buffer)
+    try:
+        other.warning("noise")
+    finally:
+        other.removeHandler(buffer)
+    assert buffer.snapshot() == []
+
+
+def test_flow_records_are_tagged_with_their_node():
+    buffer, logger = make_buffer()
+    root = logging.getLogger()
+    root.addHandler(buffer)
+    previous_level = root.level
+    root.setLevel(logging.INFO)
+    try:
+        graph = HeadlessGraph()
+        graph.create_node('test.ChattyNode', name='Chatty')
+        graph.create_node('test.ChattyNode', name='Quiet')
+        assert FlowEngine(graph).run_flow(parallel=True)
+        logger.warning("done")
+    finally:
+        root.removeHandler(buffer)
+        root.setLevel(previous_level)
+
+    entries = buffer.drain()
+    assert filter_entries(entries, node='Chatty') == [
+        'INFO Processing node: Chatty', 'INFO step 0', 'INFO step 1', 'INFO step 2'
+    ]
+    assert filter_entries(entries, min_level=logging.WARNING) == ['WARNING done']
+    assert 'Chatty' in buffer.nodes
@@ -0,0 +1,511 @@
+import asyncio
+import gc
+import threading
+import time
+import weakref
+
+from app.flow_engine import CircularDependencyError, FlowEngine
+from app.tracing import FlowTracer
+
+
+class FakePort:
+    def __init__(self, node, name):
+        self.node = node
+        self._name = name
+        self.connections = []
+        self.required = False
+
+    def name(self):
+        return self._name
+
+    def connected_ports(self):
+        return self.connections
+
+
+class FakeNode:
+    def __init__(self, node_id, func=None, inputs=('input',)):
+        self.id = node_id
+        self.func = func or (lambda data: {'output': node_id})
+        self.properties = {}
+        self.inputs = [FakePort(self, name) for name in inputs]
+        self.output = FakePort(self, 'output')
+        self.calls = 0
+
+    def name(self):
+        return self.id
+
+    def input_ports(self):
+        return self.inputs
+
+    def process(self, input_data):
+        self.calls += 1
+        return self.func(input_data)
+
+    def fingerprint(self):
+        return {name: value for name, value in self.properties.items() if name != 'status'}
+
+    def set_property(self, name, value):
+        self.properties[name] = value
+
+    def get_property(self, name, default=None):
+        return self.properties.get(name, default)
+
+
+class FakeGraph:
+    def __init__(self, nodes):
+        self.nodes = {node.id: node for node in nodes}
+
+    def all_nodes(self):
+        return list(self.nodes.values())
+
+    def get_node_by_id(self, node_id):
+        return self.nodes[node_id]
+
+
+def connect(source, target, port=0):
+    target.inputs[port].connections.append(source.output)
+
+
+def build_fan_out(delay):
+    def slow(data):
+        time.sleep(delay)
+        return {'response': data}
+
+    prompt = FakeNode('prompt', inputs=())
+    apis = [FakeNode(f'api{i}', slow) for i in range(4)]
+    for api in apis:
+        connect(prompt, api)
+    return FakeGraph([prompt] + apis)
+
+
+def test_parallel_run_overlaps_independent_branches():
+    graph = build_fan_out(0.2)
+    engine = FlowEngine(graph, max_workers=4)
+
+    start = time.perf_counter()
+    assert engine.run_flow(parallel=True)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.6
+    assert engine.processed_nodes == set(graph.nodes)
+    assert graph.nodes['api3'].properties['status'] == 'success'
+
+
+def test_parallel_run_waits_for_all_dependencies():
+    seen = []
+    lock = threading.Lock()
+
+    def record(name):
+        def func(data):
+            with lock:
+                seen.append(name)
+            return name
+        return func
+
+    top = FakeNode('top', record('top'), inputs=())
+    left = FakeNode('left', record('left'))
+    right = FakeNode('right', record('right'))
+    join = FakeNode('join', lambda data: (data['a'], data['b']), inputs=('a', 'b'))
+    connect(top, left)
+    connect(top, right)
+    connect(left, join, 0)
+    connect(right, join, 1)
+    engine = FlowEngine(FakeGraph([join, right, left, top]))
+
+    assert engine.run_flow(parallel=True)
+    assert seen[0] == 'top'
+    assert join.properties['status'] == 'success'
+
+
+def test_parallel_run_reports_errors():
+    def boom(data):
+        raise RuntimeError('boom')
+
+    a = FakeNode('a', inputs=())
+    b = FakeNode('b', boom)
+    c = FakeNode('c')
+    connect(a, b)
+    connect(b, c)
+    engine = FlowEngine(FakeGraph([a, b, c]))
+
+    assert not engine.run_flow(parallel=True)
+    assert b.properties['status'] == 'error'
+    assert c.calls == 0
+
+
+def test_parallel_run_calls_fast_sync_nodes_on_the_loop_thread():
+    threads = []
+
+    def record(data):
+        threads.append(threading.get_ident())
+        return {}
+
+    nodes, graph = build_pipeline(record, record, record)
+    engine = FlowEngine(graph)
+    assert engine.run_flow(parallel=True)
+    assert threading.get_ident() not in threads
+
+    # Measured as cheaper than a thread hop, so the next run calls them directly
+    threads.clear()
+    assert engine.run_flow(parallel=True, force=True)
+    assert threads == [threading.get_ident()] * 3
+
+
+def test_async_process_is_awaited_concurrently():
+    class AsyncNode(FakeNode):
+        async def async_process(self, input_data):
+            self.calls += 1
+            await asyncio.sleep(0.2)
+            return {'response': self.id}
+
+    prompt = FakeNode('prompt', inputs=())
+    nodes = [AsyncNode(f'llm{i}') for i in range(50)]
+    for node in nodes:
+        connect(prompt, node)
+    # One worker thread is enough: async nodes never touch the pool
+    engine = FlowEngine(FakeGraph([prompt] + nodes), max_workers=1)
+
+    start = time.perf_counter()
+    assert asyncio.run(engine.run_flow_async(parallel=True))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.0
+    assert all(node.calls == 1 for node in nodes)
+
+
+def test_run_flow_passes_results_downstream():
+    a = FakeNode('a', lambda data: 1, inputs=())
+    b = FakeNode('b', lambda data: data['input'] + 1)
+    c = FakeNode('c', lambda data: data['input'] * 10)
+    connect(a, b)
+    connect(b, c)
+    engine = FlowEngine(FakeGraph([c, b, a]))
+
+    assert engine.run_flow()
+    assert engine.execution_order == ['a', 'b', 'c']
+    assert c.properties['status'] == 'success'
+
+
+def test_topological_sort_handles_deep_chains():
+    count = 20000
+    dependencies = {'n0': set()}
+    for i in range(1, count):
+        dependencies[f'n{i}'] = {f'n{i - 1}'}
+
+    order = FlowEngine(FakeGraph([])).topological_sort(dependencies)
+
+    assert order == [f'n{i}' for i in range(count)]
+
+
+def test_cycle_is_reported_with_node_path():
+    a = FakeNode('a')
+    b = FakeNode('b')
+    c = FakeNode('c')
+    start = FakeNode('start', inputs=())
+    connect(start, a)
+    connect(a, b)
+    connect(b, c)
+    b.inputs[0].connections.append(c.output)
+    engine = FlowEngine(FakeGraph([start, a, b, c]))
+
+    try:
+        engine.compile_plan()
+    except CircularDependencyError as e:
+        assert e.path in (['b', 'c', 'b'], ['c', 'b', 'c'])
+    else:
+        raise AssertionError('cycle not detected')
+    assert not engine.run_flow()
+
+
+def test_plan_is_cached_until_graph_signal():
+    class Signal:
+        def __init__(self):
+            self.slots = []
+
+        def connect(self, slot):
+            self.slots.append(slot)
+
+        def emit(self, *args):
+            for slot in self.slots:
+                slot(*args)
+
+    a = FakeNode('a', inputs=())
+    b = FakeNode('b')
+    graph = FakeGraph([a, b])
+    graph.port_connected = Signal()
+    engine = FlowEngine(graph)
+
+    first = engine.get_plan()
+    assert engine.run_flow()
+    assert engine.get_plan() is first
+    assert engine.collect_input_data('b', {'a': 1}) == {}
+
+    connect(a, b)
+    graph.port_connected.emit(b.inputs[0], a.output)
+    assert engine.get_plan() is not first
+    assert engine.collect_input_data('b', {'a': 1}) == {'input': 1}
+
+
+def test_graph_edits_during_a_run_do_not_change_its_plan():
+    seen = []
+
+    def edit_graph(data):
+        target.inputs[0].connections.clear()
+        engine.invalidate_plan()
+        return {'value': 1}
+
+    source = FakeNode('source', edit_graph, inputs=())
+    target = FakeNode('target', lambda data: seen.append(data) or {})
+    connect(source, target)
+    engine = FlowEngine(FakeGraph([source, target]))
+
+    assert engine.run_flow()
+    assert seen == [{'input': {'value': 1}}]
+
+
+def build_chain():
+    api = FakeNode('api', lambda data: {'response': 'hello'}, inputs=())
+    agent = FakeNode('agent', lambda data: data['input']['response'] + agent.properties.get('suffix', ''))
+    connect(api, agent)
+    return api, agent, FlowEngine(FakeGraph([api, agent]))
+
+
+def test_incremental_run_skips_unchanged_nodes():
+    api, agent, engine = build_chain()
+    assert engine.run_flow()
+    assert engine.run_flow(parallel=True)
+    assert (api.calls, agent.calls) == (1, 1)
+
+    agent.set_property('suffix', '!')
+    assert engine.run_flow()
+    assert (api.calls, agent.calls) == (1, 2)
+
+    api.set_property('model', 'other')
+    assert engine.run_flow(parallel=True)
+    assert (api.calls, agent.calls) == (2, 2)  # Same upstream output, agent stays clean
+
+
+def test_force_run_and_reset_rerun_everything():
+    api, agent, engine = build_chain()
+    assert engine.run_flow()
+    assert engine.run_flow(force=True)
+    assert (api.calls, agent.calls) == (2, 2)
+
+    engine.reset_flow()
+    assert engine.run_flow()
+    assert (api.calls, agent.calls) == (3, 3)
+
+
+def test_error_outputs_are_not_reused():
+    api = FakeNode('api', lambda data: {'error': 'quota'}, inputs=())
+    engine = FlowEngine(FakeGraph([api]))
+    assert engine.run_flow()
+    assert engine.run_flow()
+    assert api.calls == 2
+
+
+def test_streamed_chunks_reach_downstream_nodes():
+    class StreamingNode(FakeNode):
+        chunk_callback = None
+
+        def process(self, input_data):
+            for chunk in ('Hel', 'lo'):
+                self.chunk_callback(chunk)
+            return 'Hello'
+
+    class ListeningNode(FakeNode):
+        def receive_chunk(self, port_name, chunk):
+            received.append((port_name, chunk))
+
+    received = []
+    source = StreamingNode('source', inputs=())
+    sink = ListeningNode('sink')
+    connect(source, sink)
+    engine = FlowEngine(FakeGraph([source, sink]))
+
+    assert engine.run_flow(parallel=True)
+    assert received == [('input', 'Hel'), ('input', 'lo')]
+
+
+def test_tracer_records_spans_and_exports_chrome_trace():
+    def slow(data):
+        time.sleep(0.05)
+        return {'response': 'x' * 100}
+
+    a = FakeNode('a', slow, inputs=())
+    b = FakeNode('b')
+    connect(a, b)
+    tracer = FlowTracer()
+    engine = FlowEngine(FakeGraph([a, b]), tracer=tracer)
+
+    assert engine.run_flow(parallel=True)
+    rows = tracer.table_rows()
+    assert [row['node'] for row in rows] == ['a', 'b']
+    assert rows[0]['wall_ms'] >= 50
+    assert rows[0]['bytes_out'] == rows[1]['bytes_in'] > 100
+
+    events = tracer.to_chrome_trace()['traceEvents']
+    assert {event['ph'] for event in events} == {'X'}
+
+    assert engine.run_flow()
+    assert {row['status'] for row in tracer.table_rows()} == {'reused'}
+
+
+def test_tracer_off_records_nothing():
+    tracer = FlowTracer(enabled=False)
+    engine = FlowEngine(FakeGraph([FakeNode('a', inputs=())]), tracer=tracer)
+    assert engine.run_flow()
+    assert tracer.spans == []
+
+
+def build_pipeline(*funcs):
+    nodes = [FakeNode(f'n{i}', func, inputs=() if i == 0 else ('input',)) for i, func in enumerate(funcs)]
+    for source, target in zip(nodes, nodes[1:]):
+        connect(source, target)
+    return nodes, FakeGraph(nodes)
+
+
+def test_intermediate_outputs_are_freed_after_last_reader():
+    nodes, graph = build_pipeline(None, lambda data: {'len': len(data)}, lambda data: data)
+    engine = FlowEngine(graph)
+
+    assert engine.run_flow()
+    assert set(engine.results) == {'n2'}
+    assert engine.get_node_output('n2') == {'input': {'len': 1}}
+
+    engine.keep_intermediate = True
+    assert engine.run_flow(parallel=True, force=True)
+    assert set(engine.results) == {'n0', 'n1', 'n2'}
+
+
+def test_freed_outputs_are_still_reused_incrementally():
+    nodes, graph = build_pipeline(None, lambda data: data, lambda data: data)
+    engine = FlowEngine(graph)
+    assert engine.run_flow()
+
+    nodes[2].set_property('label', 'changed')
+    assert engine.run_flow()
+    assert [node.calls for node in nodes] == [1, 1, 2]
+    assert engine.get_node_output('n2') == {'input': {'input': {'output': 'n0'}}}
+
+
+def test_released_outputs_are_garbage_collected():
+    class Payload(dict):
+        pass
+
+    refs = []
+
+    def produce(data):
+        payload = Payload(text='x' * 1000)
+        refs.append(weakref.ref(payload))
+        return payload
+
+    nodes, graph = build_pipeline(produce, lambda data: {'len': len(data['input']['text'])})
+    engine = FlowEngine(graph)
+    assert engine.run_flow()
+    nodes[0].set_property('label', 'changed')
+    assert engine.run_flow(parallel=True)
+    gc.collect()
+    assert [ref() for ref in refs] == [None, None]
+
+    # The stored copy is still reused once the consumer changes
+    nodes[1].set_property('label', 'changed')
+    assert engine.run_flow()
+    assert [node.calls for node in nodes] == [2, 2]
+    assert engine.get_node_output('n1') == {'len': 1000}
+
+
+def test_large_outputs_spill_to_memory_mapped_files(tmp_path):
+    seen = {}
+
+    def consume(data):
+        seen['type'] = type(data['input'])
+        seen['bytes'] = bytes(data['input'][:4])
+        return {'size': len(data['input'])}
+
+    nodes, graph = build_pipeline(lambda data: b'\x01' * 4096, consume)
+    nodes[0].process = lambda data: b'\x01' * 4096
+    engine = FlowEngine(graph, spill_threshold=1024, spill_dir=str(tmp_path))
+    engine.keep_intermediate = True
+
+    assert engine.run_flow()
+    assert repr(engine.results['n0']) == '<SpilledValue 4096 bytes>'
+    assert seen == {'type': memoryview, 'bytes': b'\x01\x01\x01\x01'}
+    assert engine.get_node_output('n1') == {'size': 4096}
+
+
+def test_spilled_json_is_decoded_once_for_all_consumers(tmp_path):
+    seen = []
+    source = FakeNode('source', lambda data: {'text': 'x' * 4096}, inputs=())
+    readers = [FakeNode(f'reader{i}', lambda data: seen.append(data['input']) or {}) for i in range(2)]
+    for reader in readers:
+        connect(source, reader)
+    engine = FlowEngine(FakeGraph([source, *readers]), spill_threshold=1024, spill_dir=str(tmp_path))
+
+    assert engine.run_flow()
+    assert seen[0] == {'text': 'x' * 4096}
+    assert seen[0] is seen[1]
+
+
+def test_progress_callback_reports_node_events():
+    def broken(data):
+        raise RuntimeError('boom')
+
+    nodes, graph = build_pipeline(None, lambda data: data, broken)
+    engine = FlowEngine(graph)
+    events = []
+    engine.progress_callback = lambda event, node_id, detail: events.append((event, node_id, detail))
+
+    assert not engine.run_flow()
+    assert events == [
+        ('started', 'n0', None), ('finished', 'n0', None),
+        ('started', 'n1', None), ('finished', 'n1', None),
+        ('started', 'n2', None), ('failed', 'n2', 'boom'),
+    ]
+    assert nodes[2].get_property('status') == 'error'
+    assert nodes[2].get_property('error_message') == 'boom'
+
+
+def test_cancel_stops_parallel_run_without_waiting_for_nodes():
+    release = threading.Event()
+
+    def blocking(data):
+        release.wait(5)
+        return data
+
+    nodes, graph = build_pipeline(None, blocking, lambda data: data)
+    engine = FlowEngine(graph)
+    engine.progress_callback = (lambda event, node_id, detail:
+                                event == 'started' and node_id == 'n1' and engine.cancel())
+
+    start = time.perf_counter()
+    assert not engine.run_flow(parallel=True)
+    elapsed = time.perf_counter() - start
+    release.set()
+
+    assert engine.cancelled
+    assert elapsed < 1
+    assert nodes[1].get_property('status') == ''
+    assert nodes[2].calls == 0
+
+    # The next run starts fresh
+    engine.progress_callback = None
+    assert engine.run_flow(parallel=True)
+    assert not engine.cancelled
+
+
+def test_cancel_from_another_thread_stops_sequential_run():
+    release = threading.Event()
+    nodes, graph = build_pipeline(None, lambda data: release.wait(5) and data, lambda data: data)
+    engine = FlowEngine(graph)
+
+    threading.Timer(0.05, engine.cancel).start()
+    start = time.perf_counter()
+    assert not engine.run_flow()
+    elapsed = time.perf_counter() - start
+    release.set()
+
+    # The run does not wait for the node that was still running
+    assert engine.cancelled
+    assert elapsed < 1
+    assert [node.calls for node in nodes] == [1, 1, 0]
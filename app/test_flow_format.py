@@ -0,0 +1,147 @@
+import json
+
+import pytest
+
+from app.flow_engine import FlowEngine
+from app.flow_format import (BinaryFlow, FlowFormatError, HEADER, MAGIC, VERSION, load_flow,
+                             loads_flow, write_flow)
+from app.headless import HeadlessGraph
+from app.test_headless import SESSION
+import run_flow
+
+
+def make_session(count=3):
+    nodes = {
+        f'n{i}': {'type_': 'agentric.AgentNode', 'name': f'Agent {i}', 'pos': [float(i), 2.5],
+                  'custom': {'name': f'Agent {i}', 'role': 'General Assistant'}}
+        for i in range(count)
+    }
+    connections = [{'out': [f'n{i}', 'response'], 'in': [f'n{i + 1}', 'instruction']}
+                   for i in range(count - 1)]
+    return {'graph': {'layout_direction': 0}, 'nodes': nodes, 'connections': connections}
+
+
+@pytest.mark.parametrize('name', ['flow.agflow', 'flow.json'])
+def test_round_trip(tmp_path, name):
+    session = make_session()
+    path = str(tmp_path / name)
+    write_flow(path, session)
+
+    with load_flow(path) as flow:
+        assert flow.format == ('binary' if name.endswith('.agflow') else 'json')
+        assert flow.to_session() == session
+
+
+def test_binary_is_lazy_and_dedups_bodies(tmp_path):
+    session = make_session(100)
+    for node in session['nodes'].values():
+        node['custom'] = {'role': 'Same'}
+    path = str(tmp_path / 'flow.agflow')
+    write_flow(path, session)
+
+    with load_flow(path) as flow:
+        assert flow.summary() == {'format': 'binary', 'version': VERSION, 'nodes': 100,
+                                  'connections': 99, 'node_types': {'agentric.AgentNode': 100}}
+        node = flow.node(42)
+        assert (node.id, node.name, node.pos) == ('n42', 'Agent 42', [42.0, 2.5])
+        # Nothing else was decoded
+        assert sum(text is not None for text in flow._strings) == 3
+        # Shared bodies decode to separate dicts
+        node.properties['custom']['role'] = 'Changed'
+        assert flow.node(43).properties == {'custom': {'role': 'Same'}}
+
+    assert (tmp_path / 'flow.agflow').stat().st_size < len(json.dumps(session))
+
+
+def test_close_stops_open_iterators(tmp_path):
+    path = str(tmp_path / 'flow.agflow')
+    write_flow(path, make_session(5))
+
+    flow = load_flow(path)
+    nodes = flow.iter_nodes()
+    connections = flow.iter_connections()
+    assert next(nodes).id == 'n0'
+    assert next(connections).out_id == 'n0'
+    flow.close()
+    assert list(nodes) == [] and list(connections) == []
+
+
+def test_plain_nodegraphqt_session_loads(tmp_path):
+    session = make_session()
+    path = tmp_path / 'session.json'
+    path.write_text(json.dumps(session))
+
+    with load_flow(str(path)) as flow:
+        assert flow.version == 0
+        assert flow.to_session() == session
+
+
+def test_rejects_newer_versions_and_other_files(tmp_path):
+    data = bytearray(HEADER.pack(MAGIC, VERSION + 1, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0))
+    with pytest.raises(FlowFormatError):
+        BinaryFlow(bytes(data))
+    with pytest.raises(FlowFormatError):
+        loads_flow({'format': 'agentric-flow', 'version': VERSION + 1, 'nodes': []})
+
+    other = tmp_path / 'notes.txt'
+    other.write_text('not a flow')
+    with pytest.raises(FlowFormatError):
+        load_flow(str(other))
+
+
+def test_corrupt_binary_files_raise_flow_format_errors(tmp_path):
+    path = tmp_path / 'flow.agflow'
+    write_flow(str(path), make_session())
+    data = path.read_bytes()
+    header = HEADER.unpack_from(data)
+    nodes_offset, properties_offset, metadata_offset = header[7], header[9], header[10]
+
+    with pytest.raises(FlowFormatError):
+        BinaryFlow(data[:len(data) // 2])
+
+    # Undecodable property and metadata bytes
+    corrupt = bytearray(data)
+    corrupt[properties_offset] = corrupt[metadata_offset] = 0xff
+    flow = BinaryFlow(bytes(corrupt))
+    with pytest.raises(FlowFormatError):
+        list(flow.iter_nodes())
+    with pytest.raises(FlowFormatError):
+        flow.metadata()
+
+    # A node record whose id and type point past the string table
+    corrupt = bytearray(data)
+    corrupt[nodes_offset:nodes_offset + 8] = b'\xff\xff\xff\x00' * 2
+    flow = BinaryFlow(bytes(corrupt))
+    with pytest.raises(FlowFormatError):
+        flow.node(0)
+    with pytest.raises(FlowFormatError):
+        flow.summary()
+    with pytest.raises(FlowFormatError):
+        list(flow.iter_connections())
+
+    path.write_bytes(bytes(corrupt))
+    assert run_flow.main([str(path)]) == 1
+
+
+def test_unknown_connection_is_rejected_without_writing(tmp_path):
+    session = make_session()
+    session['connections'].append({'out': ['n0', 'response'], 'in': ['missing', 'instruction']})
+    path = tmp_path / 'flow.agflow'
+
+    with pytest.raises(FlowFormatError):
+        write_flow(str(path), session)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_headless_graph_runs_binary_flow(tmp_path, capsys):
+    path = str(tmp_path / 'flow.agflow')
+    write_flow(path, SESSION)
+
+    graph = HeadlessGraph.from_session_file(path)
+    engine = FlowEngine(graph)
+    assert engine.validate_connections()
+    assert engine.run_flow()
+    assert graph.get_node_by_name('Writer').get_property('status') == 'success'
+
+    assert run_flow.main([path, '--inspect']) == 0
+    assert json.loads(capsys.readouterr().out)['connections'] == 1
@@ -0,0 +1,72 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.http_client import HTTPClient
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep connections alive
+    connections = set()
+
+    def do_GET(self):
+        EchoHandler.connections.add(self.client_address)
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        # Streams two chunks with a pause, like a generation being produced
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', '4')
+        self.end_headers()
+        self.wfile.write(b'ab')
+        self.wfile.flush()
+        time.sleep(0.2)
+        self.wfile.write(b'cd')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connections_are_reused_and_latency_recorded():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f'127.0.0.1:{server.server_port}'
+    client = HTTPClient(pool_size=2)
+    try:
+        for _ in range(5):
+            assert client.get(f'http://{host}/').json() == {'ok': True}
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert len(EchoHandler.connections) == 1
+    stats = client.latency_stats()[host]
+    assert stats['count'] == 5
+    assert stats['errors'] == 0
+    assert stats['max_ms'] >= stats['avg_ms'] > 0
+
+
+def test_streamed_latency_includes_reading_the_body():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), EchoHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f'127.0.0.1:{server.server_port}'
+    client = HTTPClient()
+    try:
+        response = client.post(f'http://{host}/', stream=True)
+        assert host not in client.latency_stats()
+        assert b''.join(response.iter_content(1)) == b'abcd'
+        stats = client.latency_stats()[host]
+        assert stats['count'] == 1 and stats['max_ms'] >= 200
+
+        # Closing a stream without reading it also ends the measurement
+        client.post(f'http://{host}/', stream=True).close()
+        assert client.latency_stats()[host]['count'] == 2
+    finally:
+        client.close()
+        server.shutdown()
@@ -0,0 +1,61 @@
+import pytest
+
+
+@pytest.fixture
+def graph(qapp):
+    from NodeGraphQt import NodeGraph
+
+    from app.nodes.agent_node import AgentNode
+    from app.nodes.api_node import APINode
+    from app.nodes.base_node import BaseNode
+
+    graph = NodeGraph()
+    graph.register_nodes([AgentNode, APINode, BaseNode])
+    yield graph
+    graph.clear_session()
+    graph.widget.deleteLater()
+
+
+def render(graph):
+    from PyQt5.QtGui import QImage, QPainter
+
+    image = QImage(800, 600, QImage.Format_ARGB32)
+    painter = QPainter(image)
+    graph.scene().render(painter)
+    painter.end()
+
+
+@pytest.mark.parametrize('node_type, ports, widgets', [
+    ('agentric.AgentNode', (['instruction', 'context'], ['response', 'error']),
+     ['agent_type', 'internet_access', 'name', 'purpose', 'system_prompt']),
+    ('agentric.APINode', (['prompt', 'parameters'], ['response', 'error']),
+     ['api_name', 'batch_size', 'endpoint', 'model', 'output_text', 'refresh_models', 'stream', 'use_cache']),
+    ('agentric.BaseNode', (['input'], ['output']), []),
+])
+def test_nodes_paint_and_build_widgets_on_demand(graph, node_type, ports, widgets):
+    node = graph.create_node(node_type)
+    assert (list(node.inputs()), list(node.outputs())) == ports
+    assert [port.required for port in node.input_ports()] == [True] + [False] * (len(ports[0]) - 1)
+
+    # Painted without embedded widgets until they are needed
+    render(graph)
+    assert not node.view.widgets
+    node.build_widgets()
+    assert sorted(node.view.widgets) == widgets
+
+    node.apply_updates({'status': 'error', 'error_message': 'boom'})
+    assert node.view.status == 'error'
+    render(graph)
+
+
+def test_text_inputs_edit_node_properties(graph):
+    node = graph.create_node('agentric.AgentNode', name='Writer')
+    node.build_widgets()
+
+    node.view.get_widget('purpose').set_value('Summaries')
+    node.view.get_widget('purpose').on_value_changed()
+    assert node.get_property('purpose') == 'Summaries'
+
+    node.set_property('name', 'Editor')
+    assert node.name() == 'Editor'
+    assert node.fingerprint()['name'] == 'Editor'
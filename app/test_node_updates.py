@@ -0,0 +1,75 @@
+import threading
+
+from app.flow_engine import FlowEngine
+from app.headless import HeadlessGraph, HeadlessNode, register_node
+from app.node_updates import PropertyUpdates
+
+
+@register_node
+class PostingNode(HeadlessNode):
+    """Posts runtime property changes to a channel, like the desktop BaseNode."""
+    type_ = 'test.PostingNode'
+    channel = None
+
+    def set_property(self, name, value):
+        if name in self.RUNTIME_PROPERTIES and self.channel is not None:
+            self.channel.put(self, name, value)
+            return
+        super().set_property(name, value)
+
+    def process(self, input_data):
+        for i in range(5):
+            self.set_property('output_text', f"chunk {i}")
+        return {'value': len(input_data)}
+
+
+def test_latest_value_wins_per_node():
+    updates = PropertyUpdates()
+    updates.put('a', 'status', 'processing')
+    updates.put('b', 'status', 'processing')
+    updates.put('a', 'output_text', 'partial')
+    updates.put('a', 'status', 'success')
+    updates.put('a', 'output_text', 'done')
+
+    assert len(updates) == 2
+    assert updates.drain() == [('a', {'status': 'success', 'output_text': 'done'}),
+                               ('b', {'status': 'processing'})]
+    assert (updates.posted, updates.coalesced) == (5, 2)
+    assert updates.drain() == []
+
+
+def test_concurrent_posts_are_not_lost():
+    updates = PropertyUpdates()
+
+    def post(worker):
+        for i in range(1000):
+            updates.put(worker, 'progress', i)
+
+    threads = [threading.Thread(target=post, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert dict(updates.drain()) == {worker: {'progress': 999} for worker in range(8)}
+    assert updates.posted == 8000
+
+
+def test_flow_run_coalesces_status_and_output_changes():
+    graph = HeadlessGraph()
+    nodes = [graph.create_node('test.PostingNode') for _ in range(50)]
+    for upstream, downstream in zip(nodes, nodes[1:]):
+        graph.connect_ports(upstream.get_output('output'), downstream.get_input('input'))
+    nodes[0].get_input('input').required = False
+    updates = PropertyUpdates()
+    PostingNode.channel = updates
+    try:
+        assert FlowEngine(graph).run_flow(parallel=True)
+    finally:
+        PostingNode.channel = None
+
+    drained = updates.drain()
+    assert len(drained) == 50
+    assert all(changes == {'status': 'success', 'output_text': 'chunk 4'} for _, changes in drained)
+    # processing + success and five chunks per node, applied as two values each
+    assert updates.posted == 50 * 7
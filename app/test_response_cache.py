@@ -0,0 +1,102 @@
+import logging
+import time
+
+from app import response_cache
+from app.response_cache import ResponseCache, make_cache_key
+
+
+def test_key_depends_on_every_request_field():
+    key = make_cache_key('https://api', 'gemini-pro', 'hello', {'temperature': 0})
+    assert key == make_cache_key('https://api', 'gemini-pro', 'hello', {'temperature': 0})
+    assert key != make_cache_key('https://api', 'embedding-001', 'hello', {'temperature': 0})
+    assert key != make_cache_key('https://api', 'gemini-pro', 'hello', {'temperature': 1})
+
+
+def test_responses_survive_reopening(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResponseCache(path)
+    assert cache.get('k') is None
+    cache.put('k', {'candidates': [1, 2]})
+    cache.close()
+
+    reopened = ResponseCache(path)
+    assert reopened.get('k') == {'candidates': [1, 2]}
+    assert reopened.stats()['hits'] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttl=0.05)
+    cache.put('k', 'value')
+    time.sleep(0.1)
+    assert cache.get('k') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_bytes=25)
+    cache.put('a', 'x' * 8)
+    time.sleep(0.01)
+    cache.put('b', 'y' * 8)
+    time.sleep(0.01)
+    cache.get('a')
+    time.sleep(0.01)
+    cache.put('c', 'z' * 8)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'x' * 8
+    assert cache.get('c') == 'z' * 8
+
+
+def test_purge_clears_entries_and_counters(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    cache.put('k', 1)
+    cache.get('k')
+    cache.purge()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'entries': 0, 'bytes': 0}
+
+
+def test_hits_do_not_write_until_access_times_are_flushed(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResponseCache(path)
+    cache.put('k', 1)
+    changes = cache._conn.total_changes
+    time.sleep(0.01)
+    for _ in range(10):
+        assert cache.get('k') == 1
+    assert cache._conn.total_changes == changes
+    cache.close()
+
+    reopened = ResponseCache(path)
+    created, accessed = reopened._conn.execute('SELECT created, accessed FROM responses').fetchone()
+    assert accessed > created
+
+
+def test_running_size_total_matches_table(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_bytes=100)
+    for i in range(30):
+        cache.put(f'k{i % 12}', 'v' * i)
+        assert cache._bytes == cache.stats()['bytes'] <= 100
+
+
+def test_get_many_and_put_many_batch_requests(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    cache.put_many([('a', [1.0]), ('b', [2.0])])
+    changes = cache._conn.total_changes
+    assert cache.get_many(['a', 'missing', 'b', 'a']) == {'a': [1.0], 'b': [2.0]}
+    assert cache._conn.total_changes == changes
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'entries': 2, 'bytes': cache._bytes}
+
+
+def test_flow_runs_log_their_cache_use(tmp_path, monkeypatch, caplog):
+    from app.flow_engine import FlowEngine
+    from app.test_flow_engine import FakeGraph, FakeNode
+
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    monkeypatch.setattr(response_cache, '_cache', cache)
+    cache.put('a', 1)
+    graph = FakeGraph([FakeNode('n0', lambda data: cache.get_many(['a', 'b']), inputs=())])
+
+    with caplog.at_level(logging.INFO, logger='AgentricGUI.ResponseCache'):
+        assert FlowEngine(graph).run_flow()
+    assert 'Response cache: 1 hits, 1 misses (50% hit rate)' in caplog.messages
+    cache.close()
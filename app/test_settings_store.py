@@ -0,0 +1,74 @@
+import json
+import multiprocessing
+import threading
+
+from app import settings_store
+from app.settings_store import SettingsStore
+
+
+def bump(settings):
+    settings['count'] += 1
+
+
+def increment(path, times):
+    store = SettingsStore(path)
+    for _ in range(times):
+        store.update(bump)
+
+
+def test_missing_file_returns_defaults(tmp_path):
+    store = SettingsStore(str(tmp_path / 'settings.json'))
+    assert store.load() == {'api_key': '', 'experience_level': 'Novice'}
+
+
+def test_reads_are_cached_until_the_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'settings.json'
+    path.write_text(json.dumps({'api_key': 'a'}))
+    store = SettingsStore(str(path))
+    reads = []
+    real_load = json.load
+    monkeypatch.setattr(settings_store.json, 'load', lambda f: reads.append(1) or real_load(f))
+
+    assert store.load() == {'api_key': 'a'}
+    store.load()['api_key'] = 'mutated'  # Callers get copies
+    assert store.load() == {'api_key': 'a'}
+    assert len(reads) == 1
+
+    # Another writer replaces the file
+    SettingsStore(str(path)).save({'api_key': 'b'})
+    assert store.load() == {'api_key': 'b'}
+    assert len(reads) == 2
+
+
+def test_writes_are_atomic_and_leave_no_temp_files(tmp_path):
+    path = tmp_path / 'settings.json'
+    store = SettingsStore(str(path))
+    store.save({'api_key': 'a', 'installation_id': 'x'})
+    assert store.update({'api_key': 'b'}) == {'api_key': 'b', 'installation_id': 'x'}
+
+    assert json.loads(path.read_text()) == {'api_key': 'b', 'installation_id': 'x'}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['settings.json', 'settings.json.lock']
+
+
+def test_concurrent_updates_from_threads_are_serialized(tmp_path):
+    path = str(tmp_path / 'settings.json')
+    SettingsStore(path).save({'count': 0})
+    threads = [threading.Thread(target=increment, args=(path, 50)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert SettingsStore(path).load()['count'] == 200
+
+
+def test_concurrent_updates_from_processes_are_serialized(tmp_path):
+    path = str(tmp_path / 'settings.json')
+    SettingsStore(path).save({'count': 0})
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=increment, args=(path, 25)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(30)
+        assert process.exitcode == 0
+    assert SettingsStore(path).load()['count'] == 100
@@ -0,0 +1,38 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.utils import extract_response_text, make_text_response, stream_gemini_text
+
+
+class SSEHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for text in ('Hello', ', ', 'world'):
+            event = json.dumps(make_text_response(text))
+            self.wfile.write(f'data: {event}\r\n\r\n'.encode('utf-8'))
+            self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_extract_response_text_joins_parts():
+    data = {'candidates': [{'content': {'parts': [{'text': 'a'}, {'text': 'b'}]}}]}
+    assert extract_response_text(data) == 'ab'
+    assert extract_response_text({}) is None
+
+
+def test_stream_gemini_text_yields_chunks():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        endpoint = f'http://127.0.0.1:{server.server_port}/v1beta/models'
+        chunks = list(stream_gemini_text(endpoint, 'gemini-pro', 'key', {'contents': []}))
+    finally:
+        server.shutdown()
+
+    assert chunks == ['Hello', ', ', 'world']
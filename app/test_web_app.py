@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+pytest.importorskip('flask')
+
+import web_app  # noqa: E402
+
+
+@pytest.fixture
+def settings_path(tmp_path, monkeypatch):
+    path = tmp_path / 'settings.json'
+    monkeypatch.setenv('AGENTRIC_SETTINGS', str(path))
+    return path
+
+
+def test_save_settings_merges_into_existing_file(settings_path):
+    settings_path.write_text(json.dumps({'api_key': 'old', 'installation_id': 'abc'}))
+    client = web_app.app.test_client()
+
+    response = client.post('/api/save_settings', json={'api_key': 'new'})
+    assert response.status_code == 200
+    assert json.loads(settings_path.read_text()) == {'api_key': 'new', 'installation_id': 'abc'}
+
+
+@pytest.mark.parametrize('body', [[1, 2], 'text', None])
+def test_save_settings_rejects_non_object_bodies(settings_path, body):
+    settings_path.write_text(json.dumps({'installation_id': 'abc'}))
+    client = web_app.app.test_client()
+
+    response = client.post('/api/save_settings', data=json.dumps(body), content_type='application/json')
+    assert response.status_code == 400
+    assert json.loads(settings_path.read_text()) == {'installation_id': 'abc'}
@@ -0,0 +1,162 @@
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from app.http_client import thread_http_time
+
+
+class NodeSpan:
+    """Timing and size figures for one node in one run."""
+
+    __slots__ = ('node_id', 'name', 'node_type', 'queued', 'start', 'end', 'cpu',
+                 'http', 'bytes_in', 'bytes_out', 'status', 'thread_id')
+
+    def __init__(self, node_id: str, name: str, node_type: str, bytes_in: int = 0):
+        self.node_id = node_id
+        self.name = name
+        self.node_type = node_type
+        self.queued = time.perf_counter()  # When the node was handed to the scheduler
+        self.start = None
+        self.end = None
+        self.cpu = None  # Seconds of CPU on the executing thread (sync nodes only)
+        self.http = 0.0  # Seconds spent in the shared HTTP client
+        self.bytes_in = bytes_in
+        self.bytes_out = 0
+        self.status = 'running'
+        self.thread_id = None
+
+    def wrap(self, func: Callable[[dict], Any]) -> Callable[[dict], Any]:
+        """Return ``func`` instrumented to fill in this span on whichever thread runs it."""
+        def run(input_data):
+            self.thread_id = threading.get_ident()
+            http_start = thread_http_time()
+            cpu_start = time.thread_time()
+            self.start = time.perf_counter()
+            try:
+                return func(input_data)
+            finally:
+                self.end = time.perf_counter()
+                self.cpu = time.thread_time() - cpu_start
+                self.http = thread_http_time() - http_start
+        return run
+
+    async def run_async(self, coroutine):
+        """Await ``coroutine`` and record its wall time (CPU time is not isolated)."""
+        self.thread_id = threading.get_ident()
+        self.start = time.perf_counter()
+        try:
+            return await coroutine
+        finally:
+            self.end = time.perf_counter()
+
+    @property
+    def queue_wait(self) -> float:
+        return (self.start - self.queued) if self.start is not None else 0.0
+
+    @property
+    def wall(self) -> float:
+        return (self.end - self.start) if self.end is not None else 0.0
+
+
+class FlowTracer:
+    """
+    Collects per-node spans for the latest run.
+
+    Tracing costs a few clock reads per node. ``sample_rate`` traces only a
+    fraction of runs and ``enabled=False`` turns it off entirely.
+    """
+
+    def __init__(self, enabled: bool = True, sample_rate: float = 1.0):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.active = False  # Whether the current run is being traced
+        self.spans = []
+        self.run_start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool, sample_rate: float = 1.0):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+
+    def begin_run(self) -> bool:
+        """
+        Decide whether to trace the next run; clears the previous spans if so.
+
+        Called by FlowEngine only; other callers just add spans with
+        :meth:`open_span` to whichever run is current.
+        """
+        self.active = self.enabled and (self.sample_rate >= 1.0 or random.random() < self.sample_rate)
+        if self.active:
+            with self._lock:
+                self.spans = []
+            self.run_start = time.perf_counter()
+        return self.active
+
+    def open_span(self, node, bytes_in: int = 0) -> Optional[NodeSpan]:
+        """Start a span for ``node``, or return None when this run is not traced."""
+        if not self.active:
+            return None
+        span = NodeSpan(node.id, node.name(), type(node).__name__, bytes_in)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Convert the spans to Chrome trace-event format.
+
+        Load the result in chrome://tracing or https://ui.perfetto.dev.
+        """
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            args = {
+                'status': span.status,
+                'queue_wait_ms': round(span.queue_wait * 1000, 3),
+                'cpu_ms': round(span.cpu * 1000, 3) if span.cpu is not None else None,
+                'http_ms': round(span.http * 1000, 3),
+                'bytes_in': span.bytes_in,
+                'bytes_out': span.bytes_out
+            }
+            if span.start is None:
+                # Reused outputs and nodes that never started show as instants
+                events.append({'name': span.name, 'cat': span.node_type, 'ph': 'i', 's': 't',
+                               'ts': (span.queued - self.run_start) * 1e6,
+                               'pid': pid, 'tid': span.thread_id or 0, 'args': args})
+                continue
+            events.append({'name': span.name, 'cat': span.node_type, 'ph': 'X',
+                           'ts': (span.start - self.run_start) * 1e6,
+                           'dur': span.wall * 1e6,
+                           'pid': pid, 'tid': span.thread_id, 'args': args})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    def table_rows(self) -> List[dict]:
+        """Return one summary row per span, slowest first."""
+        rows = [{
+            'node': span.name,
+            'type': span.node_type,
+            'status': span.status,
+            'queue_ms': span.queue_wait * 1000,
+            'wall_ms': span.wall * 1000,
+            'cpu_ms': span.cpu * 1000 if span.cpu is not None else 0.0,
+            'http_ms': span.http * 1000,
+            'bytes_in': span.bytes_in,
+            'bytes_out': span.bytes_out
+        } for span in self.spans]
+        rows.sort(key=lambda row: row['wall_ms'], reverse=True)
+        return rows
+
+
+_tracer = FlowTracer()
+
+
+def get_tracer() -> FlowTracer:
+    """Return the process-wide tracer shared by FlowEngine and BaseNode.execute."""
+    return _tracer
@@ -1,20 +1,80 @@
-import requests
 import json
 import logging
+from typing import Iterator, Optional
+from app.http_client import get_http_client
+from app.response_cache import get_response_cache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
-def call_gemini_assistant(prompt: str, graph=None) -> str:
+GEMINI_ENDPOINT = "https://generativelanguage.googleapis.com/v1beta/models"
+GEMINI_MODEL = "gemini-pro"
+
+def extract_response_text(data: dict) -> Optional[str]:
+    """
+    Extract the generated text from a Gemini generateContent response.
+    
+    Args:
+        data (dict): Parsed JSON response (or one streamed chunk of it)
+        
+    Returns:
+        str: Concatenated text parts of the first candidate, or None
+    """
+    candidates = data.get('candidates') or []
+    if not candidates:
+        return None
+    parts = candidates[0].get('content', {}).get('parts') or []
+    texts = [part['text'] for part in parts if 'text' in part]
+    return ''.join(texts) if texts else None
+
+def make_text_response(text: str) -> dict:
+    """Build a generateContent-shaped response around text assembled from a stream."""
+    return {
+        "candidates": [{
+            "content": {
+                "parts": [{"text": text}],
+                "role": "model"
+            }
+        }]
+    }
+
+def stream_gemini_text(endpoint: str, model: str, api_key: str, payload: dict) -> Iterator[str]:
+    """
+    Call streamGenerateContent and yield text chunks as they arrive.
+    
+    Args:
+        endpoint (str): Base models URL
+        model (str): Model name
+        api_key (str): Gemini API key
+        payload (dict): Request body, as for generateContent
+        
+    Yields:
+        str: Partial response text
+    """
+    url = f"{endpoint}/{model}:streamGenerateContent?alt=sse&key={api_key}"
+    with get_http_client().post(url, json=payload, stream=True) as response:
+        response.raise_for_status()
+        # Server-sent events: one 'data: {json}' line per chunk
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith('data:'):
+                continue
+            text = extract_response_text(json.loads(line[len('data:'):]))
+            if text:
+                yield text
+
+def call_gemini_assistant(prompt: str, graph=None, use_cache: bool = True) -> str:
     """
     Call the Gemini API with a prompt.
     
     Args:
         prompt (str): The user's input prompt
         graph: Optional node graph reference
+        use_cache (bool): Serve identical prompts from the response cache
         
     Returns:
         str: The assistant's response
     """
+    import requests
+
     try:
         # Get API key from main window if graph is provided
         api_key = None
@@ -26,7 +86,7 @@ def call_gemini_assistant(prompt: str, graph=None) -> str:
         if not api_key:
             return "Error: API key not set in settings"
 
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={api_key}"
+        url = f"{GEMINI_ENDPOINT}/{GEMINI_MODEL}:generateContent?key={api_key}"
         
         payload = {
             "contents": [{
@@ -36,18 +96,21 @@ def call_gemini_assistant(prompt: str, graph=None) -> str:
             }]
         }
 
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
-        data = response.json()
+        cache_key = make_cache_key(GEMINI_ENDPOINT, GEMINI_MODEL, prompt)
+        data = get_response_cache().get(cache_key) if use_cache else None
+
+        if data is None:
+            response = get_http_client().post(url, json=payload)
+            response.raise_for_status()
+            
+            data = response.json()
+            if use_cache:
+                get_response_cache().put(cache_key, data)
         
         # Extract the response text from Gemini's response
-        if 'candidates' in data and len(data['candidates']) > 0:
-            candidate = data['candidates'][0]
-            if 'content' in candidate and 'parts' in candidate['content']:
-                parts = candidate['content']['parts']
-                if len(parts) > 0 and 'text' in parts[0]:
-                    return parts[0]['text']
+        text = extract_response_text(data)
+        if text:
+            return text
         
         return "No valid response received from Gemini"
 
@@ -0,0 +1,171 @@
+"""
+Measure node canvas frame times.
+
+Fills a NodeGraph with a grid of Agent and API nodes (chained by their
+response -> instruction/prompt ports) on an offscreen Qt platform, then
+times synchronous repaints of the viewer while it follows scripted camera
+moves:
+
+    overview  whole canvas in view, drifting slowly
+    pan       100% zoom, panning across the grid
+    zoom      zooming from the overview in to 120% and back out
+
+Each frame includes one round of event processing, so widgets that nodes
+build on demand when zoomed in are counted in the frame that built them.
+``--eager-widgets`` builds every node's widgets up front, which is how
+nodes rendered before they painted their status and Execute button.
+
+    python -m benchmarks.bench_canvas --nodes 1000 --output before.json
+    python -m benchmarks.bench_canvas --nodes 1000 --compare before.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+SCENARIOS = ('overview', 'pan', 'zoom')
+NODE_SPACING = (320.0, 240.0)
+VIEW_SIZE = (1600, 900)
+
+
+def build_canvas(graph, count: int):
+    """Create ``count`` nodes in a grid, each feeding the next one in its row."""
+    columns = max(1, math.ceil(math.sqrt(count)))
+    nodes = []
+    for index in range(count):
+        row, column = divmod(index, columns)
+        node_type = 'agentric.AgentNode' if index % 2 == 0 else 'agentric.APINode'
+        node = graph.create_node(node_type, selected=False, push_undo=False,
+                                 pos=[column * NODE_SPACING[0], row * NODE_SPACING[1]])
+        if column:
+            previous = nodes[-1]
+            target = 'instruction' if node_type == 'agentric.AgentNode' else 'prompt'
+            previous.get_output('response').connect_to(node.get_input(target))
+        nodes.append(node)
+    return nodes, columns
+
+
+def camera_path(scenario: str, frames: int, columns: int, rows: int, view_width: float):
+    """Yield (scale, centre x, centre y) for each frame of ``scenario``."""
+    width, height = columns * NODE_SPACING[0], rows * NODE_SPACING[1]
+    overview = min(1.0, view_width / max(width, 1.0))
+    for frame in range(frames):
+        t = frame / max(frames - 1, 1)
+        if scenario == 'overview':
+            yield overview, width / 2 + t * NODE_SPACING[0], height / 2
+        elif scenario == 'pan':
+            yield 1.0, t * width, height / 2
+        else:
+            # Out -> in -> out, geometric so every zoom level gets equal time
+            depth = 1.0 - abs(2 * t - 1.0)
+            yield overview * (1.2 / overview) ** depth, width / 2, height / 2
+
+
+def measure(app, viewer, path) -> list:
+    frame_times = []
+    viewport = viewer.viewport()
+    for scale, x, y in path:
+        # The viewer fits its scene rect into the viewport, so the rect is the camera
+        width, height = viewport.width() / scale, viewport.height() / scale
+        viewer.set_scene_rect([x - width / 2, y - height / 2, width, height])
+        start = time.perf_counter()
+        app.processEvents()
+        viewer.viewport().repaint()
+        frame_times.append(time.perf_counter() - start)
+    return frame_times
+
+
+def summarize(frame_times: list) -> dict:
+    ordered = sorted(frame_times)
+    median = statistics.median(ordered)
+    return {
+        'median': median,
+        'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'max': ordered[-1],
+        'fps': 1.0 / median if median else float('inf'),
+    }
+
+
+def compare(current: dict, baseline: dict):
+    """Print the median and p95 ratio current/baseline for every scenario."""
+    print(f"{'scenario':<12}{'stat':<8}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for scenario, result in current['scenarios'].items():
+        if scenario not in baseline['scenarios']:
+            continue
+        for stat in ('median', 'p95'):
+            before = baseline['scenarios'][scenario][stat]
+            after = result[stat]
+            ratio = after / before if before else float('inf')
+            print(f"{scenario:<12}{stat:<8}{before * 1000:>10.2f}ms{after * 1000:>10.2f}ms{ratio:>8.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure node canvas frame times.")
+    parser.add_argument('--nodes', type=int, default=1000, help="Nodes on the canvas")
+    parser.add_argument('--frames', type=int, default=120, help="Frames per scenario")
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument('--eager-widgets', action='store_true',
+                        help="Build every node's embedded widgets before measuring")
+    parser.add_argument('--output', help="Write JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    from NodeGraphQt import NodeGraph
+    from app.nodes import AgentNode, APINode
+    from benchmarks.bench_flow_engine import git_revision
+
+    graph = NodeGraph()
+    graph.register_node(AgentNode)
+    graph.register_node(APINode)
+    viewer = graph.viewer()
+    viewer.resize(*VIEW_SIZE)
+    viewer.show()
+
+    start = time.perf_counter()
+    nodes, columns = build_canvas(graph, args.nodes)
+    create_time = time.perf_counter() - start
+    if args.eager_widgets:
+        for node in nodes:
+            node.view.build_widgets()
+    app.processEvents()
+    rows = math.ceil(len(nodes) / columns)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'args': vars(args),
+        },
+        'create_s': create_time,
+        'scenarios': {}
+    }
+    for scenario in args.scenarios:
+        path = camera_path(scenario, args.frames, columns, rows, viewer.viewport().width())
+        report['scenarios'][scenario] = summarize(measure(app, viewer, path))
+    report['widgets_built'] = sum(node.view.widget_builder is None for node in nodes)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Benchmark FlowEngine on synthetic graphs.
+
+Builds chains, wide fan-outs, diamonds and random DAGs out of mock headless
+nodes with configurable CPU cost and simulated I/O latency, then times
+planning, validation and execution separately. Runs offline and without a
+display.
+
+    python -m benchmarks.bench_flow_engine --sizes 10 1000 --output before.json
+    python -m benchmarks.bench_flow_engine --sizes 10 1000 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from app.flow_engine import FlowEngine
+from app.headless import HeadlessGraph, HeadlessNode, register_node
+
+SHAPES = ('chain', 'fanout', 'diamond', 'random')
+MODES = ('sequential', 'parallel')
+
+
+@register_node
+class MockNode(HeadlessNode):
+    """Node that burns ``cpu_cost`` seconds of CPU then waits ``io_latency`` seconds."""
+    type_ = 'bench.MockNode'
+    NODE_NAME = 'Mock'
+    INPUTS = ()
+    PROPERTIES = {'cpu_cost': 0.0, 'io_latency': 0.0}
+
+    def process(self, input_data: dict) -> dict:
+        deadline = time.perf_counter() + self.get_property('cpu_cost')
+        while time.perf_counter() < deadline:
+            pass
+        if self.get_property('io_latency'):
+            time.sleep(self.get_property('io_latency'))
+        return {'value': len(input_data)}
+
+
+@register_node
+class AsyncMockNode(MockNode):
+    """Mock node whose simulated I/O is awaited instead of blocking a thread."""
+    type_ = 'bench.AsyncMockNode'
+
+    async def async_process(self, input_data: dict) -> dict:
+        deadline = time.perf_counter() + self.get_property('cpu_cost')
+        while time.perf_counter() < deadline:
+            pass
+        if self.get_property('io_latency'):
+            await asyncio.sleep(self.get_property('io_latency'))
+        return {'value': len(input_data)}
+
+
+def connect(graph: HeadlessGraph, source: MockNode, target: MockNode):
+    """Connect ``source`` to a fresh input port on ``target``."""
+    in_port = target.add_input(f'in{len(target.input_ports())}', required=True)
+    graph.connect_ports(source.get_output('output'), in_port)
+
+
+def build_graph(shape: str, size: int, cpu_cost: float = 0.0, io_latency: float = 0.0,
+                async_io: bool = False, seed: int = 0) -> HeadlessGraph:
+    """
+    Build a synthetic graph of ``size`` mock nodes.
+
+    Args:
+        shape (str): 'chain', 'fanout' (one source feeding every other node),
+            'diamond' (repeated split/join pairs) or 'random' (seeded DAG with
+            up to three parents per node)
+        size (int): Number of nodes
+        cpu_cost (float): Seconds of busy work per node
+        io_latency (float): Seconds of simulated I/O per node
+        async_io (bool): Use ``async_process`` for the simulated I/O
+        seed (int): Seed for the random DAG
+
+    Returns:
+        HeadlessGraph: The generated graph
+    """
+    graph = HeadlessGraph()
+    node_type = 'bench.AsyncMockNode' if async_io else 'bench.MockNode'
+    properties = {'cpu_cost': cpu_cost, 'io_latency': io_latency}
+    nodes = [graph.create_node(node_type, name=f'n{i}', properties=properties) for i in range(size)]
+
+    if shape == 'chain':
+        for source, target in zip(nodes, nodes[1:]):
+            connect(graph, source, target)
+    elif shape == 'fanout':
+        for target in nodes[1:]:
+            connect(graph, nodes[0], target)
+    elif shape == 'diamond':
+        # top -> (left, right) -> join, where each join is the next top
+        for i in range(0, size - 3, 3):
+            top, left, right, join = nodes[i:i + 4]
+            connect(graph, top, left)
+            connect(graph, top, right)
+            connect(graph, left, join)
+            connect(graph, right, join)
+    elif shape == 'random':
+        rng = random.Random(seed)
+        for i in range(1, size):
+            for parent in rng.sample(range(i), min(i, rng.randint(1, 3))):
+                connect(graph, nodes[parent], nodes[i])
+    else:
+        raise ValueError(f"Unknown shape: {shape}")
+    return graph
+
+
+def time_call(func, repeat: int) -> dict:
+    """Run ``func`` ``repeat`` times and return min/median wall times in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return {'min': min(samples), 'median': statistics.median(samples)}
+
+
+def bench_case(shape: str, size: int, mode: str, args) -> dict:
+    graph = build_graph(shape, size, args.cpu_cost, args.io_latency, args.async_io)
+    engine = FlowEngine(graph, max_workers=args.workers)
+
+    def plan():
+        engine.invalidate_plan()
+        engine.get_plan()
+
+    def execute():
+        if not engine.run_flow(parallel=(mode == 'parallel'), force=True):
+            raise RuntimeError(f"Flow failed: {shape}/{size}/{mode}")
+
+    def rerun():
+        engine.run_flow(parallel=(mode == 'parallel'))
+
+    result = {
+        'shape': shape,
+        'nodes': size,
+        'mode': mode,
+        'plan': time_call(plan, args.repeat),
+        'validate': time_call(engine.validate_connections, args.repeat),
+        'execute': time_call(execute, args.repeat),
+        # Unchanged graph: cached plan and every node clean
+        'rerun_clean': time_call(rerun, args.repeat),
+    }
+    result['execute']['per_node_us'] = result['execute']['median'] / size * 1e6
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(current: dict, baseline: dict):
+    """Print the median ratio current/baseline for every shared measurement."""
+    previous = {(r['shape'], r['nodes'], r['mode']): r for r in baseline['results']}
+    print(f"{'case':<28}{'phase':<13}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for result in current['results']:
+        key = (result['shape'], result['nodes'], result['mode'])
+        if key not in previous:
+            continue
+        for phase in ('plan', 'validate', 'execute', 'rerun_clean'):
+            if phase not in previous[key]:
+                continue
+            before = previous[key][phase]['median']
+            after = result[phase]['median']
+            ratio = after / before if before else float('inf')
+            case = '/'.join(str(part) for part in key)
+            print(f"{case:<28}{phase:<13}{before * 1000:>10.2f}ms{after * 1000:>10.2f}ms{ratio:>8.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark FlowEngine on synthetic graphs.")
+    parser.add_argument('--shapes', nargs='+', default=list(SHAPES), choices=SHAPES)
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000, 10000],
+                        help="Node counts (up to 100000)")
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--cpu-cost', type=float, default=0.0, help="Seconds of CPU work per node")
+    parser.add_argument('--io-latency', type=float, default=0.0, help="Seconds of simulated I/O per node")
+    parser.add_argument('--async-io', action='store_true', help="Simulate I/O with async_process")
+    parser.add_argument('--workers', type=int, default=8, help="Thread pool size for parallel runs")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed repetitions per phase")
+    parser.add_argument('--output', help="Write JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    args = parser.parse_args(argv)
+
+    # Per-node INFO logging would dominate the measurements
+    logging.basicConfig(level=logging.WARNING)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'args': vars(args),
+        },
+        'results': []
+    }
+    for shape in args.shapes:
+        for size in args.sizes:
+            for mode in args.modes:
+                report['results'].append(bench_case(shape, size, mode, args))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
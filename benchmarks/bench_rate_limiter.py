@@ -0,0 +1,113 @@
+"""
+Micro-benchmark the proxy's per-installation rate limiter.
+
+For each population of active installations, fills the limiter and then
+times requests from randomly chosen installations, reporting nanoseconds
+per check and the limiter's traced memory. The list-of-timestamps
+limiter the proxy used before is measured alongside for comparison
+(``--no-legacy`` skips it; it is slow at high limits).
+
+    python -m benchmarks.bench_rate_limiter --installations 1000 10000 100000
+    python -m benchmarks.bench_rate_limiter --limit 1000 --output after.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'AgentricGUI-Server'))
+
+from rate_limiter import RateLimiter, Tier  # noqa: E402
+
+
+class LegacyLimiter:
+    """The previous proxy limiter: a list of datetimes per installation, rebuilt per request."""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.request_counts = {}
+
+    def allow(self, key: str) -> bool:
+        now = datetime.datetime.now()
+        if key not in self.request_counts:
+            self.request_counts[key] = []
+        self.request_counts[key] = [ts for ts in self.request_counts[key]
+                                    if (now - ts).total_seconds() < self.window]
+        if len(self.request_counts[key]) >= self.limit:
+            return False
+        self.request_counts[key].append(now)
+        return True
+
+
+def bench(make, keys: list, requests: int, seed: int = 0) -> dict:
+    tracemalloc.start()
+    limiter = make()
+    for key in keys:
+        limiter.allow(key)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    rng = random.Random(seed)
+    picks = [rng.choice(keys) for _ in range(requests)]
+    allow = limiter.allow
+    start = time.perf_counter()
+    for key in picks:
+        allow(key)
+    elapsed = time.perf_counter() - start
+    return {'ns_per_request': elapsed / requests * 1e9, 'memory_bytes': memory,
+            'bytes_per_installation': memory / len(keys)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark the proxy rate limiter.")
+    parser.add_argument('--installations', nargs='+', type=int, default=[1000, 10000, 100000])
+    parser.add_argument('--requests', type=int, default=200000, help="Timed checks per case")
+    parser.add_argument('--limit', type=int, default=10, help="Requests allowed per window")
+    parser.add_argument('--window', type=float, default=60.0, help="Window in seconds")
+    parser.add_argument('--no-legacy', action='store_true', help="Skip the previous list-based limiter")
+    parser.add_argument('--output', help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    from benchmarks.bench_flow_engine import git_revision
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'args': vars(args),
+        },
+        'results': []
+    }
+    limiters = {'token_bucket': lambda: RateLimiter({'default': Tier(args.limit, args.window)})}
+    if not args.no_legacy:
+        limiters['legacy'] = lambda: LegacyLimiter(args.limit, args.window)
+
+    for count in args.installations:
+        keys = [f'installation-{i:08d}' for i in range(count)]
+        for name, make in limiters.items():
+            result = bench(make, keys, args.requests)
+            result.update(limiter=name, installations=count)
+            report['results'].append(result)
+            print(f"{name:<14}{count:>9} installations {result['ns_per_request']:>9.0f} ns/request "
+                  f"{result['bytes_per_installation']:>7.0f} B/installation", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
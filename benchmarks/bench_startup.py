@@ -0,0 +1,143 @@
+"""
+Measure desktop app cold start.
+
+Each run is a fresh interpreter (so imports are really cold) that times
+the startup phases of the main window on an offscreen Qt platform, with
+settings and the response cache in a temp directory:
+
+    qt        import PyQt5 and create the QApplication
+    login     import main.py (what runs before the login dialog)
+    import    import app.main_window
+    window    MainWindow() - NodeGraphQt, node classes, settings, graph and widgets
+    shown     show() and the first round of event processing
+
+    python -m benchmarks.bench_startup --runs 10 --output before.json
+    python -m benchmarks.bench_startup --runs 10 --compare before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PHASES = ('qt', 'login', 'import', 'window', 'shown', 'total')
+
+# Modules that should stay off the startup path; reported if they get imported
+DEFERRED_MODULES = ('requests', 'urllib3', 'sqlite3', 'app.flow_format')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_child():
+    """Time one cold start in this process and print the phases as JSON."""
+    start = time.perf_counter()
+    marks = {}
+
+    from PyQt5.QtWidgets import QApplication
+    qt_app = QApplication(sys.argv[:1])
+    marks['qt'] = time.perf_counter()
+
+    import main  # noqa: F401
+    marks['login'] = time.perf_counter()
+
+    from app.main_window import MainWindow
+    marks['import'] = time.perf_counter()
+
+    window = MainWindow()
+    marks['window'] = time.perf_counter()
+
+    window.show()
+    qt_app.processEvents()
+    marks['shown'] = time.perf_counter()
+
+    phases, previous = {}, start
+    for phase in PHASES[:-1]:
+        phases[phase] = marks[phase] - previous
+        previous = marks[phase]
+    phases['total'] = marks['shown'] - start
+    json.dump({'phases': phases,
+               'deferred_loaded': [name for name in DEFERRED_MODULES if name in sys.modules]},
+              sys.stdout)
+    window.close()
+
+
+def run_once(workdir: str) -> dict:
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    env['AGENTRIC_SETTINGS'] = os.path.join(workdir, 'settings.json')
+    env['AGENTRIC_CACHE_PATH'] = os.path.join(workdir, 'response_cache.db')
+    child = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child'],
+                           cwd=REPO_ROOT, env=env, capture_output=True, text=True)
+    if child.returncode != 0:
+        raise RuntimeError(f"Startup run failed:\n{child.stderr[-2000:]}")
+    # Qt and NodeGraphQt may print warnings before the JSON line
+    return json.loads(child.stdout[child.stdout.rindex('{"phases"'):])
+
+
+def compare(current: dict, baseline: dict):
+    """Print the median ratio current/baseline for every phase."""
+    print(f"{'phase':<10}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    for phase in PHASES:
+        if phase not in baseline['phases']:
+            continue
+        before = baseline['phases'][phase]['median']
+        after = current['phases'][phase]['median']
+        ratio = after / before if before else float('inf')
+        print(f"{phase:<10}{before * 1000:>10.1f}ms{after * 1000:>10.1f}ms{ratio:>8.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure desktop app cold start.")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreter runs to time")
+    parser.add_argument('--output', help="Write JSON results to this file instead of stdout")
+    parser.add_argument('--compare', help="Baseline JSON file to compare against")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        measure_child()
+        return 0
+
+    # Imported here so the child's cold start does not include the flow engine
+    from benchmarks.bench_flow_engine import git_revision
+
+    samples = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for _ in range(args.runs):
+            samples.append(run_once(workdir))
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': sys.version.split()[0],
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'runs': args.runs,
+        },
+        'phases': {
+            phase: {
+                'min': min(sample['phases'][phase] for sample in samples),
+                'median': statistics.median(sample['phases'][phase] for sample in samples)
+            }
+            for phase in PHASES
+        },
+        'deferred_loaded': sorted({name for sample in samples for name in sample['deferred_loaded']})
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    elif not args.compare:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Load-test the asynchronous Gemini proxy against a local stub upstream.
+
+Starts a stub generateContent endpoint that answers every request after
+``--upstream-delay`` seconds, starts ``AgentricGUI-Server/async_server.py``
+pointed at it, then fires ``--requests`` requests at the proxy at once,
+each from its own installation so rate limiting stays out of the way.
+``--prompts`` makes requests share prompts, exercising the response cache
+and request coalescing. Reports status counts, latency percentiles and the proxy's CPU time and
+peak memory.
+Requires aiohttp.
+
+    python -m benchmarks.load_proxy --requests 4000 --upstream-delay 2
+    python -m benchmarks.load_proxy --requests 6000 --max-in-flight 4096  # shows 503 backpressure
+    python -m benchmarks.load_proxy --requests 4000 --prompts 20  # shows caching and coalescing
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows has no rlimits
+    resource = None
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, web
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'AgentricGUI-Server')
+
+
+def raise_open_file_limit():
+    """Lift the soft fd limit to the hard one, where the platform has limits."""
+    if resource is None:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve_stub_upstream(port: int, delay: float):
+    """Run a generateContent look-alike that takes ``delay`` seconds per request."""
+    async def generate(request):
+        await request.read()
+        await asyncio.sleep(delay)
+        return web.json_response({'candidates': [{'content': {'parts': [{'text': 'stub'}]}}]})
+
+    async def ready(request):
+        return web.json_response({'status': 'success'})
+
+    app = web.Application()
+    app.router.add_post('/generate', generate)
+    app.router.add_get('/ready', ready)
+    raise_open_file_limit()
+    web.run_app(app, host='127.0.0.1', port=port, backlog=8192, access_log=None, print=None)
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{process.args} exited with {process.returncode}")
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} not ready after {timeout} s")
+
+
+async def fire(url: str, count: int, timeout: float, prompts: int = 0) -> dict:
+    statuses = collections.Counter()
+    latencies = []
+
+    async def one(session, i):
+        start = time.perf_counter()
+        try:
+            prompt = f'Summarise flow {i % prompts if prompts else i}'
+            async with session.post(url, json={'prompt': prompt, 'installation_id': f'load-{i:06d}'}) as response:
+                await response.read()
+                statuses[response.status] += 1
+        except Exception as e:
+            statuses[type(e).__name__] += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    connector = TCPConnector(limit=0, force_close=True)
+    async with ClientSession(connector=connector, timeout=ClientTimeout(total=timeout)) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(session, i) for i in range(count)))
+        wall = time.perf_counter() - start
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+    return {'requests': count, 'wall_s': wall, 'statuses': {str(k): v for k, v in sorted(statuses.items(), key=str)},
+            'latency_p50_s': percentile(0.50), 'latency_p99_s': percentile(0.99),
+            'latency_max_s': latencies[-1] if latencies else None}
+
+
+def process_usage(pid: int) -> dict:
+    """The process's CPU seconds and peak resident set so far (Linux only)."""
+    usage = {'cpu_s': None, 'peak_rss_kb': None}
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        usage['cpu_s'] = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    usage['peak_rss_kb'] = int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return usage
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the async Gemini proxy against a stub upstream.")
+    parser.add_argument('--requests', type=int, default=4000, help="Requests fired at once")
+    parser.add_argument('--upstream-delay', type=float, default=2.0, help="Seconds the stub takes per request")
+    parser.add_argument('--max-in-flight', type=int, default=4096, help="Proxy MAX_IN_FLIGHT")
+    parser.add_argument('--prompts', type=int, default=0,
+                        help="Distinct prompts shared by the requests (default: every prompt distinct)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Client timeout per request")
+    parser.add_argument('--output', help="Write JSON results to this file instead of stdout")
+    parser.add_argument('--stub-upstream', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.stub_upstream:
+        serve_stub_upstream(args.stub_upstream, args.upstream_delay)
+        return 0
+
+    from benchmarks.bench_flow_engine import git_revision
+
+    # Every request holds a client socket here; the proxy and stub raise their own limits
+    raise_open_file_limit()
+    stub_port, proxy_port = free_port(), free_port()
+    env = dict(os.environ,
+               GEMINI_API_KEY='load-test',
+               GEMINI_API_ENDPOINT=f'http://127.0.0.1:{stub_port}/generate',
+               MAX_IN_FLIGHT=str(args.max_in_flight),
+               RATE_LIMIT='1000000')
+    stub = subprocess.Popen([sys.executable, '-m', 'benchmarks.load_proxy', '--stub-upstream', str(stub_port),
+                             '--upstream-delay', str(args.upstream_delay)])
+    proxy = subprocess.Popen([sys.executable, 'async_server.py', '--host', '127.0.0.1', '--port', str(proxy_port)],
+                             cwd=SERVER_DIR, env=env, stderr=subprocess.DEVNULL)
+    try:
+        async def run():
+            await wait_ready(f'http://127.0.0.1:{stub_port}/ready', stub)
+            await wait_ready(f'http://127.0.0.1:{proxy_port}/test', proxy)
+            result = await fire(f'http://127.0.0.1:{proxy_port}/gemini', args.requests, args.timeout, args.prompts)
+            async with ClientSession() as session:
+                async with session.get(f'http://127.0.0.1:{proxy_port}/cache/stats') as response:
+                    result['cache'] = (await response.json())['cache']
+            return result
+
+        result = asyncio.run(run())
+        result['proxy'] = process_usage(proxy.pid)
+    finally:
+        for process in (proxy, stub):
+            process.terminate()
+            process.wait()
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'args': vars(args),
+        },
+        'results': [result]
+    }
+    print(f"{args.requests} requests, upstream {args.upstream_delay:.1f} s: {result['wall_s']:.2f} s wall, "
+          f"statuses {result['statuses']}, p50 {result['latency_p50_s'] or 0:.2f} s, "
+          f"p99 {result['latency_p99_s'] or 0:.2f} s; proxy {result['proxy']['cpu_s']} CPU s, "
+          f"peak RSS {result['proxy']['peak_rss_kb']} kB; upstream calls {result['cache']['misses']}",
+          file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,6 @@
 import sys
 import logging
 from PyQt5.QtWidgets import QApplication
-from app.main_window import MainWindow
 from app.login_widget import LoginWidget
 
 def setup_logging():
@@ -27,7 +26,9 @@ def main():
             logger.info("Login cancelled")
             return
             
-        # Create and show main window
+        # Create and show main window; NodeGraphQt and the node modules are
+        # only imported once the login dialog has been dismissed
+        from app.main_window import MainWindow
         window = MainWindow()
         window.show()
         
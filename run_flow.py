@@ -0,0 +1,94 @@
+import argparse
+import json
+import logging
+import os
+import sys
+
+from app.flow_engine import FlowEngine
+from app.flow_format import FlowFormatError, load_flow
+from app.headless import HeadlessGraph
+from app.settings_store import default_settings_path, get_settings_store
+
+def setup_logging(verbose: bool):
+    """Setup basic logging configuration."""
+    logging.basicConfig(
+        level=logging.INFO if verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+def resolve_api_key(args) -> str:
+    """Use --api-key, then $GEMINI_API_KEY, then the settings file."""
+    if args.api_key:
+        return args.api_key
+    if os.environ.get('GEMINI_API_KEY'):
+        return os.environ['GEMINI_API_KEY']
+    return get_settings_store(args.settings).get('api_key', '')
+
+def main(argv=None) -> int:
+    """Run a saved flow without the GUI and print each node's output as JSON."""
+    parser = argparse.ArgumentParser(description="Run an AgentricGUI flow headlessly.")
+    parser.add_argument('flow', help="Path to a saved flow (.agflow or JSON session)")
+    parser.add_argument('--parallel', action='store_true', help="Run independent nodes concurrently")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-run every node instead of reusing stored outputs")
+    parser.add_argument('--workers', type=int, default=4, help="Thread pool size for parallel runs")
+    parser.add_argument('--api-key', help="Gemini API key (defaults to $GEMINI_API_KEY or settings)")
+    parser.add_argument('--settings', default=default_settings_path(),
+                        help="Settings file to read the API key from (default: $AGENTRIC_SETTINGS or settings.json)")
+    parser.add_argument('--output', help="Write results to this file instead of stdout")
+    parser.add_argument('--final-only', action='store_true',
+                        help="Free intermediate outputs during the run and report only final ones")
+    parser.add_argument('--inspect', action='store_true',
+                        help="Print node and connection counts without building or running the flow")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log node progress")
+    args = parser.parse_args(argv)
+
+    setup_logging(args.verbose)
+    logger = logging.getLogger('run_flow')
+
+    if args.inspect:
+        try:
+            with load_flow(args.flow) as flow:
+                summary = flow.summary()
+        except (OSError, FlowFormatError) as e:
+            logger.error(f"Could not load flow {args.flow}: {str(e)}")
+            return 1
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return 0
+
+    try:
+        graph = HeadlessGraph.from_session_file(args.flow, api_key=resolve_api_key(args))
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"Could not load flow {args.flow}: {str(e)}")
+        return 1
+
+    engine = FlowEngine(graph, max_workers=args.workers)
+    engine.keep_intermediate = not args.final_only
+    if not engine.validate_connections():
+        logger.error("Flow validation failed - check node connections")
+        return 1
+
+    success = engine.run_flow(parallel=args.parallel, force=args.force)
+    results = {
+        'success': success,
+        'nodes': {
+            node.name(): {
+                'status': node.get_property('status'),
+                'output': engine.get_node_output(node.id) if node.id in engine.results else None
+            }
+            for node in graph.all_nodes()
+            if not args.final_only or node.id in engine.results
+        }
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, default=repr)
+    else:
+        json.dump(results, sys.stdout, indent=2, default=repr)
+        sys.stdout.write('\n')
+    return 0 if success else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,16 @@
 from flask import Flask, render_template, jsonify, request
 import logging
-import json
 import os
+import sys
+
+from app.settings_store import get_settings_store
+
+# Request metrics at GET /metrics, shared with the Gemini proxy
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'AgentricGUI-Server'))
+from metrics import instrument_flask  # noqa: E402
 
 app = Flask(__name__)
+instrument_flask(app)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -32,9 +39,14 @@ def execute_flow():
 @app.route('/api/save_settings', methods=['POST'])
 def save_settings():
     try:
-        settings = request.json
-        with open('settings.json', 'w') as f:
-            json.dump(settings, f)
+        settings = request.get_json(silent=True)
+        if not isinstance(settings, dict):
+            return jsonify({
+                'success': False,
+                'error': 'Settings must be a JSON object'
+            }), 400
+        # Merge so keys the page does not send (e.g. installation_id) are kept
+        get_settings_store().update(settings)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({
@@ -45,14 +57,8 @@ def save_settings():
 @app.route('/api/load_settings', methods=['GET'])
 def load_settings():
     try:
-        if os.path.exists('settings.json'):
-            with open('settings.json', 'r') as f:
-                settings = json.load(f)
-        else:
-            settings = {
-                'api_key': '',
-                'experience_level': 'Novice'
-            }
+        # Served from memory until settings.json changes on disk
+        settings = get_settings_store().load()
         return jsonify(settings)
     except Exception as e:
         return jsonify({